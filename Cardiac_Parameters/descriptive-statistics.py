@@ -2,6 +2,8 @@ import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 
+from analysis.paired_statistics import paired_statistics
+
 # Read the CSV file
 df = pd.read_csv('raw_data.csv')
 
@@ -35,6 +37,10 @@ df = df.rename(columns=column_mapping)
 # List of metrics to analyze
 metrics = ['EDV', 'ESV', 'SV', 'EF', 'HR', 'CO', 'SI', 'CI', 'EA_ratio']
 
+# Paired pre/post effect sizes, bootstrap confidence intervals and permutation p-values per group
+statistics_df = paired_statistics(df, metrics, n_resamples=100000)
+print(statistics_df.round(3).to_string(index=False))
+
 # Function to visualize the results
 def visualize_results(df, metrics):
     num_metrics = len(metrics)
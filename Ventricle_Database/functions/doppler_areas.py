@@ -1,18 +1,49 @@
-import pandas as pd
+import os
 import numpy as np
 import matplotlib.pyplot as plt
+from analysis.interpolant_cache import get_signal
+
+# Predefined short diameter of MV for each patient (in mm)
+short_valve_diameters = {
+    'hypox01': 24.35,
+    'hypox08': 25.0,
+    # 'hypox20': 2.0,
+    'hypox03': 22.5,
+    'hypox09': 22.5,
+    # 'hypox28': 28.5
+}
+
+def find_doppler_csvs(case_path, patient):
+    # Aortic and mitral Doppler CSVs of a case directory (None if missing).
+    # Healthy cases have aortic.csv/mitral.csv, Fontan cases av.csv/avv.csv
+    aortic_csv = None
+    mitral_csv = None
+
+    # Check for different CSV file naming conventions
+    for filename in ['aortic.csv', 'mitral.csv', 'av.csv', 'avv.csv']:
+        filepath = os.path.join(case_path, filename)
+        if os.path.isfile(filepath):
+            if 'aortic' in filename or 'av.csv' in filename:
+                aortic_csv = filepath
+            if 'mitral' in filename or 'avv.csv' in filename:
+                mitral_csv = filepath
+
+    # Special handling for Hypox28 which has only avv.csv
+    if patient.lower() == 'hypox28' and mitral_csv:
+        aortic_csv = mitral_csv
+
+    return aortic_csv, mitral_csv
 
 def read_doppler_data(aortic_csv=None, mitral_csv=None):
     max_velocity_aortic = None
     max_velocity_mitral = None
     
+    # Traces are parsed once per file content and shared with the interpolant cache
     if aortic_csv:
-        aortic_data = pd.read_csv(aortic_csv, header=None)
-        max_velocity_aortic = aortic_data.iloc[:, -1].max()
+        max_velocity_aortic = get_signal(aortic_csv)[1].max()
     
     if mitral_csv:
-        mitral_data = pd.read_csv(mitral_csv, header=None)
-        max_velocity_mitral = mitral_data.iloc[:, -1].max()
+        max_velocity_mitral = get_signal(mitral_csv)[1].max()
     
     return max_velocity_aortic, max_velocity_mitral
 
@@ -1,6 +1,7 @@
 import re
 import numpy as np
 import matplotlib.pyplot as plt
+from analysis.downsampling import downsample
 
 def parse_volumes_from_text(text):
     volumelist_pattern = r'Volumelist: \[(.*?)\]'
@@ -44,13 +45,19 @@ def normalize_time(timestamps):
     normalized_time = [(t - min_time) / (max_time - min_time) for t in timestamps]
     return normalized_time
 
+def _paired_arrays(old_volumes, new_volumes):
+    # Pair the volumes frame by frame, ignoring trailing frames of the longer list (as zip did)
+    num_frames = min(len(old_volumes), len(new_volumes))
+    return np.asarray(old_volumes[:num_frames], dtype=float), np.asarray(new_volumes[:num_frames], dtype=float)
+
 def calculate_average_volume_difference(old_volumes, new_volumes):
-    volume_differences = [new - old for old, new in zip(old_volumes, new_volumes)]
-    average_difference = np.mean(volume_differences)
+    old_volumes, new_volumes = _paired_arrays(old_volumes, new_volumes)
+    average_difference = np.mean(new_volumes - old_volumes)
     return average_difference
 
 def calculate_percentage_differences(old_volumes, new_volumes):
-    percentage_differences = [(new - old) / old * 100 for old, new in zip(old_volumes, new_volumes)]
+    old_volumes, new_volumes = _paired_arrays(old_volumes, new_volumes)
+    percentage_differences = (new_volumes - old_volumes) / old_volumes * 100
     return percentage_differences
 
 def plot_volumes_and_differences(timestamps, old_volumes, new_volumes):
@@ -63,8 +70,8 @@ def plot_volumes_and_differences(timestamps, old_volumes, new_volumes):
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 8), sharex=False)
 
     # Line plot for volumes with normalized time
-    ax1.plot(normalized_time, old_volumes, label='Old Volumes', marker='o', linestyle='-')
-    ax1.plot(normalized_time, new_volumes, label='New Volumes', marker='o', linestyle='-')
+    ax1.plot(*downsample(normalized_time, old_volumes, ax1), label='Old Volumes', marker='o', linestyle='-')
+    ax1.plot(*downsample(normalized_time, new_volumes, ax1), label='New Volumes', marker='o', linestyle='-')
     ax1.set_ylabel('Volume (ml)')
     ax1.set_title('Volumes Over Time (Normalized)')
     ax1.legend()
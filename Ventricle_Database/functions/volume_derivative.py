@@ -1,5 +1,6 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from analysis.downsampling import downsample
 from scipy.interpolate import interp1d
 from .volume_analysis import parse_volumes_from_text
 
@@ -82,7 +83,7 @@ def plot_dv_dt(fine_time_intervals, interpolated_dv_dt):
     fig = plt.figure()
     
     # Plot interpolated dv/dt
-    plt.plot(fine_midpoints, interpolated_dv_dt, marker='o', linestyle='-', label='Volumetric Derivation')
+    plt.plot(*downsample(fine_midpoints, interpolated_dv_dt, plt.gca()), marker='o', linestyle='-', label='Volumetric Derivation')
     
     plt.xlabel('Normalized Cardiac Cycle')
     plt.ylabel('dv/dt (cm³/s)')
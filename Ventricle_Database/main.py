@@ -2,24 +2,17 @@ import os
 import matplotlib.pyplot as plt
 import pandas as pd
 
+from analysis.cases import get_case
+from analysis.tracing import span
+
 # Import the necessary functions
 from functions.header_processing import parse_timestamps_from_header, parse_rr_duration_from_header
 from functions.volume_analysis import calculate_average_volume_difference, plot_volumes_and_differences
 from functions.volume_derivative import calculate_dv_dt, min_max_dv_dt, plot_dv_dt, process_volume_derivative  # Ensure process_volume_derivative is imported
-from functions.doppler_areas import read_doppler_data, calculate_valve_areas, plot_mitral_valve_shape
+from functions.doppler_areas import find_doppler_csvs, read_doppler_data, calculate_valve_areas, plot_mitral_valve_shape, short_valve_diameters
 from functions.output import print_time_information, print_volume_information, print_average_volume_difference, print_velocity, print_valve_results, print_reynolds_number
 from functions.reynolds import calculate_reynolds_number
 
-# Predefined short diameter of MV for each patient (in mm)
-short_valve_diameters = {
-    'hypox01': 24.35,
-    'hypox08': 25.0,
-    # 'hypox20': 2.0,
-    'hypox03': 22.5,
-    'hypox09': 22.5,
-    # 'hypox28': 28.5
-}
-
 def read_volumes_from_file(file_path):
     with open(file_path, 'r') as file:
         lines = file.readlines()
@@ -34,12 +27,15 @@ def process_single_case(case):
     aortic_csv = case['aortic_csv']
     mitral_csv = case['mitral_csv']
     short_valve_diameter = case['short_valve_diameter']
+    case_name = f'{patient}_{condition}'
 
     # Read header and volume data
     header_file = os.path.join(case_path, 'header.txt')
-    rr_duration_timestamps = parse_timestamps_from_header(header_file)
-    avg_rr_duration, endsystole_time, enddiastole_time = parse_rr_duration_from_header(header_file)
-    old_volumes = read_volumes_from_file(raw_volume_path)
+    with span('main.read_header', case_name):
+        rr_duration_timestamps = parse_timestamps_from_header(header_file)
+        avg_rr_duration, endsystole_time, enddiastole_time = parse_rr_duration_from_header(header_file)
+    with span('main.read_volumes', case_name, volume_type='raw'):
+        old_volumes = read_volumes_from_file(raw_volume_path)
 
     edv = max(old_volumes)
     edv_position = old_volumes.index(edv)
@@ -55,7 +51,8 @@ def process_single_case(case):
 
     average_difference = None
     if os.path.isfile(reconstructed_volume_path):
-        new_volumes = read_volumes_from_file(reconstructed_volume_path)
+        with span('main.read_volumes', case_name, volume_type='reconstructed'):
+            new_volumes = read_volumes_from_file(reconstructed_volume_path)
         edv_reconstructed = max(new_volumes)
         edv_position_reconstructed = new_volumes.index(edv_reconstructed)
         esv_reconstructed = min(new_volumes)
@@ -70,19 +67,23 @@ def process_single_case(case):
         print_average_volume_difference(average_difference)
 
     # Calculate volume derivative
-    dv_dt = calculate_dv_dt(old_volumes, rr_duration_timestamps)
-    min_dv_dt, max_dv_dt = min_max_dv_dt(dv_dt)
+    with span('main.volume_derivative', case_name):
+        dv_dt = calculate_dv_dt(old_volumes, rr_duration_timestamps)
+        min_dv_dt, max_dv_dt = min_max_dv_dt(dv_dt)
 
     # Read Doppler data
-    max_velocity_aortic, max_velocity_mitral = read_doppler_data(aortic_csv, mitral_csv)
+    with span('main.read_doppler', case_name):
+        max_velocity_aortic, max_velocity_mitral = read_doppler_data(aortic_csv, mitral_csv)
     print_velocity(max_velocity_aortic, max_velocity_mitral)
 
     # Calculate valve areas
-    valve_areas = calculate_valve_areas(min_dv_dt, max_dv_dt, max_velocity_aortic, max_velocity_mitral, short_valve_diameter)
+    with span('main.valve_areas', case_name):
+        valve_areas = calculate_valve_areas(min_dv_dt, max_dv_dt, max_velocity_aortic, max_velocity_mitral, short_valve_diameter)
     print_valve_results(*valve_areas[:9])
 
     # Calculate and print Reynolds number
-    re_mitral, flow_type_mitral = calculate_reynolds_number(valve_areas[7], max_velocity_mitral)
+    with span('main.reynolds', case_name):
+        re_mitral, flow_type_mitral = calculate_reynolds_number(valve_areas[7], max_velocity_mitral)
     print_reynolds_number(re_mitral, flow_type_mitral)
 
     # Save results to a DataFrame
@@ -122,47 +123,49 @@ def process_single_case(case):
         })
 
     # Save results to a CSV file
-    output_file = f'output/{patient}_{condition}_results.csv'
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    with open(output_file, 'w') as file:
-        file.write(f"Average RR Duration: {avg_rr_duration:.2f} ms\n")
-        file.write(f"Enddiastole Time: {enddiastole_time:.2f} ms\n")
-        file.write(f"Endsystole Time: {endsystole_time:.2f} ms\n\n")
-        file.write(f"Raw\n")
-        file.write(f"Max volume (EDV): {edv:.4f} ml at position: {edv_position}\n")
-        file.write(f"Min volume (ESV): {esv:.4f} ml at position: {esv_position}\n")
-        file.write(f"Stroke volume: {stroke_volume:.4f} ml\n\n")
-        if average_difference is not None:
-            file.write(f"Reconstructed\n")
-            file.write(f"Max volume (EDV): {edv_reconstructed:.4f} ml at position: {edv_position_reconstructed}\n")
-            file.write(f"Min volume (ESV): {esv_reconstructed:.4f} ml at position: {esv_position_reconstructed}\n")
-            file.write(f"Stroke volume: {stroke_volume_reconstructed:.4f} ml\n\n")
-            file.write(f"Average Volume Difference: {average_difference:.4f} ml\n\n")
-        file.write(f"Max Velocity (Aortic): {max_velocity_aortic:.2f} cm/s\n")
-        file.write(f"Max Velocity (Mitral): {max_velocity_mitral:.2f} cm/s\n\n")
-        file.write(f"Min dV/dt (Aortic): {min_dv_dt:.4f} ml/ms\n")
-        file.write(f"Max dV/dt (Mitral): {max_dv_dt:.4f} ml/ms\n\n")
-        file.write(f"--- AORTIC VALVE RESULTS ---\n")
-        file.write(f"Aortic Valve Area: {valve_areas[0]:.4f} mm^2\n")
-        file.write(f"Aortic Valve Radius: {valve_areas[0] ** 0.5 / 3.14159 * 2:.4f} mm\n\n")
-        file.write(f"--- MITRAL VALVE RESULTS ---\n")
-        file.write(f"Mitral Valve Area: {valve_areas[2]:.4f} mm^2\n")
-        file.write(f"Updated Mitral Valve Area (after iterations): {valve_areas[2]:.4f} mm^2\n")
-        file.write(f"Mitral Valve Long Axis Radius (after iterations): {valve_areas[4]:.4f} mm\n")
-        file.write(f"Mitral Valve Upper Short Axis Radius: {valve_areas[5]:.4f} mm\n")
-        file.write(f"Mitral Valve Lower Short Axis Radius: {valve_areas[6]:.4f} mm\n")
-        file.write(f"Mitral Valve Hydraulic Diameter: {valve_areas[7]:.4f} mm\n")
-        file.write(f"Mitral Valve Circumference: {valve_areas[8]:.4f} mm\n\n")
-        file.write(f"Reynolds Number (Mitral Valve): {re_mitral:.2f} ({flow_type_mitral} flow)\n")
+    with span('main.write_results', case_name):
+        output_file = f'output/{patient}_{condition}_results.csv'
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        with open(output_file, 'w') as file:
+            file.write(f"Average RR Duration: {avg_rr_duration:.2f} ms\n")
+            file.write(f"Enddiastole Time: {enddiastole_time:.2f} ms\n")
+            file.write(f"Endsystole Time: {endsystole_time:.2f} ms\n\n")
+            file.write(f"Raw\n")
+            file.write(f"Max volume (EDV): {edv:.4f} ml at position: {edv_position}\n")
+            file.write(f"Min volume (ESV): {esv:.4f} ml at position: {esv_position}\n")
+            file.write(f"Stroke volume: {stroke_volume:.4f} ml\n\n")
+            if average_difference is not None:
+                file.write(f"Reconstructed\n")
+                file.write(f"Max volume (EDV): {edv_reconstructed:.4f} ml at position: {edv_position_reconstructed}\n")
+                file.write(f"Min volume (ESV): {esv_reconstructed:.4f} ml at position: {esv_position_reconstructed}\n")
+                file.write(f"Stroke volume: {stroke_volume_reconstructed:.4f} ml\n\n")
+                file.write(f"Average Volume Difference: {average_difference:.4f} ml\n\n")
+            file.write(f"Max Velocity (Aortic): {max_velocity_aortic:.2f} cm/s\n")
+            file.write(f"Max Velocity (Mitral): {max_velocity_mitral:.2f} cm/s\n\n")
+            file.write(f"Min dV/dt (Aortic): {min_dv_dt:.4f} ml/ms\n")
+            file.write(f"Max dV/dt (Mitral): {max_dv_dt:.4f} ml/ms\n\n")
+            file.write(f"--- AORTIC VALVE RESULTS ---\n")
+            file.write(f"Aortic Valve Area: {valve_areas[0]:.4f} mm^2\n")
+            file.write(f"Aortic Valve Radius: {valve_areas[0] ** 0.5 / 3.14159 * 2:.4f} mm\n\n")
+            file.write(f"--- MITRAL VALVE RESULTS ---\n")
+            file.write(f"Mitral Valve Area: {valve_areas[2]:.4f} mm^2\n")
+            file.write(f"Updated Mitral Valve Area (after iterations): {valve_areas[2]:.4f} mm^2\n")
+            file.write(f"Mitral Valve Long Axis Radius (after iterations): {valve_areas[4]:.4f} mm\n")
+            file.write(f"Mitral Valve Upper Short Axis Radius: {valve_areas[5]:.4f} mm\n")
+            file.write(f"Mitral Valve Lower Short Axis Radius: {valve_areas[6]:.4f} mm\n")
+            file.write(f"Mitral Valve Hydraulic Diameter: {valve_areas[7]:.4f} mm\n")
+            file.write(f"Mitral Valve Circumference: {valve_areas[8]:.4f} mm\n\n")
+            file.write(f"Reynolds Number (Mitral Valve): {re_mitral:.2f} ({flow_type_mitral} flow)\n")
 
     print(f"Results saved to {output_file}")
 
     # Plot results
     figs = []
-    figs.append(plot_volumes_and_differences(rr_duration_timestamps, old_volumes, new_volumes))
-    min_dv_dt, max_dv_dt, dv_dt_fig = process_volume_derivative(old_volumes, rr_duration_timestamps)
-    figs.append(dv_dt_fig)
-    figs.append(plot_mitral_valve_shape(valve_areas[4], valve_areas[5], valve_areas[6]))
+    with span('main.plot', case_name):
+        figs.append(plot_volumes_and_differences(rr_duration_timestamps, old_volumes, new_volumes))
+        min_dv_dt, max_dv_dt, dv_dt_fig = process_volume_derivative(old_volumes, rr_duration_timestamps)
+        figs.append(dv_dt_fig)
+        figs.append(plot_mitral_valve_shape(valve_areas[4], valve_areas[5], valve_areas[6]))
 
     for fig in figs:
         plt.show()  # Display each figure
@@ -192,30 +195,26 @@ if __name__ == "__main__":
     # Convert patient to lowercase to match file naming convention
     selected_patient = selected_patient.lower()
 
+    # Look up the case paths in the case registry
+    registry_case = get_case(f'{selected_patient}_{selected_condition}')
+    if registry_case['case_path'] is None:
+        raise ValueError(f"Case directory for case '{registry_case['case']}' not found.")
+    if registry_case['raw_volume_path'] is None:
+        raise ValueError(f"Raw volumes for case '{registry_case['case']}' not found.")
     case = {
         'patient_type': selected_patient_type,
         'patient': selected_patient,
         'condition': selected_condition,
-        'case_path': f'data/{selected_patient_type}/{selected_condition}/{selected_patient}',
-        'raw_volume_path': f'data/volumes/raw/{selected_patient}_{selected_condition}.txt',
-        'reconstructed_volume_path': f'data/volumes/reconstructed/{selected_patient}_{selected_condition}.txt',
+        'case_path': registry_case['case_path'],
+        'raw_volume_path': registry_case['raw_volume_path'],
+        'reconstructed_volume_path': registry_case['reconstructed_volume_path'] or '',
         'aortic_csv': None,
         'mitral_csv': None,
         'short_valve_diameter': short_valve_diameters[selected_patient]
     }
 
-    # Check for different CSV file naming conventions
-    for filename in ['aortic.csv', 'mitral.csv', 'av.csv', 'avv.csv']:
-        filepath = os.path.join(case['case_path'], filename)
-        if os.path.isfile(filepath):
-            if 'aortic' in filename or 'av.csv' in filename:
-                case['aortic_csv'] = filepath
-            if 'mitral' in filename or 'avv.csv' in filename:
-                case['mitral_csv'] = filepath
-
-    # Special handling for Hypox28 which has only avv.csv
-    if selected_patient == 'hypox28' and case['mitral_csv']:
-        case['aortic_csv'] = case['mitral_csv']
+    # Doppler traces of the case directory (naming conventions and the Hypox28 rule in find_doppler_csvs)
+    case['aortic_csv'], case['mitral_csv'] = find_doppler_csvs(case['case_path'], selected_patient)
 
     process_single_case(case)
     plt.show()  # Ensure that all figures remain displayed
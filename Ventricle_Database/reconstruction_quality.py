@@ -0,0 +1,6 @@
+from analysis.reconstruction_errors import reconstruction_error_table
+
+if __name__ == "__main__":
+    table = reconstruction_error_table()
+    print("Reconstructed vs raw volumes (ml):")
+    print(table.to_string(index=False, float_format=lambda value: f"{value:.4f}"))
@@ -0,0 +1,15 @@
+from analysis.curve_index import build_cohort_index
+
+if __name__ == "__main__":
+    index = build_cohort_index()
+    print(f"Indexed {len(index)} volume curves with {index.components.shape[0]} functional PCA components")
+
+    selected_case = input("Enter case (e.g. hypox01_pre:raw): ").strip()
+    labels, distances = index.query_label(selected_case, k=5)
+    print(f"Most similar curves to {selected_case}:")
+    for label, distance in zip(labels, distances):
+        print(f"  {label}: {distance:.3f}")
+
+    print("\nOutliers:")
+    outliers = index.outliers()
+    print(outliers[outliers['outlier']].to_string(index=False) if outliers['outlier'].any() else "  none")
@@ -0,0 +1,21 @@
+import matplotlib.pyplot as plt
+
+from analysis.downsampling import downsample
+from analysis.valve_dynamics import time_resolved_valves, valve_dynamics_table
+
+if __name__ == "__main__":
+    result = time_resolved_valves()
+    print(valve_dynamics_table(result).to_string(index=False, float_format=lambda value: f"{value:.2f}"))
+
+    # Effective orifice area over the cycle of every case
+    fig, axs = plt.subplots(1, 2, figsize=(14, 5), sharey=True)
+    for ax, valve, title in zip(axs, ('mv', 'av'), ('Mitral Valve', 'Aortic Valve')):
+        for case, area in zip(result['labels'], result[f'area_{valve}']):
+            ax.plot(*downsample(result['time'], area, ax), label=case)
+        ax.set_title(title)
+        ax.set_xlabel('Time (fraction of RR from end-diastole)')
+        ax.grid(True)
+    axs[0].set_ylabel('Effective Orifice Area (mm²)')
+    axs[1].legend()
+    plt.tight_layout()
+    plt.show()
@@ -4,6 +4,14 @@ import numpy as np
 import matplotlib.pyplot as plt
 from scipy.interpolate import interp1d
 
+from analysis.cases import get_case
+from analysis.cohort_stream import CurveReducer, field, reduce_cohort
+from analysis.confidence_bands import bootstrap_mean_bands
+from analysis.moments import Moments
+from analysis.time_warping import pad_curves, extrema_landmarks, header_landmarks, warp_curves
+from analysis.tracing import span
+from functions.header_processing import parse_timestamps_from_header, parse_rr_duration_from_header
+
 # Set font style and size globally
 plt.rcParams['font.family'] = 'serif'  # Set the font family (e.g., 'serif', 'sans-serif', 'monospace')
 plt.rcParams['font.size'] = 14  # Set the font size
@@ -34,59 +42,138 @@ def normalize_time_series(volumes, num_points=100):
     normalized_volumes = interpolated_func(normalized_time)
     return normalized_time, normalized_volumes
 
-def process_group_volumes(patient_group, condition, volume_type='raw'):
-    """Processes volume data for a group of patients and normalizes the volumes."""
-    all_normalized_volumes = []
+def process_group_volumes(patient_group, condition, volume_type='raw', landmarks=None, num_points=100):
+    """Processes volume data for a group of patients and normalizes the volumes.
+
+    With landmarks='extrema' (ES/ED at the volume minimum/maximum) or landmarks='header'
+    (ES at the first frame, ED one diastole duration of header.txt later), the curves are aligned on their landmarks with a
+    piecewise-linear time warp instead of being stretched linearly."""
+    all_volumes = []
+    header_positions = []
     
     for patient in patient_group:
         volume_path = f'data/volumes/{volume_type}/{patient}_{condition}.txt'
         if os.path.isfile(volume_path):
-            volumes = read_volumes(volume_path)
-            _, normalized_volumes = normalize_time_series(volumes)
-            all_normalized_volumes.append(normalized_volumes)
-    
-    return np.array(all_normalized_volumes)
-
-def calculate_mean_and_std(volumes_array):
-    """Calculate mean and standard deviation across multiple normalized volume series."""
-    mean_volumes = np.mean(volumes_array, axis=0)
-    std_volumes = np.std(volumes_array, axis=0)
-    return mean_volumes, std_volumes
+            with span('volumes.read', f'{patient}_{condition}', volume_type=volume_type):
+                all_volumes.append(read_volumes(volume_path))
+                if landmarks == 'header':
+                    header_file = get_case(f'{patient}_{condition}')['header_path']
+                    avg_rr_duration, systole_duration, _ = parse_rr_duration_from_header(header_file)
+                    header_positions.append(header_landmarks(parse_timestamps_from_header(header_file), systole_duration, avg_rr_duration))
+
+    if not all_volumes:
+        return np.empty((0, num_points))
+    stack, lengths = pad_curves(all_volumes)
+    if landmarks is None:
+        curve_landmarks = np.empty((len(lengths), 0))
+    elif landmarks == 'extrema':
+        curve_landmarks = extrema_landmarks(stack, lengths)
+    elif landmarks == 'header':
+        curve_landmarks = np.array(header_positions)
+    else:
+        raise ValueError(f"Unknown landmarks '{landmarks}', expected None, 'extrema' or 'header'")
+    with span('volumes.warp', curves=len(lengths), condition=condition, volume_type=volume_type):
+        _, warped_volumes, _ = warp_curves(stack, lengths, curve_landmarks, num_points=num_points)
+    return warped_volumes
+
+def _group_volume_records(patient_group, condition, volume_type='raw'):
+    """Yields one record per existing volume file of the group, reading each file only when it is reached."""
+    for patient in patient_group:
+        volume_path = f'data/volumes/{volume_type}/{patient}_{condition}.txt'
+        if os.path.isfile(volume_path):
+            yield {'case': f'{patient}_{condition}', 'volumes': read_volumes(volume_path)}
+
+def _extrema_landmarks(record, curve):
+    """[ES, ED] positions of one curve at its volume minimum/maximum."""
+    stack, lengths = pad_curves([curve])
+    return extrema_landmarks(stack, lengths)[0]
+
+def _header_landmarks(record, curve):
+    """[ES, ED] positions of one curve from the header.txt of its case."""
+    header_file = get_case(record['case'])['header_path']
+    avg_rr_duration, systole_duration, _ = parse_rr_duration_from_header(header_file)
+    return header_landmarks(parse_timestamps_from_header(header_file), systole_duration, avg_rr_duration)
+
+def accumulate_group_volumes(patient_group, condition, volume_type='raw', landmarks=None, reference=None, num_points=100):
+    """Streams the normalized volumes of a group into pointwise moments without stacking them.
+
+    landmarks is None, 'extrema' or 'header' as in process_group_volumes. A single pass cannot average the
+    landmarks of the group, so the curves are aligned on the fixed [ES, ED] reference positions instead."""
+    landmark_functions = {None: None, 'extrema': _extrema_landmarks, 'header': _header_landmarks}
+    if landmarks not in landmark_functions:
+        raise ValueError(f"Unknown landmarks '{landmarks}', expected None, 'extrema' or 'header'")
+    reducers = {'volumes': CurveReducer(field('volumes'), num_points, landmarks=landmark_functions[landmarks],
+                                          reference=None if landmarks is None else reference)}
+    return reduce_cohort(_group_volume_records(patient_group, condition, volume_type), reducers)['volumes']
+
+def calculate_mean_and_std(volumes):
+    """Calculate mean and standard deviation across multiple normalized volume series.
+
+    Accepts either a stacked (patients x points) array or the Moments returned by accumulate_group_volumes."""
+    moments = volumes if isinstance(volumes, Moments) else Moments.from_data(volumes)
+    return moments.mean, moments.std()
+
+def calculate_mean_and_band(volumes, band='simultaneous', n_resamples=10000, confidence=0.95, seed=0):
+    """Calculate the mean curve and its bootstrap confidence band ('pointwise' or 'simultaneous').
+
+    Returns (mean, low, high); mean +/- std is misleading for groups of two or three patients."""
+    with span('volumes.bootstrap_bands', curves=len(volumes), resamples=n_resamples):
+        bands = bootstrap_mean_bands(volumes, n_resamples, confidence, rng=seed)
+    return bands['mean'], bands[f'{band}_low'], bands[f'{band}_high']
+
+def band_limits(stats):
+    """Return (mean, low, high) from either (mean, std) or (mean, low, high) statistics."""
+    if len(stats) == 2:
+        mean, std = stats
+        return mean, mean - std, mean + std
+    return stats
+
+def group_statistics(patient_group, condition, volume_type='raw', landmarks=None, statistics='bootstrap', reference=None):
+    """Mean curve and band of a group.
+
+    statistics='bootstrap' stacks the curves for the bootstrap confidence band (calculate_mean_and_band);
+    statistics='streaming' reads the files in one constant-memory pass and returns mean and std, aligning
+    landmarks on the fixed reference (see accumulate_group_volumes)."""
+    if statistics == 'bootstrap':
+        return calculate_mean_and_band(process_group_volumes(patient_group, condition, volume_type=volume_type, landmarks=landmarks))
+    if statistics == 'streaming':
+        return calculate_mean_and_std(accumulate_group_volumes(patient_group, condition, volume_type=volume_type, landmarks=landmarks, reference=reference))
+    raise ValueError(f"Unknown statistics '{statistics}', expected 'bootstrap' or 'streaming'")
 
 def plot_group_statistics(normalized_time, stats_healthy_raw, stats_healthy_reconstructed, stats_univentricular_raw, stats_univentricular_reconstructed):
-    """Plot the mean and standard deviation for healthy and univentricular patients for both raw and reconstructed volumes."""
+    """Plot the mean and standard deviation (or confidence band) for healthy and univentricular patients for both raw and reconstructed volumes."""
     fig, axs = plt.subplots(2, 2, figsize=(14, 10))
 
     # Top-Left: Healthy Pre and Post Raw Volumes
-    mean_healthy_pre_raw, std_healthy_pre_raw = stats_healthy_raw[0]
-    mean_healthy_post_raw, std_healthy_post_raw = stats_healthy_raw[1]
+    mean_healthy_pre_raw, low_healthy_pre_raw, high_healthy_pre_raw = band_limits(stats_healthy_raw[0])
+    mean_healthy_post_raw, low_healthy_post_raw, high_healthy_post_raw = band_limits(stats_healthy_raw[1])
     axs[0, 0].plot(normalized_time, mean_healthy_pre_raw, color='blue', label='Pre Mean Volume')
-    axs[0, 0].fill_between(normalized_time, mean_healthy_pre_raw - std_healthy_pre_raw, mean_healthy_pre_raw + std_healthy_pre_raw, color='blue', alpha=0.3)
+    axs[0, 0].fill_between(normalized_time, low_healthy_pre_raw, high_healthy_pre_raw, color='blue', alpha=0.3)
     axs[0, 0].plot(normalized_time, mean_healthy_post_raw, color='cyan', label='Post Mean Volume')
-    axs[0, 0].fill_between(normalized_time, mean_healthy_post_raw - std_healthy_post_raw, mean_healthy_post_raw + std_healthy_post_raw, color='cyan', alpha=0.3)
+    axs[0, 0].fill_between(normalized_time, low_healthy_post_raw, high_healthy_post_raw, color='cyan', alpha=0.3)
     axs[0, 0].set_title('Healthy Raw Volumes')
     # axs[0, 0].set_ylabel('Volume (ml)')
     axs[0, 0].legend()
     axs[0, 0].grid(True)
 
     # Top-Right: Univentricular Pre and Post Raw Volumes
-    mean_univentricular_pre_raw, std_univentricular_pre_raw = stats_univentricular_raw[0]
-    mean_univentricular_post_raw, std_univentricular_post_raw = stats_univentricular_raw[1]
+    mean_univentricular_pre_raw, low_univentricular_pre_raw, high_univentricular_pre_raw = band_limits(stats_univentricular_raw[0])
+    mean_univentricular_post_raw, low_univentricular_post_raw, high_univentricular_post_raw = band_limits(stats_univentricular_raw[1])
     axs[0, 1].plot(normalized_time, mean_univentricular_pre_raw, color='red', label='Pre Mean Volume')
-    axs[0, 1].fill_between(normalized_time, mean_univentricular_pre_raw - std_univentricular_pre_raw, mean_univentricular_pre_raw + std_univentricular_pre_raw, color='red', alpha=0.3)
+    axs[0, 1].fill_between(normalized_time, low_univentricular_pre_raw, high_univentricular_pre_raw, color='red', alpha=0.3)
     axs[0, 1].plot(normalized_time, mean_univentricular_post_raw, color='yellow', label='Post Mean Volume')
-    axs[0, 1].fill_between(normalized_time, mean_univentricular_post_raw - std_univentricular_post_raw, mean_univentricular_post_raw + std_univentricular_post_raw, color='yellow', alpha=0.3)
+    axs[0, 1].fill_between(normalized_time, low_univentricular_post_raw, high_univentricular_post_raw, color='yellow', alpha=0.3)
     axs[0, 1].set_title('Univentricular Raw Volumes')
     axs[0, 1].legend()
     axs[0, 1].grid(True)
 
     # Bottom-Left: Healthy Pre and Post Reconstructed Volumes
-    mean_healthy_pre_reconstructed, std_healthy_pre_reconstructed = stats_healthy_reconstructed[0]
-    mean_healthy_post_reconstructed, std_healthy_post_reconstructed = stats_healthy_reconstructed[1]
+    mean_healthy_pre_reconstructed, low_healthy_pre_reconstructed, high_healthy_pre_reconstructed = band_limits(stats_healthy_reconstructed[0])
+    mean_healthy_post_reconstructed, low_healthy_post_reconstructed, high_healthy_post_reconstructed = band_limits(stats_healthy_reconstructed[1])
     axs[1, 0].plot(normalized_time, mean_healthy_pre_reconstructed, color='blue', label='Pre Mean Volume')
-    axs[1, 0].fill_between(normalized_time, mean_healthy_pre_reconstructed - std_healthy_pre_reconstructed, mean_healthy_pre_reconstructed + std_healthy_pre_reconstructed, color='blue', alpha=0.3)
+    axs[1, 0].fill_between(normalized_time, low_healthy_pre_reconstructed, high_healthy_pre_reconstructed, color='blue', alpha=0.3)
     axs[1, 0].plot(normalized_time, mean_healthy_post_reconstructed, color='cyan', label='Post Mean Volume')
-    axs[1, 0].fill_between(normalized_time, mean_healthy_post_reconstructed - std_healthy_post_reconstructed, mean_healthy_post_reconstructed + std_healthy_post_reconstructed, color='cyan', alpha=0.3)
+    axs[1, 0].fill_between(normalized_time, low_healthy_post_reconstructed, high_healthy_post_reconstructed, color='cyan', alpha=0.3)
     axs[1, 0].set_title('Healthy Reconstructed Volumes')
     # axs[1, 0].set_xlabel('Normalized Time')
     # axs[1, 0].set_ylabel('Volume (ml)')
@@ -94,12 +181,12 @@ def plot_group_statistics(normalized_time, stats_healthy_raw, stats_healthy_reco
     axs[1, 0].grid(True)
 
     # Bottom-Right: Univentricular Pre and Post Reconstructed Volumes
-    mean_univentricular_pre_reconstructed, std_univentricular_pre_reconstructed = stats_univentricular_reconstructed[0]
-    mean_univentricular_post_reconstructed, std_univentricular_post_reconstructed = stats_univentricular_reconstructed[1]
+    mean_univentricular_pre_reconstructed, low_univentricular_pre_reconstructed, high_univentricular_pre_reconstructed = band_limits(stats_univentricular_reconstructed[0])
+    mean_univentricular_post_reconstructed, low_univentricular_post_reconstructed, high_univentricular_post_reconstructed = band_limits(stats_univentricular_reconstructed[1])
     axs[1, 1].plot(normalized_time, mean_univentricular_pre_reconstructed, color='red', label='Pre Mean Volume')
-    axs[1, 1].fill_between(normalized_time, mean_univentricular_pre_reconstructed - std_univentricular_pre_reconstructed, mean_univentricular_pre_reconstructed + std_univentricular_pre_reconstructed, color='red', alpha=0.3)
+    axs[1, 1].fill_between(normalized_time, low_univentricular_pre_reconstructed, high_univentricular_pre_reconstructed, color='red', alpha=0.3)
     axs[1, 1].plot(normalized_time, mean_univentricular_post_reconstructed, color='yellow', label='Post Mean Volume')
-    axs[1, 1].fill_between(normalized_time, mean_univentricular_post_reconstructed - std_univentricular_post_reconstructed, mean_univentricular_post_reconstructed + std_univentricular_post_reconstructed, color='yellow', alpha=0.3)
+    axs[1, 1].fill_between(normalized_time, low_univentricular_post_reconstructed, high_univentricular_post_reconstructed, color='yellow', alpha=0.3)
     axs[1, 1].set_title('Univentricular Reconstructed Volumes')
     # axs[1, 1].set_xlabel('Normalized Time')
     axs[1, 1].legend()
@@ -123,34 +210,32 @@ if __name__ == "__main__":
     univentricular_patients = ['hypox03', 'hypox09', 'hypox28']
     conditions = ['pre', 'post']
 
-    # Process raw volumes for both groups and conditions
-    healthy_pre_volumes_raw = process_group_volumes(healthy_patients, 'pre', volume_type='raw')
-    healthy_post_volumes_raw = process_group_volumes(healthy_patients, 'post', volume_type='raw')
-    univentricular_pre_volumes_raw = process_group_volumes(univentricular_patients, 'pre', volume_type='raw')
-    univentricular_post_volumes_raw = process_group_volumes(univentricular_patients, 'post', volume_type='raw')
+    # Align the curves on their ES/ED volume extrema before averaging (None: linear stretch only)
+    landmarks = 'extrema'
+
+    # 'bootstrap': simultaneous 95% bootstrap band of the stacked curves; 'streaming': mean +/- std
+    # accumulated one file at a time in constant memory, for cohorts too large to stack
+    statistics = 'bootstrap'
 
-    # Process reconstructed volumes for both groups and conditions
-    healthy_pre_volumes_reconstructed = process_group_volumes(healthy_patients, 'pre', volume_type='reconstructed')
-    healthy_post_volumes_reconstructed = process_group_volumes(healthy_patients, 'post', volume_type='reconstructed')
-    univentricular_pre_volumes_reconstructed = process_group_volumes(univentricular_patients, 'pre', volume_type='reconstructed')
-    univentricular_post_volumes_reconstructed = process_group_volumes(univentricular_patients, 'post', volume_type='reconstructed')
+    # Fixed [ES, ED] positions the streaming pass aligns on (the volume maximum lies at 0.44-0.70 in this cohort)
+    streaming_reference = (0.0, 0.6)
 
-    # Calculate mean and std for each group and condition
+    # Mean and band for each group and condition, raw and reconstructed volumes
     stats_healthy_raw = (
-        calculate_mean_and_std(healthy_pre_volumes_raw),
-        calculate_mean_and_std(healthy_post_volumes_raw)
+        group_statistics(healthy_patients, 'pre', 'raw', landmarks, statistics, streaming_reference),
+        group_statistics(healthy_patients, 'post', 'raw', landmarks, statistics, streaming_reference)
     )
     stats_univentricular_raw = (
-        calculate_mean_and_std(univentricular_pre_volumes_raw),
-        calculate_mean_and_std(univentricular_post_volumes_raw)
+        group_statistics(univentricular_patients, 'pre', 'raw', landmarks, statistics, streaming_reference),
+        group_statistics(univentricular_patients, 'post', 'raw', landmarks, statistics, streaming_reference)
     )
     stats_healthy_reconstructed = (
-        calculate_mean_and_std(healthy_pre_volumes_reconstructed),
-        calculate_mean_and_std(healthy_post_volumes_reconstructed)
+        group_statistics(healthy_patients, 'pre', 'reconstructed', landmarks, statistics, streaming_reference),
+        group_statistics(healthy_patients, 'post', 'reconstructed', landmarks, statistics, streaming_reference)
     )
     stats_univentricular_reconstructed = (
-        calculate_mean_and_std(univentricular_pre_volumes_reconstructed),
-        calculate_mean_and_std(univentricular_post_volumes_reconstructed)
+        group_statistics(univentricular_patients, 'pre', 'reconstructed', landmarks, statistics, streaming_reference),
+        group_statistics(univentricular_patients, 'post', 'reconstructed', landmarks, statistics, streaming_reference)
     )
 
     # Common normalized time vector
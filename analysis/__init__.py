@@ -0,0 +1 @@
+"""Shared analysis helpers for the Fluent, Doppler and ventricle scripts."""
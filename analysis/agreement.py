@@ -0,0 +1,115 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cases import load_case_registry
+from .interpolant_cache import get_interpolant
+from .registration import register_signals
+from .signals import FLUENT_VELOCITY_FILES, normalize_time, read_fluent_series
+
+# Columns of the agreement table, in output order
+AGREEMENT_COLUMNS = ['rmse', 'nrmse', 'peak_velocity_error', 'peak_timing_error', 'correlation']
+
+
+def load_velocity_pairs(cases=None, valves=('mv', 'av'), num_points=200):
+    """
+    Load every Doppler trace and matching Fluent velocity onto a common grid.
+
+    Both time axes are min-max normalized to [0, 1]. The Fluent velocity is
+    converted to cm/s and resampled linearly, the Doppler trace is evaluated
+    with a PCHIP interpolant and clipped at zero, as in doppler_fluent.py.
+
+    Parameters:
+    - cases: Case records to load (default: every case in the registry).
+    - valves: Valves to compare ('mv' and/or 'av').
+    - num_points: Number of points of the common normalized time grid.
+
+    Returns:
+    - labels: List of dictionaries with the case, patient, condition and valve of each row.
+    - time: Common normalized time grid, shape (num_points,).
+    - fluent: Fluent velocities (cm/s), shape (pairs, num_points).
+    - doppler: Doppler velocities (cm/s), shape (pairs, num_points).
+    """
+    if cases is None:
+        cases = load_case_registry().values()
+    time = np.linspace(0, 1, num_points)
+    labels, fluent_rows, doppler_rows = [], [], []
+    for case in cases:
+        for valve in valves:
+            doppler_path = case[f'doppler_{valve}_path']
+            if doppler_path is None or case['fluent_dir'] is None:
+                continue
+            fluent_path = os.path.join(case['fluent_dir'], FLUENT_VELOCITY_FILES[valve])
+            if not os.path.isfile(fluent_path):
+                continue
+            flow_time, velocity = read_fluent_series(fluent_path)
+            fluent_rows.append(np.interp(time, normalize_time(flow_time), velocity * 100))  # m/s to cm/s
+            doppler_interpolant = get_interpolant(doppler_path, kind='pchip', normalize=True)
+            doppler_rows.append(np.maximum(doppler_interpolant(time), 0))
+            labels.append({'case': case['case'], 'patient': case['patient'], 'condition': case['condition'], 'valve': valve})
+    fluent = np.array(fluent_rows).reshape(len(labels), num_points)
+    doppler = np.array(doppler_rows).reshape(len(labels), num_points)
+    return labels, time, fluent, doppler
+
+
+def agreement_metrics(time, fluent, doppler):
+    """
+    Compute the agreement between Fluent and Doppler velocities for every row at once.
+
+    Parameters:
+    - time: Common normalized time grid, shape (points,).
+    - fluent: Fluent velocities, shape (pairs, points).
+    - doppler: Doppler velocities, shape (pairs, points).
+
+    Returns:
+    - Dictionary of arrays of shape (pairs,):
+      'rmse' (cm/s), 'nrmse' (RMSE over the Doppler velocity range),
+      'peak_velocity_error' (Fluent peak minus Doppler peak, cm/s),
+      'peak_timing_error' (Fluent peak time minus Doppler peak time, normalized),
+      'correlation' (Pearson correlation coefficient).
+    """
+    fluent = np.atleast_2d(fluent)
+    doppler = np.atleast_2d(doppler)
+    difference = fluent - doppler
+    rmse = np.sqrt(np.mean(difference ** 2, axis=1))
+    doppler_range = np.ptp(doppler, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        nrmse = np.where(doppler_range > 0, rmse / doppler_range, np.nan)
+        fluent_centered = fluent - fluent.mean(axis=1, keepdims=True)
+        doppler_centered = doppler - doppler.mean(axis=1, keepdims=True)
+        correlation = np.sum(fluent_centered * doppler_centered, axis=1) / np.sqrt(
+            np.sum(fluent_centered ** 2, axis=1) * np.sum(doppler_centered ** 2, axis=1))
+    return {
+        'rmse': rmse,
+        'nrmse': nrmse,
+        'peak_velocity_error': fluent.max(axis=1) - doppler.max(axis=1),
+        'peak_timing_error': time[np.argmax(fluent, axis=1)] - time[np.argmax(doppler, axis=1)],
+        'correlation': correlation,
+    }
+
+
+def doppler_cfd_agreement(cases=None, valves=('mv', 'av'), num_points=200, register=False, stretches=None):
+    """
+    Compare the Fluent inlet/outlet velocities against the Doppler measurements of every case.
+
+    Parameters:
+    - cases, valves, num_points: See load_velocity_pairs.
+    - register: If True, align each Doppler trace to its Fluent curve with
+      register_signals before computing the metrics.
+    - stretches: Candidate time stretch factors used when registering.
+
+    Returns:
+    - DataFrame with one row per case and valve and the columns of
+      AGREEMENT_COLUMNS, plus 'lag' and 'stretch' when registering.
+    """
+    labels, time, fluent, doppler = load_velocity_pairs(cases, valves, num_points)
+    table = pd.DataFrame(labels, columns=['case', 'patient', 'condition', 'valve'])
+    if register and len(labels):
+        registration = register_signals(time, fluent, doppler, stretches=stretches)
+        doppler = registration['aligned']
+        table['lag'] = registration['lag']
+        table['stretch'] = registration['stretch']
+    for column, values in agreement_metrics(time, fluent, doppler).items():
+        table[column] = values
+    return table
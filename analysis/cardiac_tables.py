@@ -0,0 +1,246 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from .cases import REPOSITORY_ROOT, load_case_registry
+from .dataflow import DEFAULT_CACHE_DIR, run_graph, stage
+
+# The ventricle helpers are imported from Ventricle_Database/functions
+VENTRICLE_DATABASE = os.path.join(REPOSITORY_ROOT, 'Ventricle_Database')
+if VENTRICLE_DATABASE not in sys.path:
+    sys.path.insert(0, VENTRICLE_DATABASE)
+from functions.header_processing import parse_timestamps_from_header, parse_rr_duration_from_header  # noqa: E402
+from functions.volume_analysis import parse_volumes_from_text  # noqa: E402
+from functions.volume_derivative import calculate_dv_dt, min_max_dv_dt  # noqa: E402
+from functions.doppler_areas import find_doppler_csvs, read_doppler_data, calculate_valve_areas, short_valve_diameters  # noqa: E402
+from functions.reynolds import calculate_reynolds_number  # noqa: E402
+
+VOLUME_TYPES = ('raw', 'reconstructed')
+
+# Per-condition columns of the Cardiac_Parameters tables, in output order
+CARDIAC_PARAMETER_COLUMNS = ['EDV [ml]', 'ESV [ml]', 'SV [ml]', 'EF [%]', 'HR [bpm]', 'CO [L/min]', 'SI', 'CI', 'E/A_ratio']
+
+# Columns copied from the hand-maintained tables (not derivable from the imaging data)
+ANTHROPOMETRIC_COLUMNS = ['Weights [kg]', 'Height [cm]', 'BSA [m^2]']
+
+
+def read_header(header_path):
+    """Read the MRI timestamps and the RR, end-systole and end-diastole durations (ms) of a header.txt."""
+    avg_rr_duration, endsystole_time, enddiastole_time = parse_rr_duration_from_header(header_path)
+    return {
+        'timestamps': parse_timestamps_from_header(header_path),
+        'rr_duration': avg_rr_duration,
+        'endsystole_time': endsystole_time,
+        'enddiastole_time': enddiastole_time,
+    }
+
+
+def read_volume_list(volume_path):
+    """Read the volume list (ml) of a volume file, or None if the file is missing."""
+    if volume_path is None:
+        return None
+    with open(volume_path, 'r') as file:
+        return parse_volumes_from_text(file.read())
+
+
+def volume_metrics(volumes):
+    """EDV, ESV (with their frame positions), stroke volume and ejection fraction of a volume curve."""
+    if volumes is None:
+        return None
+    edv = max(volumes)
+    esv = min(volumes)
+    return {
+        'edv': edv,
+        'edv_position': volumes.index(edv),
+        'esv': esv,
+        'esv_position': volumes.index(esv),
+        'stroke_volume': edv - esv,
+        'ejection_fraction': (edv - esv) / edv * 100,
+    }
+
+
+def volume_derivative_extrema(volumes, header):
+    """Minimum and maximum dV/dt (ml/ms) of the raw volume curve, as in main.py."""
+    dv_dt = calculate_dv_dt(volumes, header['timestamps'])
+    min_dv_dt, max_dv_dt = min_max_dv_dt(dv_dt)
+    return {'min_dv_dt': float(min_dv_dt), 'max_dv_dt': float(max_dv_dt)}
+
+
+def valve_geometry(dv_dt, aortic_csv, mitral_csv, short_valve_diameter=None):
+    """
+    Aortic and mitral valve areas from the dV/dt extrema and the Doppler peak velocities, as in main.py.
+
+    Returns None when the case has no Doppler traces. Without a short mitral
+    diameter the mitral axes, hydraulic diameter and circumference are NaN.
+    """
+    if aortic_csv is None or mitral_csv is None:
+        return None
+    max_velocity_aortic, max_velocity_mitral = read_doppler_data(aortic_csv, mitral_csv)
+    short_valve_diameter = np.nan if short_valve_diameter is None else short_valve_diameter
+    valve_areas = calculate_valve_areas(dv_dt['min_dv_dt'], dv_dt['max_dv_dt'], max_velocity_aortic, max_velocity_mitral, short_valve_diameter)
+    return {
+        'Max Velocity Aortic (cm/s)': float(max_velocity_aortic),
+        'Max Velocity Mitral (cm/s)': float(max_velocity_mitral),
+        'Aortic Valve Area (mm^2)': valve_areas[0],
+        'Mitral Valve Area (mm^2)': valve_areas[2],
+        'Mitral Valve Long Axis (mm)': valve_areas[4],
+        'Mitral Valve Upper Short Axis (mm)': valve_areas[5],
+        'Mitral Valve Lower Short Axis (mm)': valve_areas[6],
+        'Mitral Valve Hydraulic Diameter (mm)': valve_areas[7],
+        'Mitral Valve Circumference (mm)': valve_areas[8],
+    }
+
+
+def mitral_reynolds(valves):
+    """Reynolds number and flow type at the mitral valve."""
+    if valves is None:
+        return None
+    if np.isnan(valves['Mitral Valve Hydraulic Diameter (mm)']):
+        return {'Reynolds Number Mitral': np.nan, 'Flow Type Mitral': None}
+    re_mitral, flow_type_mitral = calculate_reynolds_number(valves['Mitral Valve Hydraulic Diameter (mm)'], valves['Max Velocity Mitral (cm/s)'])
+    return {'Reynolds Number Mitral': re_mitral, 'Flow Type Mitral': flow_type_mitral}
+
+
+def case_cardiac_parameters(metrics, header, patient, condition, group, anthropometrics=None):
+    """
+    Cardiac parameters of one case, with HR derived from the RR duration of header.txt.
+
+    Parameters:
+    - metrics: Output of volume_metrics (None if the volume file is missing).
+    - header: Output of read_header.
+    - patient, condition, group: Labels of the case.
+    - anthropometrics: Dictionary with the weight, height, BSA and E/A ratio
+      of the case (taken from the hand-maintained tables).
+    """
+    anthropometrics = anthropometrics or {}
+    bsa = anthropometrics.get('BSA [m^2]')
+    row = {'Patient': patient, 'Condition': condition, 'Group': group}
+    row.update({column: anthropometrics.get(column) for column in ANTHROPOMETRIC_COLUMNS})
+    heart_rate = 60000 / header['rr_duration']
+    if metrics is None:
+        row.update({column: np.nan for column in CARDIAC_PARAMETER_COLUMNS})
+    else:
+        cardiac_output = metrics['stroke_volume'] * heart_rate / 1000
+        row.update({
+            'EDV [ml]': metrics['edv'],
+            'ESV [ml]': metrics['esv'],
+            'SV [ml]': metrics['stroke_volume'],
+            'EF [%]': metrics['ejection_fraction'],
+            'HR [bpm]': heart_rate,
+            'CO [L/min]': cardiac_output,
+            'SI': metrics['stroke_volume'] / bsa if bsa else np.nan,
+            'CI': cardiac_output / bsa if bsa else np.nan,
+        })
+    row['E/A_ratio'] = anthropometrics.get('E/A_ratio')
+    return row
+
+
+def cohort_table(*rows):
+    """
+    Assemble per-case rows into the wide Cardiac_Parameters layout.
+
+    Each patient gets one row with the anthropometric columns followed by
+    '<name>_pre <unit>' / '<name>_post <unit>' pairs, as in raw_data.csv.
+    """
+    columns = ['Patient', 'Condition'] + ANTHROPOMETRIC_COLUMNS
+    for column in CARDIAC_PARAMETER_COLUMNS:
+        name, _, unit = column.partition(' ')
+        columns += [f'{name}_{condition} {unit}'.strip() for condition in ('pre', 'post')]
+    # raw_data.csv lists EDV and ESV as pre/pre/post/post
+    columns[5:9] = ['EDV_pre [ml]', 'ESV_pre [ml]', 'EDV_post [ml]', 'ESV_post [ml]']
+
+    patients = {}
+    for row in rows:
+        patient_row = patients.setdefault(row['Patient'], {'Patient': row['Patient'], 'Condition': row['Group']})
+        for column in ANTHROPOMETRIC_COLUMNS:
+            if patient_row.get(column) is None:
+                patient_row[column] = row[column]
+        for column in CARDIAC_PARAMETER_COLUMNS:
+            name, _, unit = column.partition(' ')
+            patient_row[f"{name}_{row['Condition']} {unit}".strip()] = row[column]
+    table = pd.DataFrame(list(patients.values()), columns=columns)
+    order = table['Condition'].ne('healthy').astype(int).to_numpy()
+    return table.iloc[np.lexsort((table['Patient'].to_numpy(), order))].reset_index(drop=True)
+
+
+def valve_table(*rows):
+    """Assemble the per-case valve areas and Reynolds numbers into one table."""
+    return pd.DataFrame([row for row in rows if row is not None])
+
+
+def _valve_row(valves, reynolds, dv_dt, case_name):
+    if valves is None:
+        return None
+    return dict({'Case': case_name, 'Min dV/dt (ml/ms)': dv_dt['min_dv_dt'], 'Max dV/dt (ml/ms)': dv_dt['max_dv_dt']}, **valves, **reynolds)
+
+
+def build_cardiac_graph(cases=None, short_diameters=None):
+    """
+    Declare the dataflow graph from the raw inputs to the Cardiac_Parameters tables.
+
+    Per case: header -> volumes -> EDV/ESV/SV/EF -> dV/dt -> valve areas ->
+    Reynolds, and one cardiac parameter row per volume type. The per-case
+    rows are gathered into the 'cohort_table:raw', 'cohort_table:reconstructed'
+    and 'valve_table' nodes.
+
+    Parameters:
+    - cases: Case records (default: every case with a header and a raw volume file).
+    - short_diameters: Short mitral diameter (mm) per patient (default: short_valve_diameters).
+    """
+    if cases is None:
+        cases = load_case_registry().values()
+    short_diameters = short_valve_diameters if short_diameters is None else short_diameters
+    cases = sorted((case for case in cases if case['header_path'] and case['raw_volume_path']), key=lambda case: case['case'])
+
+    graph = {}
+    for case in cases:
+        name = case['case']
+        reference = case['cardiac_parameters'].get('raw') or {}
+        group = reference.get('Condition') or ('healthy' if case['patient_type'] == 'healthy' else 'univentr')
+        anthropometrics = {column: reference.get(column) for column in ANTHROPOMETRIC_COLUMNS + ['E/A_ratio']}
+
+        graph[f'header:{name}'] = stage(read_header, sources=[case['header_path']])
+        for volume_type in VOLUME_TYPES:
+            graph[f'volumes_{volume_type}:{name}'] = stage(read_volume_list, sources=[case[f'{volume_type}_volume_path']])
+            graph[f'volume_metrics_{volume_type}:{name}'] = stage(volume_metrics, inputs=[f'volumes_{volume_type}:{name}'])
+            graph[f'cardiac_parameters_{volume_type}:{name}'] = stage(
+                case_cardiac_parameters, inputs=[f'volume_metrics_{volume_type}:{name}', f'header:{name}'],
+                params={
+                    'patient': case['patient'].capitalize(),
+                    'condition': case['condition'],
+                    'group': group,
+                    # E/A ratios are only reported for the raw volumes
+                    'anthropometrics': anthropometrics if volume_type == 'raw' else dict(anthropometrics, **{'E/A_ratio': None}),
+                })
+        graph[f'dv_dt:{name}'] = stage(volume_derivative_extrema, inputs=[f'volumes_raw:{name}', f'header:{name}'])
+        # The Doppler traces of the case directory, as read by main.py
+        doppler_csvs = find_doppler_csvs(case['case_path'], case['patient']) if case['case_path'] else (None, None)
+        graph[f'valve_areas:{name}'] = stage(
+            valve_geometry, inputs=[f'dv_dt:{name}'], sources=doppler_csvs,
+            params={'short_valve_diameter': short_diameters.get(case['patient'])})
+        graph[f'reynolds:{name}'] = stage(mitral_reynolds, inputs=[f'valve_areas:{name}'])
+        graph[f'valve_row:{name}'] = stage(
+            _valve_row, inputs=[f'valve_areas:{name}', f'reynolds:{name}', f'dv_dt:{name}'], params={'case_name': name})
+
+    for volume_type in VOLUME_TYPES:
+        graph[f'cohort_table:{volume_type}'] = stage(
+            cohort_table, inputs=[f'cardiac_parameters_{volume_type}:{case["case"]}' for case in cases])
+    graph['valve_table'] = stage(valve_table, inputs=[f'valve_row:{case["case"]}' for case in cases])
+    return graph
+
+
+def build_cardiac_tables(cases=None, cache_dir=DEFAULT_CACHE_DIR, max_workers=None):
+    """
+    Regenerate the cohort cardiac parameter tables, recomputing only stale nodes.
+
+    Returns:
+    - tables: Dictionary with the 'raw' and 'reconstructed' cohort tables and the 'valves' table.
+    - report: Names of the 'computed' and 'loaded' nodes (see run_graph).
+    """
+    targets = [f'cohort_table:{volume_type}' for volume_type in VOLUME_TYPES] + ['valve_table']
+    values, report = run_graph(build_cardiac_graph(cases), targets, cache_dir=cache_dir, max_workers=max_workers)
+    tables = {volume_type: values[f'cohort_table:{volume_type}'] for volume_type in VOLUME_TYPES}
+    tables['valves'] = values['valve_table']
+    return tables, report
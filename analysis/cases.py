@@ -0,0 +1,190 @@
+import csv
+import os
+import re
+from functools import lru_cache
+
+from .phases import build_phase_index
+
+# Repository root, so every path is resolved relative to the checkout rather than a fixed machine
+REPOSITORY_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+CONDITIONS = ('pre', 'post')
+
+# Case directories and files are named <patient>_<condition>, e.g. hypox01_pre
+CASE_NAME_PATTERN = re.compile(r'^(?P<patient>[A-Za-z]+\d+)_(?P<condition>pre|post)$')
+
+
+def split_case_name(case_name):
+    """Split a case name such as 'hypox01_pre' into ('hypox01', 'pre')."""
+    match = CASE_NAME_PATTERN.match(case_name)
+    if match is None:
+        raise ValueError(f"Invalid case name '{case_name}', expected <patient>_<pre|post>")
+    return match.group('patient').lower(), match.group('condition')
+
+
+def _existing(path):
+    return path if os.path.exists(path) else None
+
+
+def _list_case_dirs(directory):
+    if not os.path.isdir(directory):
+        return []
+    return [name for name in os.listdir(directory) if CASE_NAME_PATTERN.match(name) and os.path.isdir(os.path.join(directory, name))]
+
+
+def read_time_information(time_info_path):
+    """Load time_information.csv once into a dictionary indexed by case name."""
+    time_information = {}
+    with open(time_info_path, newline='') as file:
+        for row in csv.DictReader(file):
+            time_information[row['case'].strip()] = {
+                'rr_duration': float(row['RR_DURATION']),
+                'end_diastole_time': float(row['END_DIASTOLE_TIME']),
+                'end_systole_time': float(row['END_SYSTOLE_TIME']),
+                'timesteps': int(row['TIMESTEPS']),
+            }
+    return time_information
+
+
+def read_cardiac_parameters(csv_path):
+    """
+    Load a Cardiac_Parameters table into {(patient, condition): parameters}.
+
+    Column names such as 'EDV_pre [ml]' are split by condition, so each case
+    gets its own 'EDV [ml]' entry; condition-free columns (weight, BSA, ...)
+    are shared by both conditions of a patient.
+    """
+    parameters = {}
+    with open(csv_path, newline='') as file:
+        for row in csv.DictReader(file):
+            patient = row['Patient'].strip().lower()
+            for condition in CONDITIONS:
+                entry = {}
+                for column, value in row.items():
+                    name = column
+                    for other in CONDITIONS:
+                        if f'_{other}' in column:
+                            name = None if other != condition else column.replace(f'_{other}', '')
+                    if name is None:
+                        continue
+                    entry[name] = _parse_value(value)
+                parameters[(patient, condition)] = entry
+    return parameters
+
+
+def _parse_value(value):
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return value.strip()
+
+
+def _patient_types(data_directory):
+    # Ventricle_Database/data/<patient_type>/<condition>/<patient>
+    locations = {}
+    for patient_type in sorted(os.listdir(data_directory)) if os.path.isdir(data_directory) else []:
+        for condition in CONDITIONS:
+            condition_directory = os.path.join(data_directory, patient_type, condition)
+            if not os.path.isdir(condition_directory):
+                continue
+            for patient in os.listdir(condition_directory):
+                locations[(patient.lower(), condition)] = (patient_type, os.path.join(condition_directory, patient))
+    return locations
+
+
+def discover_cases(root=REPOSITORY_ROOT):
+    """
+    Discover every case from the repository layout.
+
+    Cases are collected from time_information.csv, the Doppler and
+    Fluent_Results case directories, Ventricle_Database/data and the volume
+    files. Each case record holds the paths of its inputs (None when the file
+    does not exist) and its timing parameters.
+
+    Parameters:
+    - root: Repository root to scan.
+
+    Returns:
+    - Dictionary mapping case names (e.g. 'hypox01_pre') to case records.
+    """
+    fluent_directory = os.path.join(root, 'Fluent_Results')
+    doppler_directory = os.path.join(root, 'Doppler')
+    ventricle_directory = os.path.join(root, 'Ventricle_Database')
+    volume_directory = os.path.join(ventricle_directory, 'data', 'volumes')
+    parameters_directory = os.path.join(root, 'Cardiac_Parameters')
+
+    time_info_path = os.path.join(fluent_directory, 'time_information.csv')
+    time_information = read_time_information(time_info_path) if os.path.isfile(time_info_path) else {}
+    locations = _patient_types(os.path.join(ventricle_directory, 'data'))
+    cardiac_parameters = {}
+    for volume_type in ('raw', 'reconstructed'):
+        table_path = os.path.join(parameters_directory, f'{volume_type}_data.csv')
+        if os.path.isfile(table_path):
+            cardiac_parameters[volume_type] = read_cardiac_parameters(table_path)
+
+    case_names = set(time_information)
+    case_names.update(_list_case_dirs(fluent_directory))
+    case_names.update(_list_case_dirs(doppler_directory))
+    case_names.update(f'{patient}_{condition}' for patient, condition in locations)
+    for volume_type in ('raw', 'reconstructed'):
+        directory = os.path.join(volume_directory, volume_type)
+        if os.path.isdir(directory):
+            case_names.update(name[:-4] for name in os.listdir(directory) if name.endswith('.txt') and CASE_NAME_PATTERN.match(name[:-4]))
+
+    cases = {}
+    for case_name in sorted(case_names):
+        patient, condition = split_case_name(case_name)
+        patient_type, case_path = locations.get((patient, condition), (None, None))
+        case = {
+            'case': case_name,
+            'patient': patient,
+            'condition': condition,
+            'patient_type': patient_type,
+            'case_path': case_path,
+            'header_path': _existing(os.path.join(case_path, 'header.txt')) if case_path else None,
+            'raw_volume_path': _existing(os.path.join(volume_directory, 'raw', f'{case_name}.txt')),
+            'reconstructed_volume_path': _existing(os.path.join(volume_directory, 'reconstructed', f'{case_name}.txt')),
+            'interpolated_volume_path': _existing(os.path.join(volume_directory, 'reconstructed', f'{case_name}_interpolated.csv')),
+            'doppler_mv_path': _existing(os.path.join(doppler_directory, case_name, f'{case_name}_mv.csv')),
+            'doppler_av_path': _existing(os.path.join(doppler_directory, case_name, f'{case_name}_av.csv')),
+            'fluent_dir': _existing(os.path.join(fluent_directory, case_name)),
+            'cardiac_parameters': {volume_type: table.get((patient, condition)) for volume_type, table in cardiac_parameters.items()},
+        }
+        case.update(time_information.get(case_name, {
+            'rr_duration': None,
+            'end_diastole_time': None,
+            'end_systole_time': None,
+            'timesteps': None,
+        }))
+        cases[case_name] = case
+    return cases
+
+
+@lru_cache(maxsize=None)
+def _cached_cases(root):
+    return discover_cases(root)
+
+
+def load_case_registry(root=REPOSITORY_ROOT):
+    """Return the case registry of a repository, scanning the layout only once per process."""
+    return _cached_cases(os.path.abspath(root))
+
+
+def get_case(case_name, root=REPOSITORY_ROOT):
+    """Look up one case record, raising ValueError for unknown cases."""
+    cases = load_case_registry(root)
+    if case_name not in cases:
+        raise ValueError(f"Case '{case_name}' not found in the repository")
+    return cases[case_name]
+
+
+def get_phase_index(case_name, root=REPOSITORY_ROOT):
+    """Build the phase index of a case from its registered timing parameters."""
+    case = get_case(case_name, root)
+    if case['rr_duration'] is None:
+        raise ValueError(f"Timing information for case '{case_name}' not found.")
+    if 'phase_index' not in case:
+        case['phase_index'] = build_phase_index(case['rr_duration'], case['end_diastole_time'], case['end_systole_time'], case['timesteps'])
+    return case['phase_index']
@@ -0,0 +1,229 @@
+from functools import partial
+
+import numpy as np
+
+from .cardiac_tables import VOLUME_TYPES, read_volume_list
+from .cases import load_case_registry
+from .moments import Moments
+from .prefetch import DEFAULT_PREFETCH, load_case_inputs, prefetch_cases
+from .time_warping import pad_curves, warp_curves
+
+
+def iter_cohort(cases=None, loader=load_case_inputs, prefetch=DEFAULT_PREFETCH):
+    """
+    Yield the cases of a cohort one at a time with their inputs loaded.
+
+    Only the yielded record and the `prefetch` records being read ahead are
+    in memory, so a pass over the cohort runs in constant memory whatever
+    its size.
+
+    Parameters:
+    - cases: Iterable of case records, consumed lazily (default: every case in the registry).
+    - loader: Function reading the inputs of one case (see load_case_inputs).
+    - prefetch: Number of cases read ahead (see prefetch_cases).
+
+    Returns:
+    - Generator of records: the case record (paths, timing) merged with the loaded inputs.
+    """
+    if cases is None:
+        cases = load_case_registry().values()
+    for case, inputs in prefetch_cases(cases, loader, prefetch=prefetch):
+        yield {**case, **inputs}
+
+
+def _get(path, record):
+    value = record
+    for key in path:
+        try:
+            value = value[key]
+        except (KeyError, IndexError, TypeError):
+            # Missing key or index, or None (a missing file) along the path
+            return None
+    return value
+
+
+def field(*path):
+    """
+    Picklable extractor of a (nested) record entry, e.g. field('fluent', 'ventricle-energy-loss.out', 1).
+
+    Missing entries along the path give None, which the reducers skip.
+    """
+    return partial(_get, path)
+
+
+class MomentsReducer:
+    """
+    Mergeable moments of a value extracted from every record.
+
+    Parameters:
+    - extract: Function of a record returning an observation or a chunk of
+      observations (see Moments.update), or None to skip the record.
+    - shape, quantile_edges: See Moments.
+    """
+
+    def __init__(self, extract, shape=(), quantile_edges=None):
+        self.extract = extract
+        self.moments = Moments(shape, quantile_edges=quantile_edges)
+
+    def update(self, record):
+        value = self.extract(record)
+        if value is not None:
+            self.moments.update(value)
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        return self
+
+    def result(self):
+        return self.moments
+
+
+class HistogramReducer:
+    """
+    Fixed-bin histogram of the values extracted from every record.
+
+    NaN values are dropped; values outside the edges are counted as
+    underflow and overflow.
+    """
+
+    def __init__(self, extract, edges):
+        self.extract = extract
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+
+    def update(self, record):
+        value = self.extract(record)
+        if value is None:
+            return
+        values = np.asarray(value, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        self.underflow += int(np.count_nonzero(values < self.edges[0]))
+        self.overflow += int(np.count_nonzero(values > self.edges[-1]))
+        self.counts += np.histogram(values, self.edges)[0]
+
+    def merge(self, other):
+        if not np.array_equal(other.edges, self.edges):
+            raise ValueError("Cannot merge histograms with different bin edges")
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        return self
+
+    def result(self):
+        return {'edges': self.edges, 'counts': self.counts, 'underflow': self.underflow, 'overflow': self.overflow}
+
+
+class CurveReducer:
+    """
+    Pointwise moments of curves of different lengths on a common normalized grid.
+
+    Every extracted curve is stretched onto num_points points, or aligned on
+    its landmarks (see warp_curves), and absorbed into Moments of shape
+    (num_points,). A single pass cannot use the mean landmark positions of
+    the cohort as the reference, so landmark alignment needs a fixed reference.
+
+    Parameters:
+    - extract: Function of a record returning a curve (e.g. the volumes) or None to skip it.
+    - num_points: Number of points of the common grid.
+    - landmarks: Optional function of (record, curve) returning the landmark positions in [0, 1].
+    - reference: Target landmark positions, required with landmarks.
+    """
+
+    def __init__(self, extract, num_points=100, landmarks=None, reference=None):
+        if landmarks is not None and reference is None:
+            raise ValueError("Streaming landmark alignment needs fixed reference landmark positions")
+        self.extract = extract
+        self.landmarks = landmarks
+        self.reference = None if reference is None else np.asarray(reference, dtype=float)
+        self.time = np.linspace(0, 1, num_points)
+        self.moments = Moments((num_points,))
+
+    def update(self, record):
+        curve = self.extract(record)
+        if curve is None:
+            return
+        stack, lengths = pad_curves([curve])
+        curve_landmarks = np.empty((1, 0)) if self.landmarks is None else np.atleast_2d(self.landmarks(record, curve))
+        _, warped, _ = warp_curves(stack, lengths, curve_landmarks, reference=self.reference, num_points=len(self.time))
+        self.moments.update(warped)
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        return self
+
+    def result(self):
+        return self.moments
+
+
+class GroupedReducer:
+    """
+    One reducer per group of records.
+
+    Parameters:
+    - key: Function of a record returning its group (e.g. field('condition')).
+    - factory: Zero-argument function creating the reducer of a new group.
+    """
+
+    def __init__(self, key, factory):
+        self.key = key
+        self.factory = factory
+        self.reducers = {}
+
+    def update(self, record):
+        group = self.key(record)
+        if group not in self.reducers:
+            self.reducers[group] = self.factory()
+        self.reducers[group].update(record)
+
+    def merge(self, other):
+        for group, reducer in other.reducers.items():
+            if group in self.reducers:
+                self.reducers[group].merge(reducer)
+            else:
+                self.reducers[group] = reducer
+        return self
+
+    def result(self):
+        return {group: reducer.result() for group, reducer in self.reducers.items()}
+
+
+def reduce_cohort(records, reducers):
+    """
+    Feed every record to every reducer in a single pass.
+
+    Parameters:
+    - records: Iterable of records, e.g. iter_cohort().
+    - reducers: Dictionary of named reducers (objects with update and result).
+
+    Returns:
+    - Dictionary with the result of every reducer.
+    """
+    for record in records:
+        for reducer in reducers.values():
+            reducer.update(record)
+    return {name: reducer.result() for name, reducer in reducers.items()}
+
+
+def load_case_volumes(case):
+    """Loader of iter_cohort reading only the '<type>_volumes' lists (ml) of a case."""
+    return {f'{volume_type}_volumes': read_volume_list(case[f'{volume_type}_volume_path']) for volume_type in VOLUME_TYPES}
+
+
+def _group_key(record):
+    return record['patient_type'], record['condition']
+
+
+def group_volume_statistics(cases=None, volume_types=VOLUME_TYPES, num_points=100, prefetch=DEFAULT_PREFETCH):
+    """
+    Pointwise volume curve moments per patient type and condition, in one streaming pass.
+
+    Returns:
+    - time: Common normalized time grid, shape (num_points,).
+    - statistics: Dictionary mapping each volume type to {(patient_type, condition): Moments}.
+    """
+    reducers = {volume_type: GroupedReducer(_group_key, partial(CurveReducer, field(f'{volume_type}_volumes'), num_points))
+                for volume_type in volume_types}
+    statistics = reduce_cohort(iter_cohort(cases, load_case_volumes, prefetch), reducers)
+    return np.linspace(0, 1, num_points), statistics
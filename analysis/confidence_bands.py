@@ -0,0 +1,64 @@
+import numpy as np
+
+from .memory_budget import budget_chunk_size
+from .paired_statistics import _chunks
+
+
+def bootstrap_mean_bands(curves, n_resamples=10000, confidence=0.95, chunk_size=2000, rng=None):
+    """
+    Pointwise and simultaneous bootstrap confidence bands of a group mean curve.
+
+    Resamples are drawn as (resamples x patients) index matrices. Each chunk
+    gathers a (chunk x patients x points) tensor and reduces it to the
+    resampled mean curves, so memory is bounded by chunk_size.
+
+    The pointwise band holds the percentile interval at every point. The
+    simultaneous band is mean +/- c * se, where se is the bootstrap standard
+    error of every point and c is the confidence quantile of the largest
+    standardized deviation max_t |mean*(t) - mean(t)| / se(t) over the curve,
+    so the whole curve is covered at the requested level.
+
+    Parameters:
+    - curves: Normalized curves of the group, shape (patients, points).
+    - n_resamples: Number of bootstrap resamples.
+    - confidence: Confidence level of the bands.
+    - chunk_size: Number of resamples gathered per array operation (lowered to
+      fit the remaining memory budget when one is set).
+    - rng: NumPy Generator or seed.
+
+    Returns:
+    - Dictionary with the 'mean' curve, the 'pointwise_low'/'pointwise_high'
+      and 'simultaneous_low'/'simultaneous_high' bands, the bootstrap
+      'standard_error' and the simultaneous 'critical_value'.
+    """
+    rng = np.random.default_rng(rng)
+    curves = np.atleast_2d(np.asarray(curves, dtype=float))
+    num_patients, num_points = curves.shape
+    if num_patients == 0:
+        raise ValueError("At least one curve is needed for bootstrap bands")
+    mean = curves.mean(axis=0)
+
+    resampled_means = np.empty((n_resamples, num_points))
+    chunk_size = budget_chunk_size(chunk_size, 8 * num_patients * (num_points + 1))
+    position = 0
+    for size in _chunks(n_resamples, chunk_size):
+        indices = rng.integers(0, num_patients, size=(size, num_patients))
+        resampled_means[position:position + size] = curves[indices].mean(axis=1)
+        position += size
+
+    alpha = (1 - confidence) / 2
+    pointwise_low, pointwise_high = np.quantile(resampled_means, [alpha, 1 - alpha], axis=0)
+    standard_error = resampled_means.std(axis=0, ddof=1) if n_resamples > 1 else np.zeros(num_points)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        deviations = np.where(standard_error > 0, np.abs(resampled_means - mean) / standard_error, 0.0)
+    critical_value = np.quantile(deviations.max(axis=1), confidence)
+
+    return {
+        'mean': mean,
+        'pointwise_low': pointwise_low,
+        'pointwise_high': pointwise_high,
+        'simultaneous_low': mean - critical_value * standard_error,
+        'simultaneous_high': mean + critical_value * standard_error,
+        'standard_error': standard_error,
+        'critical_value': critical_value,
+    }
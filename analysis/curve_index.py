@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+from scipy.stats import chi2
+
+from .cardiac_tables import read_volume_list
+from .cases import load_case_registry
+from .time_warping import pad_curves, warp_curves
+
+
+def load_cohort_curves(volume_types=('raw', 'reconstructed'), num_points=100, cases=None):
+    """
+    Read every volume curve of the cohort and stretch it onto a common normalized grid.
+
+    Returns:
+    - labels: Array of '<case>:<volume_type>' strings.
+    - curves: Normalized curves (ml), shape (curves, num_points).
+    """
+    if cases is None:
+        cases = load_case_registry().values()
+    labels, volume_lists = [], []
+    for case in sorted(cases, key=lambda case: case['case']):
+        for volume_type in volume_types:
+            volumes = read_volume_list(case[f'{volume_type}_volume_path'])
+            if volumes is not None:
+                labels.append(f"{case['case']}:{volume_type}")
+                volume_lists.append(volumes)
+    if not volume_lists:
+        return np.array(labels), np.empty((0, num_points))
+    stack, lengths = pad_curves(volume_lists)
+    _, curves, _ = warp_curves(stack, lengths, np.empty((len(lengths), 0)), num_points=num_points)
+    return np.array(labels), curves
+
+
+def functional_pca(curves, num_components=None, explained=0.95):
+    """
+    Functional PCA of curves sampled on a common grid.
+
+    Parameters:
+    - curves: Array of shape (curves, points).
+    - num_components: Number of components to keep (default: the smallest
+      number explaining the requested fraction of the variance).
+    - explained: Fraction of the variance to explain when num_components is None.
+
+    Returns:
+    - Dictionary with the 'mean' curve, the 'components' (components, points),
+      their 'explained_variance' and the 'scores' (curves, components).
+    """
+    curves = np.asarray(curves, dtype=float)
+    if len(curves) < 2:
+        raise ValueError("Functional PCA needs at least two curves")
+    mean = curves.mean(axis=0)
+    _, singular_values, components = np.linalg.svd(curves - mean, full_matrices=False)
+    variance = singular_values ** 2 / (len(curves) - 1)
+    if num_components is None:
+        ratio = np.cumsum(variance) / variance.sum() if variance.sum() > 0 else np.ones_like(variance)
+        num_components = int(np.searchsorted(ratio, explained) + 1)
+    num_components = max(1, min(num_components, len(variance)))
+    components = components[:num_components]
+    return {
+        'mean': mean,
+        'components': components,
+        'explained_variance': variance[:num_components],
+        'scores': (curves - mean) @ components.T,
+    }
+
+
+class CurveIndex:
+    """
+    Nearest-neighbour index of curves in functional PCA score space.
+
+    The index keeps only the PCA basis, the (curves x components) score
+    matrix, the reconstruction errors and the labels, and answers k nearest
+    neighbour queries with a KD-tree on the scores.
+    """
+
+    def __init__(self, labels, mean, components, explained_variance, scores, reconstruction_error):
+        self.labels = np.asarray(labels)
+        self.mean = np.asarray(mean, dtype=float)
+        self.components = np.asarray(components, dtype=float)
+        self.explained_variance = np.asarray(explained_variance, dtype=float)
+        self.scores = np.asarray(scores, dtype=float)
+        self.reconstruction_error = np.asarray(reconstruction_error, dtype=float)
+        self.tree = cKDTree(self.scores)
+
+    @classmethod
+    def from_curves(cls, labels, curves, num_components=None, explained=0.95):
+        """Build the index of curves sampled on a common grid (see functional_pca)."""
+        curves = np.asarray(curves, dtype=float)
+        fpca = functional_pca(curves, num_components, explained)
+        residuals = curves - fpca['mean'] - fpca['scores'] @ fpca['components']
+        return cls(labels, fpca['mean'], fpca['components'], fpca['explained_variance'], fpca['scores'],
+                   np.sqrt(np.mean(residuals ** 2, axis=1)))
+
+    def __len__(self):
+        return len(self.labels)
+
+    def project(self, curves):
+        """Scores of curves (shape (points,) or (curves, points)) on the index basis."""
+        return (np.atleast_2d(np.asarray(curves, dtype=float)) - self.mean) @ self.components.T
+
+    def query(self, curves, k=5):
+        """
+        Return the k most similar indexed cases of every query curve.
+
+        Returns:
+        - labels: Array of shape (queries, k), nearest first.
+        - distances: Euclidean distances in score space, shape (queries, k).
+        """
+        k = min(k, len(self))
+        distances, indices = self.tree.query(self.project(curves), k=k)
+        distances = np.asarray(distances).reshape(-1, k)
+        indices = np.asarray(indices).reshape(-1, k)
+        return self.labels[indices], distances
+
+    def query_label(self, label, k=5):
+        """Return the k most similar cases of an indexed case, excluding the case itself."""
+        matches = np.flatnonzero(self.labels == label)
+        if not len(matches):
+            raise ValueError(f"Curve '{label}' is not in the index")
+        k = min(k + 1, len(self))
+        distances, indices = self.tree.query(self.scores[matches[0]], k=k)
+        keep = np.atleast_1d(indices) != matches[0]
+        return self.labels[np.atleast_1d(indices)[keep]], np.atleast_1d(distances)[keep]
+
+    def outliers(self, confidence=0.99):
+        """
+        Flag curves that are unusual within the cohort.
+
+        A curve is flagged when its Mahalanobis distance in score space
+        exceeds the chi-squared quantile, or its reconstruction error exceeds
+        the same quantile of the scaled chi-squared fit of the cohort errors.
+
+        Returns:
+        - DataFrame with the label, Mahalanobis distance, reconstruction error and outlier flag of every curve.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            standardized = np.where(self.explained_variance > 0, self.scores / np.sqrt(self.explained_variance), 0.0)
+        mahalanobis = np.sqrt(np.sum(standardized ** 2, axis=1))
+        limit = np.sqrt(chi2.ppf(confidence, self.components.shape[0]))
+
+        # Box's approximation of the squared prediction error distribution
+        spe = self.reconstruction_error ** 2
+        spe_mean, spe_variance = spe.mean(), spe.var()
+        if spe_variance > 0:
+            spe_limit = spe_variance / (2 * spe_mean) * chi2.ppf(confidence, 2 * spe_mean ** 2 / spe_variance)
+        else:
+            spe_limit = np.inf
+        return pd.DataFrame({
+            'label': self.labels,
+            'mahalanobis': mahalanobis,
+            'reconstruction_error': self.reconstruction_error,
+            'outlier': (mahalanobis > limit) | (spe > spe_limit),
+        })
+
+    def save(self, path):
+        """Store the index arrays in a compressed .npz file."""
+        np.savez_compressed(path, labels=self.labels.astype(str), mean=self.mean, components=self.components,
+                            explained_variance=self.explained_variance, scores=self.scores,
+                            reconstruction_error=self.reconstruction_error)
+
+    @classmethod
+    def load(cls, path):
+        """Load an index stored with save."""
+        with np.load(path) as data:
+            return cls(data['labels'], data['mean'], data['components'], data['explained_variance'],
+                       data['scores'], data['reconstruction_error'])
+
+
+def build_cohort_index(volume_types=('raw', 'reconstructed'), num_points=100, num_components=None, explained=0.95):
+    """Build the CurveIndex of every raw and reconstructed volume curve of the cohort."""
+    labels, curves = load_cohort_curves(volume_types, num_points)
+    return CurveIndex.from_curves(labels, curves, num_components, explained)
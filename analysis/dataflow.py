@@ -0,0 +1,210 @@
+import hashlib
+import os
+import pickle
+
+from .cases import REPOSITORY_ROOT
+from .interpolant_cache import file_content_hash
+from .memory_budget import budgeted_map
+from .tracing import span
+
+# Default on-disk memo of stage outputs
+DEFAULT_CACHE_DIR = os.path.join(REPOSITORY_ROOT, '.cache', 'dataflow')
+
+
+def stage(function, inputs=(), sources=(), params=None, version=1):
+    """
+    Declare one node of a dataflow graph.
+
+    The node calls function(*upstream_values, *sources, **params), where the
+    upstream values are the outputs of the nodes named in inputs, in order.
+
+    Parameters:
+    - function: Pure function computing the node output.
+    - inputs: Names of the upstream nodes.
+    - sources: Paths of the input files read by the function (None allowed).
+    - params: Dictionary of extra keyword arguments (must have a stable repr;
+      sets and tuples are ordered for it).
+    - version: Bump to invalidate cached outputs after changing code the
+      key does not cover. Edits of the function and of the repository
+      functions it calls by global name change its key (see
+      function_fingerprint); helpers reached through module attributes or
+      objects, and third-party libraries, do not.
+    """
+    return {
+        'function': function,
+        'inputs': tuple(inputs),
+        'sources': tuple(sources),
+        'params': dict(params or {}),
+        'version': version,
+    }
+
+
+def _topological_order(graph):
+    order, state = [], {}
+
+    def visit(name):
+        if state.get(name) == 'done':
+            return
+        if state.get(name) == 'visiting':
+            raise ValueError(f"Dataflow graph has a cycle through '{name}'")
+        if name not in graph:
+            raise ValueError(f"Dataflow node '{name}' is not defined")
+        state[name] = 'visiting'
+        for upstream in graph[name]['inputs']:
+            visit(upstream)
+        state[name] = 'done'
+        order.append(name)
+
+    for name in graph:
+        visit(name)
+    return order
+
+
+def _constant_repr(constant):
+    # repr with a stable order for sets, whose iteration order changes between processes
+    if hasattr(constant, 'co_code'):
+        return _code_fingerprint(constant)
+    if isinstance(constant, (set, frozenset)):
+        return f'{type(constant).__name__}({sorted(_constant_repr(item) for item in constant)})'
+    if isinstance(constant, tuple):
+        return f'({", ".join(_constant_repr(item) for item in constant)},)'
+    return repr(constant)
+
+
+def _code_fingerprint(code):
+    # Bytecode, constants (nested functions and comprehensions recursively) and referenced names
+    constants = [_constant_repr(constant) for constant in code.co_consts]
+    return hashlib.sha1(repr((code.co_code, constants, code.co_names)).encode()).hexdigest()
+
+
+def _referenced_names(code):
+    # Global names of a code object and of the functions and comprehensions nested in it
+    names = set(code.co_names)
+    for constant in code.co_consts:
+        if hasattr(constant, 'co_code'):
+            names |= _referenced_names(constant)
+    return names
+
+
+def _is_repository_function(value):
+    code = getattr(value, '__code__', None)
+    return code is not None and os.path.abspath(code.co_filename).startswith(REPOSITORY_ROOT + os.sep)
+
+
+def function_fingerprint(function, _seen=None):
+    """
+    Hash of the code of a function, changing whenever its body is edited.
+
+    Functions of the repository that it calls through a global name (e.g.
+    calculate_valve_areas imported into the module) are hashed with it,
+    recursively. Helpers reached otherwise (module attributes, methods,
+    arguments) are not, see the version of stage().
+    """
+    code = getattr(function, '__code__', None)
+    if code is None:
+        # Builtins and other callables without bytecode are identified by name only
+        return None
+    _seen = set() if _seen is None else _seen
+    _seen.add(code)
+    module_globals = getattr(function, '__globals__', {})
+    helpers = []
+    for name in sorted(_referenced_names(code)):
+        helper = module_globals.get(name)
+        if _is_repository_function(helper) and helper.__code__ not in _seen:
+            helpers.append((name, function_fingerprint(helper, _seen)))
+    return hashlib.sha1(repr((_code_fingerprint(code), helpers)).encode()).hexdigest()
+
+
+def node_keys(graph):
+    """
+    Compute the cache key of every node.
+
+    A key hashes the function (its name and code), version and parameters
+    of the node, the content of its source files and the keys of its
+    upstream nodes, so a changed input file or stage function only changes
+    the keys of the nodes depending on it.
+    """
+    keys = {}
+    for name in _topological_order(graph):
+        node = graph[name]
+        function = node['function']
+        source_hashes = [file_content_hash(path) if path and os.path.exists(path) else None for path in node['sources']]
+        description = repr((
+            f'{function.__module__}.{function.__qualname__}',
+            function_fingerprint(function),
+            node['version'],
+            [(key, _constant_repr(value)) for key, value in sorted(node['params'].items())],
+            source_hashes,
+            [keys[upstream] for upstream in node['inputs']],
+        ))
+        keys[name] = hashlib.sha1(description.encode()).hexdigest()
+    return keys
+
+
+def run_graph(graph, targets=None, cache_dir=DEFAULT_CACHE_DIR, max_workers=None):
+    """
+    Evaluate the target nodes of a dataflow graph with on-disk memoization.
+
+    Only nodes whose key is missing from the cache are computed, and only
+    cached nodes needed by those computations are loaded. Nodes whose inputs
+    are ready run concurrently on a thread pool.
+
+    Parameters:
+    - graph: Dictionary mapping node names to stage() declarations.
+    - targets: Names of the nodes to return (default: every node without consumers).
+    - cache_dir: Directory holding the memoized outputs (None disables the cache).
+    - max_workers: Size of the thread pool (lowered under memory pressure when a
+      memory budget is set, see memory_budget.budgeted_map).
+
+    Returns:
+    - values: Dictionary mapping the target names to their outputs.
+    - report: Dictionary with the names of the 'computed' and 'loaded' nodes.
+    """
+    order = _topological_order(graph)
+    if targets is None:
+        consumed = {upstream for node in graph.values() for upstream in node['inputs']}
+        targets = [name for name in order if name not in consumed]
+    keys = node_keys(graph)
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def cache_path(name):
+        return os.path.join(cache_dir, f'{keys[name]}.pkl')
+
+    cached = {name: cache_dir is not None and os.path.isfile(cache_path(name)) for name in order}
+
+    # Walk back from the targets: a node is needed if a target or a node being recomputed uses it
+    needed = set(targets)
+    for name in reversed(order):
+        if name in needed and not cached[name]:
+            needed.update(graph[name]['inputs'])
+
+    values = {}
+    report = {'computed': [], 'loaded': []}
+
+    def evaluate(name):
+        if cached[name]:
+            with open(cache_path(name), 'rb') as file:
+                return name, pickle.load(file), 'loaded'
+        node = graph[name]
+        upstream_values = [values[upstream] for upstream in node['inputs']]
+        stage_name, _, case_name = name.partition(':')
+        with span(f'dataflow.{stage_name}', case_name or None):
+            value = node['function'](*upstream_values, *node['sources'], **node['params'])
+        if cache_dir is not None:
+            temporary_path = f'{cache_path(name)}.{os.getpid()}.tmp'
+            with open(temporary_path, 'wb') as file:
+                pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, cache_path(name))
+        return name, value, 'computed'
+
+    pending = [name for name in order if name in needed]
+    while pending:
+        # Every node whose needed inputs are available forms the next wave
+        ready = [name for name in pending if cached[name] or all(upstream in values for upstream in graph[name]['inputs'])]
+        for name, value, status in budgeted_map(evaluate, ready, max_workers):
+            values[name] = value
+            report[status].append(name)
+        pending = [name for name in pending if name not in values]
+
+    return {name: values[name] for name in targets}, report
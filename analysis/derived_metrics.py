@@ -0,0 +1,115 @@
+import numpy as np
+from scipy.integrate import cumulative_trapezoid
+
+from .phases import PHASES
+
+# Blood density (kg/m³), same default as calculate_reynolds_number
+BLOOD_DENSITY = 1055
+
+# Registry of derived metrics in declaration order: name -> {'inputs', 'unit', 'function'}
+DERIVED_METRICS = {}
+
+
+def derived_metric(name, inputs, unit):
+    """
+    Register a derived metric computed from loaded case arrays.
+
+    Parameters:
+    - name: Key the result is stored under.
+    - inputs: Names of the case arrays or earlier derived metrics the
+      function takes, in argument order.
+    - unit: Unit of the result, used for labelling tables and plots.
+    """
+    def register(function):
+        DERIVED_METRICS[name] = {'inputs': tuple(inputs), 'unit': unit, 'function': function}
+        return function
+    return register
+
+
+@derived_metric('power_mW', inputs=('energy_loss', 'timestep_size'), unit='mW')
+def power_mw(energy_loss, timestep_size):
+    # Fluent reports the energy dissipated per timestep in J
+    return energy_loss / timestep_size * 1000
+
+
+@derived_metric('power_W_per_m3', inputs=('power_mW', 'stroke_volume_ml'), unit='W/m³')
+def power_w_per_m3(power_mw_values, stroke_volume_ml):
+    # mW/mL is numerically W/L, times 1000 gives W/m³
+    return power_mw_values / stroke_volume_ml * 1000
+
+
+@derived_metric('energy_dissipation_mJ', inputs=('power_mW', 'flow_time'), unit='mJ')
+def energy_dissipation_mj(power_mw_values, flow_time):
+    # Cumulative energy dissipated since the start of the cycle
+    return cumulative_trapezoid(power_mw_values, flow_time, initial=0)
+
+
+@derived_metric('kinetic_energy_mJ', inputs=('kinetic_energy', 'volume_ml'), unit='mJ')
+def kinetic_energy_mj(dynamic_pressure, volume_ml):
+    # Kinetic energy is dynamic pressure (Pa) times ventricle volume (m³)
+    return dynamic_pressure * (volume_ml / 1e6) * 1000
+
+
+@derived_metric('kinetic_energy_J_per_m3', inputs=('kinetic_energy_mJ', 'stroke_volume_ml'), unit='J/m³')
+def kinetic_energy_j_per_m3(kinetic_energy_mj_values, stroke_volume_ml):
+    return kinetic_energy_mj_values / stroke_volume_ml * 1000
+
+
+@derived_metric('kinetic_energy_mJ_per_ml', inputs=('kinetic_energy_mJ', 'volume_ml'), unit='mJ/ml')
+def kinetic_energy_mj_per_ml(kinetic_energy_mj_values, volume_ml):
+    return kinetic_energy_mj_values / volume_ml
+
+
+@derived_metric('specific_kinetic_energy', inputs=('kinetic_energy',), unit='J/kg')
+def specific_kinetic_energy(dynamic_pressure):
+    return dynamic_pressure / BLOOD_DENSITY
+
+
+def evaluate_derived_metrics(case_arrays, metrics=None):
+    """
+    Evaluate the registered derived metrics in a single pass over loaded arrays.
+
+    Metrics are evaluated in declaration order, so a metric can use the
+    result of one declared before it. Metrics whose inputs are not available
+    for the case are skipped. No files are read.
+
+    Parameters:
+    - case_arrays: Dictionary of loaded arrays and scalars of one case, e.g.
+      'flow_time', 'energy_loss', 'kinetic_energy', 'volume_ml',
+      'timestep_size' and 'stroke_volume_ml'.
+    - metrics: Optional names of the metrics to return (default: all).
+
+    Returns:
+    - Dictionary mapping metric names to arrays on the case time grid.
+    """
+    values = dict(case_arrays)
+    derived = {}
+    for name, spec in DERIVED_METRICS.items():
+        if all(input_name in values for input_name in spec['inputs']):
+            values[name] = spec['function'](*(values[input_name] for input_name in spec['inputs']))
+            derived[name] = values[name]
+    if metrics is not None:
+        derived = {name: derived[name] for name in metrics if name in derived}
+    return derived
+
+
+def phase_integrated_dissipation(energy_dissipation, phase_index):
+    """
+    Energy dissipated during each phase from the cumulative dissipation curve.
+
+    Parameters:
+    - energy_dissipation: Result of the 'energy_dissipation_mJ' metric.
+    - phase_index: Result of build_phase_index for the case.
+
+    Returns:
+    - Dictionary mapping each phase name to the dissipated energy (mJ).
+    """
+    energy_dissipation = np.asarray(energy_dissipation)
+    # Phases share their boundary point so no interval between them is lost
+    diastole_end = max(phase_index['diastole'].stop - 1, 0)
+    systole_end = max(phase_index['systole'].stop - 1, diastole_end)
+    integrated = {
+        'diastole': energy_dissipation[diastole_end] - energy_dissipation[0],
+        'systole': energy_dissipation[systole_end] - energy_dissipation[diastole_end],
+    }
+    return {phase: float(integrated[phase]) for phase in PHASES}
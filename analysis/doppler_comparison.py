@@ -0,0 +1,104 @@
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from .cases import CONDITIONS, get_case
+from .downsampling import downsample
+from .interpolant_cache import get_interpolant
+from .signals import FLUENT_VELOCITY_FILES, normalize_time, read_fluent_series
+
+# Velocity range (cm/s) shared by the subplots of plot_velocity_comparison
+VELOCITY_LIMITS = (-2, 130)
+
+
+def enforce_non_negative(interp_data):
+    """Clip an interpolated Doppler trace at zero."""
+    return np.maximum(interp_data, 0)
+
+
+def load_fluent_velocity(file_path):
+    """
+    Load a Fluent velocity report on a normalized time axis.
+
+    Returns:
+    - Tuple (normalized_time, velocity) with the velocity in cm/s, or
+      (None, None) if the file does not exist.
+    """
+    if not file_path or not os.path.exists(file_path):
+        return None, None
+    flow_time, velocity = read_fluent_series(file_path)
+    return normalize_time(flow_time), velocity * 100  # m/s to cm/s
+
+
+def load_doppler_velocity(file_path):
+    """PCHIP interpolant of a Doppler trace on the normalized time axis, or None if the file does not exist."""
+    if file_path and os.path.exists(file_path):
+        # Interpolants are fitted once per file content on the normalized time axis and reused
+        return get_interpolant(file_path, kind='pchip', normalize=True)
+    return None
+
+
+def case_velocity_curves(patient, conditions=CONDITIONS, valves=('mv', 'av')):
+    """
+    Fluent and Doppler velocities of both conditions of a patient, as doppler_fluent.py plots them.
+
+    Parameters:
+    - patient: Patient name, e.g. 'hypox03'.
+
+    Returns:
+    - Dictionary mapping (condition, valve) to (normalized_time, fluent, doppler),
+      the velocities in cm/s. The Doppler interpolant is evaluated on the
+      Fluent time axis and clipped at zero. Missing inputs are None.
+    """
+    curves = {}
+    for condition in conditions:
+        case = get_case(f'{patient}_{condition}')
+        for valve in valves:
+            fluent_path = os.path.join(case['fluent_dir'] or '', FLUENT_VELOCITY_FILES[valve])
+            time, fluent = load_fluent_velocity(fluent_path)
+            doppler_interpolant = load_doppler_velocity(case[f'doppler_{valve}_path'])
+            doppler = None
+            if doppler_interpolant is not None and time is not None:
+                doppler = enforce_non_negative(doppler_interpolant(time))
+            curves[(condition, valve)] = (time, fluent, doppler)
+    return curves
+
+
+def plot_velocity_comparison(patient, curves, y_limits=VELOCITY_LIMITS):
+    """
+    Plot the Fluent against the Doppler velocities: valves in rows, conditions in columns.
+
+    Parameters:
+    - patient: Patient name used in the column titles.
+    - curves: Output of case_velocity_curves.
+    - y_limits: Common velocity range (cm/s).
+
+    Returns:
+    - The figure.
+    """
+    conditions = sorted({condition for condition, _ in curves}, key=lambda condition: CONDITIONS.index(condition))
+    valves = sorted({valve for _, valve in curves}, key=['mv', 'av'].index)
+    fig, axs = plt.subplots(len(valves), len(conditions), figsize=(15, 10), squeeze=False)
+    legend_font = {'size': 14, 'weight': 'bold'}
+    for row, valve in enumerate(valves):
+        for col, condition in enumerate(conditions):
+            ax = axs[row, col]
+            time, fluent, doppler = curves[(condition, valve)]
+            if fluent is not None:
+                ax.plot(*downsample(time, fluent, ax), label=f'Fluent - {valve.upper()}', color='red')
+            if doppler is not None:
+                ax.plot(*downsample(time, doppler, ax), label=f'Doppler - {valve.upper()}', color='blue')
+            ax.legend(loc='upper left', prop=legend_font)
+            ax.set_ylim(*y_limits)
+            ax.grid(True)
+            ax.tick_params(axis='x', labelsize=14, width=2)
+            ax.tick_params(axis='y', labelsize=14, width=2)
+    for col, condition in enumerate(conditions):
+        axs[0, col].set_title(f'Healthy {patient}_{condition}', fontsize=18, fontweight='bold')
+
+    # Common axis labels for the entire figure
+    fig.text(0.025, 0.5, 'Velocity (cm/s)', va='center', rotation='vertical', fontsize=18, fontweight='bold')
+    fig.text(0.5, 0.025, 'Normalized Time', ha='center', fontsize=18, fontweight='bold')
+    fig.tight_layout(rect=[0.05, 0.05, 1, 0.95])
+    return fig
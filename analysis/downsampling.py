@@ -0,0 +1,130 @@
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+# Points drawn per pixel of axes width; two keep the min/max envelope of every pixel column
+POINTS_PER_PIXEL = 2
+
+# Setting this environment variable plots every sample (e.g. to check a downsampled figure)
+FULL_RESOLUTION_ENVIRONMENT_VARIABLE = 'ANALYSIS_PLOT_FULL_RESOLUTION'
+
+_enabled = not os.environ.get(FULL_RESOLUTION_ENVIRONMENT_VARIABLE)
+
+
+def set_plot_downsampling(enabled):
+    """Enable or disable the downsampling of plotted series in this process."""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def max_plot_points(ax=None):
+    """
+    Number of points worth drawing on an axes: POINTS_PER_PIXEL per pixel of its width.
+
+    Without axes the default figure width (rcParams) is used.
+    """
+    if ax is not None:
+        width = ax.get_window_extent().width
+    else:
+        width = plt.rcParams['figure.figsize'][0] * plt.rcParams['figure.dpi']
+    return max(int(width * POINTS_PER_PIXEL), 3)
+
+
+def lttb_indices(x, y, num_points):
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets.
+
+    The first and last points are kept. The points in between are split
+    into num_points - 2 buckets, and each bucket keeps the point forming
+    the largest triangle with the point kept before it and the average of
+    the next bucket. The line shape and its peaks are preserved.
+
+    Parameters:
+    - x, y: Series sorted by x.
+    - num_points: Number of points to keep (the series is returned whole if it is not longer).
+
+    Returns:
+    - Sorted integer indices into the series.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if num_points >= n or num_points < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, num_points - 1).astype(int)
+
+    # Bucket averages from cumulative sums; the bucket after the last one is the last point
+    cumulative_x = np.concatenate([[0.0], np.cumsum(x)])
+    cumulative_y = np.concatenate([[0.0], np.cumsum(y)])
+    counts = np.diff(edges)
+    average_x = np.append((cumulative_x[edges[1:]] - cumulative_x[edges[:-1]]) / counts, x[-1])
+    average_y = np.append((cumulative_y[edges[1:]] - cumulative_y[edges[:-1]]) / counts, y[-1])
+
+    indices = np.empty(num_points, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(num_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # Twice the triangle area; the constant factor does not change the argmax
+        area = np.abs((x[previous] - average_x[bucket + 1]) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (average_y[bucket + 1] - y[previous]))
+        previous = start + int(np.argmax(area))
+        indices[bucket + 1] = previous
+    return indices
+
+
+def minmax_indices(y, num_bins):
+    """
+    Indices of the minimum and maximum of every bin, plus the first and last point.
+
+    Keeps the exact envelope of the series (every peak and trough), which
+    is what a filled region or a noisy trace needs at pixel resolution.
+
+    Returns:
+    - Sorted unique integer indices, at most 2 * num_bins + 2.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if num_bins < 1 or 2 * num_bins + 2 >= n:
+        return np.arange(n)
+    width = -(-n // num_bins)
+    rows = -(-n // width)
+    # Pad the last bin so the argmin/argmax of every bin is one vectorized call
+    padded_low = np.full(rows * width, np.inf)
+    padded_high = np.full(rows * width, -np.inf)
+    padded_low[:n] = y
+    padded_high[:n] = y
+    offsets = np.arange(rows) * width
+    minima = offsets + np.argmin(padded_low.reshape(rows, width), axis=1)
+    maxima = offsets + np.argmax(padded_high.reshape(rows, width), axis=1)
+    return np.unique(np.concatenate([[0, n - 1], minima, maxima]))
+
+
+def downsample(x, y, ax=None, method='lttb', max_points=None):
+    """
+    Reduce a series to the points an axes can show.
+
+    Parameters:
+    - x, y: Series sorted by x.
+    - ax: Axes the series is drawn on, sizing the point budget (see max_plot_points).
+    - method: 'lttb' for lines and markers, 'minmax' for envelopes and filled regions.
+    - max_points: Point budget overriding the axes width.
+
+    Returns:
+    - Tuple (x, y) of arrays. Series within the budget, series with
+      non-finite values and all series while downsampling is disabled are
+      returned unchanged.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    limit = max_points or max_plot_points(ax)
+    if not _enabled or len(y) <= limit or not np.all(np.isfinite(y)):
+        return x, y
+    if method == 'lttb':
+        indices = lttb_indices(x, y, limit)
+    elif method == 'minmax':
+        indices = minmax_indices(y, (limit - 2) // 2)
+    else:
+        raise ValueError(f"Unknown downsampling method '{method}', expected 'lttb' or 'minmax'")
+    return x[indices], y[indices]
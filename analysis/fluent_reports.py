@@ -0,0 +1,192 @@
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from scipy.interpolate import interp1d
+
+from .cases import get_case
+from .downsampling import downsample
+from .phases import phase_bounds
+from .tracing import span
+
+# Fluent reports split into phases and interpolated by separator.py
+SEPARATED_REPORTS = [
+    'ventricle-average-kinetic-energy.out',
+    'ventricle-average-turbulent-kinetic-energy.out',
+    'ventricle-average-velocity-inlet.out',
+    'ventricle-average-velocity-outlet.out',
+    'ventricle-average-wss.out',
+    'ventricle-energy-loss.out',
+]
+
+
+def case_timing(case_name):
+    """RR duration, end-diastole time, end-systole time (s) and timesteps of a case from time_information.csv."""
+    case = get_case(case_name)
+    if case['rr_duration'] is None:
+        raise ValueError(f"Timing information for case '{case_name}' not found.")
+    return case['rr_duration'], case['end_diastole_time'], case['end_systole_time'], case['timesteps']
+
+
+def read_fluent_report(file_path):
+    """
+    Read a Fluent .out report, skipping its header lines.
+
+    Returns:
+    - Tuple (time_steps, values, flow_time) of arrays (unparsable flow times are NaN).
+    """
+    df = pd.read_csv(file_path, sep=r'\s+', skiprows=2, header=None)
+    if df.shape[1] < 3:
+        raise ValueError(f"File {os.path.basename(file_path)} does not have enough columns.")
+    return df.iloc[:, 0].to_numpy(), df.iloc[:, 1].to_numpy(), pd.to_numeric(df.iloc[:, 2], errors='coerce').to_numpy()
+
+
+def third_cycle(values, flow_time, rr_duration, cycles=3):
+    """
+    Values of the last of the simulated cycles on the time axis of the first cycle.
+
+    The report holds `cycles` cardiac cycles; the flow times of the first
+    cycle, closed with the RR duration, are the time axis.
+
+    Returns:
+    - Tuple (cycle_time, cycle_values) of arrays.
+    """
+    num_timesteps_per_cycle = len(values) // cycles
+    start = (cycles - 1) * num_timesteps_per_cycle
+    cycle_values = np.asarray(values)[start:start + num_timesteps_per_cycle + 1]
+    cycle_time = np.append(np.asarray(flow_time, dtype=float)[:num_timesteps_per_cycle], rr_duration)
+    return cycle_time, cycle_values
+
+
+def split_phases(cycle_time, cycle_values, end_diastole_time, end_systole_time):
+    """
+    Split one cycle into its diastolic and systolic parts.
+
+    Returns:
+    - Dictionary with the 'diastolic_time', 'diastolic_values',
+      'systolic_time' and 'systolic_values' arrays. The first diastolic time
+      is set to 0 so the interpolation covers the start of the cycle.
+    """
+    cycle_time = np.asarray(cycle_time, dtype=float)
+    cycle_values = np.asarray(cycle_values)
+    phases = phase_bounds(cycle_time, end_diastole_time, end_systole_time)
+    diastolic_time = cycle_time[phases['diastole']].copy()
+    # Ensure the 0.0 time point is included in the diastolic flow time
+    diastolic_time[0] = 0.0
+    return {
+        'diastolic_time': diastolic_time,
+        'diastolic_values': cycle_values[phases['diastole']],
+        'systolic_time': cycle_time[phases['systole']],
+        'systolic_values': cycle_values[phases['systole']],
+    }
+
+
+def phase_table(phase_arrays):
+    """DataFrame of split_phases arrays with the columns of the *_raw.csv files (NaN-padded)."""
+    return pd.DataFrame({
+        'Diastolic Flow Time': pd.Series(phase_arrays['diastolic_time']),
+        'Diastolic Data': pd.Series(phase_arrays['diastolic_values']),
+        'Systolic Flow Time': pd.Series(phase_arrays['systolic_time']),
+        'Systolic Data': pd.Series(phase_arrays['systolic_values']),
+    })
+
+
+def interpolate_cycle(phase_arrays, rr_duration, timesteps, kind='quadratic'):
+    """
+    Interpolate the diastolic and systolic samples onto the timestep grid of one cycle.
+
+    Returns:
+    - combined_time, combined_values: The samples of both phases, in order.
+    - time: Grid of timesteps + 1 points over [0, RR].
+    - interpolated: Interpolated values on the grid.
+    """
+    combined_time = np.concatenate([phase_arrays['diastolic_time'], phase_arrays['systolic_time']])
+    combined_values = np.concatenate([phase_arrays['diastolic_values'], phase_arrays['systolic_values']])
+    length = min(len(combined_time), len(combined_values))
+    combined_time = combined_time[:length]
+    combined_values = pd.to_numeric(pd.Series(combined_values[:length]), errors='coerce').to_numpy(dtype=float)
+    interpolation_function = interp1d(combined_time, combined_values, kind=kind, fill_value="extrapolate")
+    time = np.linspace(0, rr_duration, timesteps + 1)
+    return combined_time, combined_values, time, interpolation_function(time)
+
+
+def separate_report(file_path, rr_duration, end_diastole_time, end_systole_time, timesteps, case_name=None):
+    """
+    Phase-split and interpolate the last cycle of one Fluent report, as separator.py.
+
+    Returns:
+    - Dictionary with the 'raw' phase table (see phase_table), the
+      'combined_time'/'combined_values' samples and the interpolated
+      'time'/'interpolated' arrays.
+    """
+    report = os.path.basename(file_path)
+    with span('separator.read_report', case_name, report=report):
+        _, values, flow_time = read_fluent_report(file_path)
+    with span('separator.split_phases', case_name, report=report):
+        cycle_time, cycle_values = third_cycle(values, flow_time, rr_duration)
+        phase_arrays = split_phases(cycle_time, cycle_values, end_diastole_time, end_systole_time)
+    with span('separator.interpolate', case_name, report=report):
+        combined_time, combined_values, time, interpolated = interpolate_cycle(phase_arrays, rr_duration, timesteps)
+    return {'raw': phase_table(phase_arrays), 'combined_time': combined_time, 'combined_values': combined_values,
+            'time': time, 'interpolated': interpolated}
+
+
+def write_separated_report(result, directory, file_name, case_name=None):
+    """
+    Write the *_raw.csv and *_interpolated.csv files of a separated report.
+
+    Returns:
+    - Tuple (raw_path, interpolated_path).
+    """
+    stem = os.path.splitext(file_name)[0]
+    raw_path = os.path.join(directory, f'{stem}_raw.csv')
+    interpolated_path = os.path.join(directory, f'{stem}_interpolated.csv')
+    with span('separator.write_raw', case_name, report=file_name):
+        result['raw'].to_csv(raw_path, index=False)
+    with span('separator.write_interpolated', case_name, report=file_name):
+        pd.DataFrame({'Flow Time': result['time'], 'Interpolated Data': result['interpolated']}).to_csv(interpolated_path, index=False)
+    return raw_path, interpolated_path
+
+
+def separate_case(case_name, files=SEPARATED_REPORTS, write=True):
+    """
+    Separate every selected report of a case.
+
+    Parameters:
+    - case_name: Case name, e.g. 'hypox03_post'.
+    - files: Names of the .out reports; missing files are skipped.
+    - write: Write the *_raw.csv and *_interpolated.csv files next to the reports.
+
+    Returns:
+    - Dictionary mapping every processed report name to its separate_report result.
+    """
+    directory_path = get_case(case_name)['fluent_dir']
+    if directory_path is None:
+        raise ValueError(f"Fluent results for case '{case_name}' not found.")
+    rr_duration, end_diastole_time, end_systole_time, timesteps = case_timing(case_name)
+    results = {}
+    for file_name in files:
+        file_path = os.path.join(directory_path, file_name)
+        if not os.path.exists(file_path):
+            continue
+        results[file_name] = separate_report(file_path, rr_duration, end_diastole_time, end_systole_time, timesteps, case_name)
+        if write:
+            write_separated_report(results[file_name], directory_path, file_name, case_name)
+    return results
+
+
+def plot_separated_report(result):
+    """Plot the phase samples of a report against its interpolation; returns the figure."""
+    plt.style.use('bmh')
+    fig = plt.figure(figsize=(10, 6))
+    ax = plt.gca()
+    plt.plot(*downsample(result['combined_time'], result['combined_values'], ax), 'o', label='Raw Data', markersize=5)
+    plt.plot(*downsample(result['time'], result['interpolated'], ax), '-', label='Interpolated Data')
+    plt.xlabel('Flow Time')
+    plt.ylabel('Variable of Interest')
+    plt.title('Comparison of Raw Data and Interpolated Data')
+    plt.grid(True)
+    plt.legend()
+    plt.tight_layout()
+    return fig
@@ -0,0 +1,144 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from scipy.interpolate import PchipInterpolator, interp1d
+
+from .signals import normalize_time, read_doppler_trace
+
+# Maximum number of fitted interpolants (and parsed signals) kept per process
+DEFAULT_CACHE_SIZE = 256
+
+_cache = OrderedDict()
+_content_hashes = OrderedDict()
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+_max_size = DEFAULT_CACHE_SIZE
+_lock = threading.RLock()
+
+
+def file_content_hash(file_path):
+    """
+    Return the SHA-1 of a file's content.
+
+    Hashes are memoized per path on (modification time, size), so unchanged
+    files are only read once per process. The memo keeps one entry per path
+    and at most as many paths as the cache, least recently used first out.
+    """
+    status = os.stat(file_path)
+    path = os.path.abspath(file_path)
+    stamp = (status.st_mtime_ns, status.st_size)
+    with _lock:
+        entry = _content_hashes.get(path)
+        if entry is not None and entry[0] == stamp:
+            _content_hashes.move_to_end(path)
+            return entry[1]
+    with open(file_path, 'rb') as file:
+        digest = hashlib.sha1(file.read()).hexdigest()
+    with _lock:
+        # A changed file replaces the entry of its path
+        _content_hashes[path] = (stamp, digest)
+        _content_hashes.move_to_end(path)
+        while len(_content_hashes) > _max_size:
+            _content_hashes.popitem(last=False)
+    return digest
+
+
+def _reader_key(reader):
+    # Readers with the same name in different modules must not share entries
+    return f'{reader.__module__}.{reader.__qualname__}'
+
+
+def _lookup(key, build):
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            _stats['hits'] += 1
+            return _cache[key]
+        _stats['misses'] += 1
+    value = build()
+    with _lock:
+        _cache[key] = value
+        _cache.move_to_end(key)
+        while len(_cache) > _max_size:
+            _cache.popitem(last=False)
+            _stats['evictions'] += 1
+    return value
+
+
+def get_signal(file_path, normalize=False, reader=read_doppler_trace):
+    """
+    Return the (time, values) arrays of a signal file, parsed once per content.
+
+    Parameters:
+    - file_path: Path of the file (two-column Doppler CSV by default).
+    - normalize: If True, the time axis is min-max scaled to [0, 1].
+    - reader: Function parsing the file into (time, values) arrays.
+
+    Returns:
+    - Tuple of read-only NumPy arrays (time, values). They are shared between
+      callers, so copy them before modifying.
+    """
+    key = (file_content_hash(file_path), 'data', bool(normalize), _reader_key(reader))
+
+    def build():
+        time, values = reader(file_path)
+        if normalize:
+            time = normalize_time(time)
+        time.flags.writeable = False
+        values.flags.writeable = False
+        return time, values
+
+    return _lookup(key, build)
+
+
+def get_interpolant(file_path, kind='pchip', normalize=False, reader=read_doppler_trace):
+    """
+    Return a fitted interpolant of a signal file from the process-wide LRU cache.
+
+    Parameters:
+    - file_path: Path of the file (two-column Doppler CSV by default).
+    - kind: 'pchip' for PchipInterpolator, otherwise any interp1d kind
+      ('linear', 'quadratic', 'cubic', ...). Both extrapolate.
+    - normalize: If True, the time axis is min-max scaled to [0, 1] first.
+    - reader: Function parsing the file into (time, values) arrays.
+
+    Returns:
+    - Callable interpolant, shared between callers.
+    """
+    key = (file_content_hash(file_path), kind, bool(normalize), _reader_key(reader))
+
+    def build():
+        time, values = get_signal(file_path, normalize=normalize, reader=reader)
+        if kind == 'pchip':
+            return PchipInterpolator(time, values, extrapolate=True)
+        return interp1d(time, values, kind=kind, fill_value='extrapolate')
+
+    return _lookup(key, build)
+
+
+def cache_info():
+    """Return the hit/miss/eviction counters and the current and maximum cache size."""
+    with _lock:
+        return dict(_stats, size=len(_cache), max_size=_max_size)
+
+
+def set_cache_size(max_size):
+    """Change the maximum number of cached entries (and memoized file hashes), evicting the least recently used ones."""
+    global _max_size
+    with _lock:
+        _max_size = max(int(max_size), 0)
+        while len(_cache) > _max_size:
+            _cache.popitem(last=False)
+            _stats['evictions'] += 1
+        while len(_content_hashes) > _max_size:
+            _content_hashes.popitem(last=False)
+
+
+def clear_cache():
+    """Drop every cached entry and reset the counters."""
+    with _lock:
+        _cache.clear()
+        _content_hashes.clear()
+        for name in _stats:
+            _stats[name] = 0
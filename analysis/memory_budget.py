@@ -0,0 +1,140 @@
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Setting this environment variable (e.g. '4GB') sets the process memory budget at import
+BUDGET_ENVIRONMENT_VARIABLE = 'ANALYSIS_MEMORY_BUDGET'
+
+# Fraction of the budget above which the batch runners stop admitting new work
+ADMISSION_FRACTION = 0.9
+
+# Time (s) given to the running tasks to allocate before the RSS is checked for the next admission
+ADMISSION_INTERVAL = 0.01
+
+_budget = None
+
+
+def parse_memory_size(size):
+    """Convert a size like 512MB, '2.5 GB' or a number of bytes to bytes (binary units)."""
+    if isinstance(size, (int, float)):
+        return int(size)
+    match = re.fullmatch(r'\s*([\d.]+)\s*([KMGT]?)B?\s*', str(size).upper())
+    if match is None:
+        raise ValueError(f"Invalid memory size '{size}'")
+    return int(float(match.group(1)) * 1024 ** ' KMGT'.index(match.group(2) or ' '))
+
+
+def current_rss():
+    """
+    Resident set size of this process in bytes.
+
+    Read from /proc/self/statm where available; elsewhere the peak RSS of
+    getrusage is used, which over-estimates and so errs on the safe side.
+    Returns None when neither is available.
+    """
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+
+def set_memory_budget(limit):
+    """
+    Set the memory budget of this process (None disables it).
+
+    Parameters:
+    - limit: Bytes or a size string such as '4GB'.
+    """
+    global _budget
+    _budget = None if limit is None else parse_memory_size(limit)
+
+
+def get_memory_budget():
+    """Memory budget in bytes, or None if no budget is set."""
+    return _budget
+
+
+def available_memory():
+    """Bytes left in the budget (None without a budget or RSS reading)."""
+    rss = current_rss()
+    if _budget is None or rss is None:
+        return None
+    return max(_budget - rss, 0)
+
+
+def budget_chunk_size(chunk_size, bytes_per_item):
+    """
+    Largest chunk size not above chunk_size whose temporaries fit in the remaining budget.
+
+    Parameters:
+    - chunk_size: Chunk size requested by the caller.
+    - bytes_per_item: Estimated temporary memory per item of a chunk.
+
+    Returns:
+    - chunk_size without a budget, otherwise at least 1.
+    """
+    available = available_memory()
+    if available is None or bytes_per_item <= 0:
+        return chunk_size
+    return int(max(1, min(chunk_size, available * ADMISSION_FRACTION // bytes_per_item)))
+
+
+def budgeted_map(function, items, max_workers=None):
+    """
+    Map a function over items on a thread pool, lowering the concurrency under memory pressure.
+
+    Without a budget this is executor.map. With a budget the pool starts
+    slowly: the first task runs alone while the RSS is sampled every
+    ADMISSION_INTERVAL, which gives an estimate of the memory of one task.
+    Afterwards a task is only submitted if the current RSS (at least the
+    estimate for every running task) plus one estimate stays below
+    ADMISSION_FRACTION of the budget, otherwise the
+    runner waits for running tasks to finish, down to one task at a time.
+    The estimate keeps growing with the RSS increase per running task seen
+    while sampling.
+
+    Returns:
+    - List of the results in the order of items.
+    """
+    items = list(items)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        if _budget is None:
+            return list(executor.map(function, items))
+        # Same default pool size as ThreadPoolExecutor
+        workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        baseline = current_rss() or 0
+        results = [None] * len(items)
+        running = {}
+        completed = 0
+        task_memory = 0
+
+        for index, item in enumerate(items):
+            while running:
+                done, _ = wait(running, timeout=ADMISSION_INTERVAL, return_when=FIRST_COMPLETED)
+                rss = current_rss() or 0
+                task_memory = max(task_memory, (rss - baseline) / len(running))
+                for future in done:
+                    results[running.pop(future)] = future.result()
+                completed += len(done)
+                # Running tasks that have not allocated yet still count with the estimate
+                expected = max(rss, baseline + task_memory * len(running)) + task_memory
+                if completed and len(running) < workers and expected <= ADMISSION_FRACTION * _budget:
+                    break
+            running[executor.submit(function, item)] = index
+        for future, index in running.items():
+            results[index] = future.result()
+        return results
+
+if os.environ.get(BUDGET_ENVIRONMENT_VARIABLE):
+    set_memory_budget(os.environ[BUDGET_ENVIRONMENT_VARIABLE])
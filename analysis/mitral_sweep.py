@@ -0,0 +1,162 @@
+import numpy as np
+
+from .cardiac_tables import build_cardiac_graph, short_valve_diameters
+from .dataflow import DEFAULT_CACHE_DIR, run_graph
+from .derived_metrics import BLOOD_DENSITY
+from .memory_budget import budget_chunk_size
+from .tracing import span
+from .valve_dynamics import BLOOD_VISCOSITY, CRITICAL_REYNOLDS
+
+# Sweep dimensions after the case axis, in cube order
+SWEEP_DIMENSIONS = ('upper_factor', 'lower_factor', 'short_diameter', 'rho', 'kv', 'velocity_scale')
+
+
+def load_mitral_inputs(cases=None, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Peak filling dV/dt and peak mitral velocity of every case with Doppler traces (see find_doppler_csvs).
+
+    The values come from the memoized dV/dt and valve area stages of the
+    cardiac dataflow graph.
+
+    Returns:
+    - Dictionary with the 'labels' (case names), 'patients', 'max_dv_dt'
+      (ml/ms) and 'max_velocity_mitral' (cm/s).
+    """
+    graph = build_cardiac_graph(cases)
+    names = sorted(name.split(':', 1)[1] for name in graph if name.startswith('valve_areas:'))
+    targets = [f'dv_dt:{name}' for name in names] + [f'valve_areas:{name}' for name in names]
+    values, _ = run_graph(graph, targets, cache_dir=cache_dir)
+    labels = [name for name in names if values[f'valve_areas:{name}'] is not None]
+    return {
+        'labels': labels,
+        'patients': [name.rsplit('_', 1)[0] for name in labels],
+        'max_dv_dt': np.array([values[f'dv_dt:{name}']['max_dv_dt'] for name in labels]),
+        'max_velocity_mitral': np.array([values[f'valve_areas:{name}']['Max Velocity Mitral (cm/s)'] for name in labels]),
+    }
+
+
+def mitral_model(max_dv_dt, max_velocity_mitral, short_diameter, upper_factor=0.65, lower_factor=1.1,
+                 rho=BLOOD_DENSITY, kv=BLOOD_VISCOSITY, velocity_scale=1.0):
+    """
+    Broadcast version of the mitral part of calculate_valve_areas and calculate_reynolds_number.
+
+    The area of the two half-ellipses is linear in the long axis, so the
+    Newton iteration of calculate_valve_areas converges to the closed form
+    a = 2 * A / (pi * (b_upper + b_lower)) used here. All arguments broadcast.
+
+    Returns:
+    - Dictionary with the 'area' (mm²), 'long_axis' (mm), 'hydraulic_diameter' (mm) and 'reynolds' arrays.
+    """
+    velocity = max_velocity_mitral * velocity_scale
+    area = max_dv_dt / (velocity / 1000) * 100
+    upper_short_axis = short_diameter / 2 * upper_factor
+    lower_short_axis = short_diameter / 2 * lower_factor
+    long_axis = 2 * area / (np.pi * (upper_short_axis + lower_short_axis))
+
+    # Ramanujan's approximation of the ellipse perimeters, averaged over both leaflets
+    perimeter_upper = np.pi * (3 * (long_axis + upper_short_axis) - np.sqrt((3 * long_axis + upper_short_axis) * (long_axis + 3 * upper_short_axis)))
+    perimeter_lower = np.pi * (3 * (long_axis + lower_short_axis) - np.sqrt((3 * long_axis + lower_short_axis) * (long_axis + 3 * lower_short_axis)))
+    hydraulic_diameter = 4 * area / ((perimeter_upper + perimeter_lower) / 2)
+    reynolds = rho * (velocity / 100) * (hydraulic_diameter * 0.001) / kv
+    return {'area': area, 'long_axis': long_axis, 'hydraulic_diameter': hydraulic_diameter, 'reynolds': reynolds}
+
+
+def sweep_mitral_model(inputs=None, upper_factor=(0.65,), lower_factor=(1.1,), short_diameter=None, rho=(BLOOD_DENSITY,),
+                       kv=(BLOOD_VISCOSITY,), velocity_scale=(1.0,), store=('reynolds',), chunk_size=1_000_000):
+    """
+    Evaluate the mitral model on the Cartesian grid of the parameter ranges for every case.
+
+    The parameter grid is flattened and evaluated in chunks of chunk_size
+    configurations, each broadcast against the case axis, so the temporary
+    arrays stay bounded however large the grid is.
+
+    Parameters:
+    - inputs: Output of load_mitral_inputs (default: loaded from the repository).
+    - upper_factor, lower_factor: Values of the short axis factors (0.65 and 1.1 in main.py).
+    - short_diameter: Short mitral diameters (mm), or None to use each patient's
+      value from short_valve_diameters (the dimension then has length 1;
+      cases of patients without a value give NaN outputs).
+    - rho, kv: Values of the blood density (kg/m³) and viscosity (Pa·s).
+    - velocity_scale: Factors applied to the peak mitral velocity.
+    - store: Outputs of mitral_model to keep as full cubes (may be empty).
+    - chunk_size: Number of parameter configurations evaluated at once (lowered
+      to fit the remaining memory budget when one is set).
+
+    Returns:
+    - Dictionary with the cube 'dims' ('case' followed by SWEEP_DIMENSIONS),
+      their 'coords', one (cases, *grid) array per stored output, and the
+      per-case 'turbulent_fraction' of configurations with Re >= 2300.
+    """
+    inputs = load_mitral_inputs() if inputs is None else inputs
+    labels = list(inputs['labels'])
+    num_cases = len(labels)
+    if short_diameter is None:
+        case_diameters = np.array([short_valve_diameters.get(patient, np.nan) for patient in inputs['patients']], dtype=float)[:, None]
+        diameter_coords = np.array([1.0])
+    else:
+        diameter_coords = np.atleast_1d(np.asarray(short_diameter, dtype=float))
+    coords = {
+        'case': np.array(labels),
+        'upper_factor': np.atleast_1d(np.asarray(upper_factor, dtype=float)),
+        'lower_factor': np.atleast_1d(np.asarray(lower_factor, dtype=float)),
+        'short_diameter': diameter_coords,
+        'rho': np.atleast_1d(np.asarray(rho, dtype=float)),
+        'kv': np.atleast_1d(np.asarray(kv, dtype=float)),
+        'velocity_scale': np.atleast_1d(np.asarray(velocity_scale, dtype=float)),
+    }
+    grid_shape = tuple(len(coords[dimension]) for dimension in SWEEP_DIMENSIONS)
+    num_configurations = int(np.prod(grid_shape))
+
+    cubes = {name: np.empty((num_cases, num_configurations)) for name in store}
+    turbulent = np.zeros(num_cases)
+    max_dv_dt = np.asarray(inputs['max_dv_dt'], dtype=float)[:, None]
+    max_velocity = np.asarray(inputs['max_velocity_mitral'], dtype=float)[:, None]
+    # mitral_model holds about 20 (cases x chunk) temporaries
+    chunk_size = budget_chunk_size(chunk_size, 20 * 8 * max(num_cases, 1))
+    with span('mitral_sweep.evaluate', configurations=num_configurations, chunk_size=chunk_size):
+        for start in range(0, num_configurations, chunk_size):
+            flat = np.arange(start, min(start + chunk_size, num_configurations))
+            indices = np.unravel_index(flat, grid_shape)
+            parameters = {dimension: coords[dimension][index][None, :] for dimension, index in zip(SWEEP_DIMENSIONS, indices)}
+            if short_diameter is None:
+                # Without a diameter range each case keeps its own diameter (coordinate 1.0 = unscaled)
+                parameters['short_diameter'] = case_diameters * parameters['short_diameter']
+            outputs = mitral_model(max_dv_dt, max_velocity, **parameters)
+            for name in store:
+                cubes[name][:, flat] = outputs[name]
+            turbulent += np.sum(outputs['reynolds'] >= CRITICAL_REYNOLDS, axis=1)
+
+    turbulent_fraction = turbulent / max(num_configurations, 1)
+    if short_diameter is None:
+        turbulent_fraction[np.isnan(case_diameters[:, 0])] = np.nan
+    result = {'dims': ('case',) + SWEEP_DIMENSIONS, 'coords': coords, 'turbulent_fraction': turbulent_fraction}
+    for name in store:
+        result[name] = cubes[name].reshape((num_cases,) + grid_shape)
+    return result
+
+
+def critical_values(sweep, dimension, output='reynolds', threshold=CRITICAL_REYNOLDS):
+    """
+    Locate where an output crosses a threshold along one sweep dimension.
+
+    For every other combination of coordinates, the first crossing along the
+    dimension is linearly interpolated between the neighbouring coordinates.
+
+    Returns:
+    - Array with the cube shape minus the swept dimension, holding the
+      coordinate of the crossing (NaN where the output does not cross).
+    """
+    axis = sweep['dims'].index(dimension)
+    coordinates = sweep['coords'][dimension]
+    values = np.moveaxis(sweep[output], axis, -1) - threshold
+    if values.shape[-1] < 2:
+        return np.full(values.shape[:-1], np.nan)
+    crossing = np.signbit(values[..., :-1]) != np.signbit(values[..., 1:])
+    has_crossing = crossing.any(axis=-1)
+    first = np.argmax(crossing, axis=-1)[..., None]
+    before = np.take_along_axis(values, first, axis=-1)[..., 0]
+    after = np.take_along_axis(values, first + 1, axis=-1)[..., 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weight = np.where(after != before, before / (before - after), 0.0)
+    located = coordinates[first[..., 0]] + weight * (coordinates[first[..., 0] + 1] - coordinates[first[..., 0]])
+    return np.where(has_crossing, located, np.nan)
@@ -0,0 +1,141 @@
+import numpy as np
+
+
+class Moments:
+    """
+    Mergeable running statistics (count, mean, M2, min, max).
+
+    Chunks are absorbed with the parallel form of Welford's algorithm
+    (Chan et al.), so partial results computed per phase, per case or per
+    worker can be merged into group statistics without keeping or stacking
+    the raw series. Statistics are taken along the first axis of each
+    chunk: a 1D series gives scalar moments, a stack of (curves x points)
+    gives pointwise moments of shape (points,).
+
+    Parameters:
+    - shape: Shape of one observation (() for scalar series).
+    - quantile_edges: Optional histogram bin edges. When given, a mergeable
+      histogram sketch is kept so approximate quantiles can be queried.
+    """
+
+    def __init__(self, shape=(), quantile_edges=None):
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+        self.min = np.full(shape, np.inf)
+        self.max = np.full(shape, -np.inf)
+        self.quantile_edges = None if quantile_edges is None else np.asarray(quantile_edges, dtype=float)
+        self.histogram = None if quantile_edges is None else np.zeros((len(self.quantile_edges) - 1,) + tuple(shape), dtype=np.int64)
+
+    @classmethod
+    def from_data(cls, data, quantile_edges=None):
+        """Create an accumulator holding the moments of one chunk."""
+        data = np.asarray(data, dtype=float)
+        moments = cls(data.shape[1:], quantile_edges=quantile_edges)
+        return moments.update(data)
+
+    def _absorb(self, count, mean, m2):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * count / total)
+        self.count = total
+
+    def update(self, data):
+        """
+        Absorb a chunk of observations.
+
+        Parameters:
+        - data: Array-like of shape (n,) + shape. NaN values are not skipped.
+
+        Returns:
+        - The accumulator itself, so calls can be chained.
+        """
+        data = np.asarray(data, dtype=float)
+        if data.shape[1:] != self.mean.shape:
+            data = data.reshape((-1,) + self.mean.shape)
+        if len(data) == 0:
+            return self
+        chunk_mean = data.mean(axis=0)
+        chunk_m2 = ((data - chunk_mean) ** 2).sum(axis=0)
+        self._absorb(len(data), chunk_mean, chunk_m2)
+        self.min = np.minimum(self.min, data.min(axis=0))
+        self.max = np.maximum(self.max, data.max(axis=0))
+        if self.histogram is not None:
+            self.histogram += _histogram(data, self.quantile_edges)
+        return self
+
+    def merge(self, other):
+        """Merge the partial result of another accumulator into this one."""
+        if other.mean.shape != self.mean.shape:
+            raise ValueError(f"Cannot merge moments of shape {other.mean.shape} into {self.mean.shape}")
+        if other.count == 0:
+            return self
+        self._absorb(other.count, other.mean, other.m2)
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        if self.histogram is not None:
+            if other.histogram is None or not np.array_equal(other.quantile_edges, self.quantile_edges):
+                raise ValueError("Cannot merge quantile sketches with different bin edges")
+            self.histogram += other.histogram
+        return self
+
+    def variance(self, ddof=0):
+        """Variance with the given delta degrees of freedom (NaN if undefined)."""
+        if self.count - ddof <= 0:
+            return np.full(self.mean.shape, np.nan)[()]
+        return (self.m2 / (self.count - ddof))[()]
+
+    def std(self, ddof=0):
+        """Standard deviation with the given delta degrees of freedom."""
+        return np.sqrt(self.variance(ddof))
+
+    def quantile(self, q):
+        """
+        Approximate quantile(s) from the histogram sketch.
+
+        Values are linearly interpolated inside the bin holding the requested
+        rank, so the error is bounded by the bin width.
+        """
+        if self.histogram is None:
+            raise ValueError("Quantiles need an accumulator created with quantile_edges")
+        cumulative = np.cumsum(self.histogram, axis=0)
+        cumulative = np.concatenate([np.zeros((1,) + cumulative.shape[1:]), cumulative])
+        q = np.asarray(q, dtype=float)
+        ranks = q.reshape(q.shape + (1,) * self.mean.ndim) * self.count
+        flat_cumulative = cumulative.reshape(len(cumulative), -1)
+        flat_ranks = np.broadcast_to(ranks, q.shape + self.mean.shape).reshape(q.size, -1)
+        result = np.empty(flat_ranks.shape)
+        for column in range(flat_cumulative.shape[1]):
+            result[:, column] = np.interp(flat_ranks[:, column], flat_cumulative[:, column], self.quantile_edges)
+        return result.reshape(q.shape + self.mean.shape)[()]
+
+    def summary(self, ddof=1):
+        """Return the statistics as a dictionary."""
+        return {
+            'count': self.count,
+            'mean': self.mean[()],
+            'std': self.std(ddof),
+            'min': self.min[()],
+            'max': self.max[()],
+        }
+
+
+def _histogram(data, edges):
+    # Bin every column of data on the same edges; values outside are clipped to the end bins
+    bins = np.clip(np.searchsorted(edges, data, side='right') - 1, 0, len(edges) - 2)
+    flat_bins = bins.reshape(len(data), -1)
+    counts = np.zeros((len(edges) - 1, flat_bins.shape[1]), dtype=np.int64)
+    for column in range(flat_bins.shape[1]):
+        counts[:, column] = np.bincount(flat_bins[:, column], minlength=len(edges) - 1)
+    return counts.reshape((len(edges) - 1,) + data.shape[1:])
+
+
+def combine(partials):
+    """Merge an iterable of accumulators (e.g. from worker processes) into one."""
+    result = None
+    for partial in partials:
+        if result is None:
+            result = Moments(partial.mean.shape, quantile_edges=partial.quantile_edges)
+        result.merge(partial)
+    return result
@@ -0,0 +1,168 @@
+import itertools
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from .memory_budget import budget_chunk_size
+
+
+def _group_label(condition):
+    # raw_data.csv abbreviates the univentricle group as 'univentr'
+    condition = str(condition).strip().lower()
+    return 'univentricle' if condition.startswith('univ') else condition
+
+
+def _chunks(total, chunk_size):
+    for start in range(0, total, chunk_size):
+        yield min(chunk_size, total - start)
+
+
+def bootstrap_mean_differences(differences, n_resamples=100000, confidence=0.95, chunk_size=10000, rng=None):
+    """
+    Percentile bootstrap confidence intervals of the mean paired difference of every metric.
+
+    Resamples are drawn as (resamples x patients) index matrices and applied
+    to all metrics at once, chunk by chunk to bound memory.
+
+    Parameters:
+    - differences: Paired differences (post - pre), shape (patients, metrics).
+      NaN entries (missing measurements) are ignored per metric.
+    - n_resamples: Number of bootstrap resamples.
+    - confidence: Confidence level of the interval.
+    - chunk_size: Number of resamples evaluated per array operation (lowered to
+      fit the remaining memory budget when one is set).
+    - rng: NumPy Generator or seed.
+
+    Returns:
+    - Tuple (ci_low, ci_high) of arrays of shape (metrics,).
+    """
+    rng = np.random.default_rng(rng)
+    differences = np.asarray(differences, dtype=float)
+    num_patients = differences.shape[0]
+    means = np.empty((n_resamples, differences.shape[1]))
+    # nanmean keeps about three copies of the gathered (chunk x patients x metrics) tensor
+    chunk_size = budget_chunk_size(chunk_size, 3 * 8 * num_patients * differences.shape[1])
+    position = 0
+    for size in _chunks(n_resamples, chunk_size):
+        indices = rng.integers(0, num_patients, size=(size, num_patients))
+        with warnings.catch_warnings():
+            # All-NaN resamples of a metric give NaN means
+            warnings.simplefilter('ignore', RuntimeWarning)
+            means[position:position + size] = np.nanmean(differences[indices], axis=1)
+        position += size
+    alpha = (1 - confidence) / 2
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        ci_low, ci_high = np.nanquantile(means, [alpha, 1 - alpha], axis=0)
+    return ci_low, ci_high
+
+
+def sign_flip_p_values(differences, n_resamples=100000, max_exact=2 ** 16, chunk_size=10000, rng=None):
+    """
+    Two-sided paired permutation p-values of the mean difference of every metric.
+
+    Under the null hypothesis the sign of every paired difference is
+    exchangeable. When 2^patients <= max_exact all sign patterns are
+    enumerated (exact test), otherwise random sign matrices are drawn
+    (Monte Carlo, with the +1 correction).
+
+    Returns:
+    - Tuple (p_values, method) with p_values of shape (metrics,) and method
+      'exact' or 'monte carlo'.
+    """
+    rng = np.random.default_rng(rng)
+    differences = np.asarray(differences, dtype=float)
+    valid = ~np.isnan(differences)
+    filled = np.where(valid, differences, 0.0)
+    counts = valid.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        observed = np.abs(filled.sum(axis=0) / counts)
+    num_patients = differences.shape[0]
+    tolerance = 1e-12 * np.maximum(np.abs(observed), 1)
+
+    if 2 ** num_patients <= max_exact:
+        signs = np.array(list(itertools.product((1.0, -1.0), repeat=num_patients)))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            permuted = np.abs(signs @ filled / counts)
+        p_values = np.mean(permuted >= observed - tolerance, axis=0)
+        method = 'exact'
+    else:
+        extreme = np.zeros(differences.shape[1])
+        for size in _chunks(n_resamples, chunk_size):
+            signs = rng.choice((1.0, -1.0), size=(size, num_patients))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                permuted = np.abs(signs @ filled / counts)
+            extreme += np.sum(permuted >= observed - tolerance, axis=0)
+        p_values = (extreme + 1) / (n_resamples + 1)
+        method = 'monte carlo'
+    return np.where(counts > 0, p_values, np.nan), method
+
+
+def paired_effect_sizes(pre, post):
+    """
+    Mean pre/post values, mean paired difference and Cohen's d_z of every metric.
+
+    Returns:
+    - Dictionary of arrays of shape (metrics,).
+    """
+    pre = np.asarray(pre, dtype=float)
+    post = np.asarray(post, dtype=float)
+    differences = post - pre
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean_difference = np.nanmean(differences, axis=0)
+        std_difference = np.nanstd(differences, axis=0, ddof=1)
+        return {
+            'n': np.sum(~np.isnan(differences), axis=0),
+            'mean_pre': np.nanmean(pre, axis=0),
+            'mean_post': np.nanmean(post, axis=0),
+            'mean_difference': mean_difference,
+            'cohens_dz': mean_difference / std_difference,
+        }
+
+
+def paired_statistics(df, metrics, group_column='Condition', n_resamples=100000, confidence=0.95, seed=0):
+    """
+    Paired pre/post statistics of every metric and group of a Cardiac_Parameters table.
+
+    Parameters:
+    - df: Table with '<metric>_pre' and '<metric>_post' columns and a group column.
+    - metrics: Metric names, e.g. ['EDV', 'ESV', 'SV', ...].
+    - group_column: Column holding the group (healthy / univentricle).
+    - n_resamples: Number of bootstrap and Monte Carlo permutation resamples.
+    - confidence: Confidence level of the bootstrap intervals.
+    - seed: Seed of the random generator, for reproducible tables.
+
+    Returns:
+    - DataFrame with one row per group and metric: n, mean pre/post, mean
+      difference with its bootstrap CI, Cohen's d_z and the permutation p-value.
+    """
+    rng = np.random.default_rng(seed)
+    pre_columns = [f'{metric}_pre' for metric in metrics]
+    post_columns = [f'{metric}_post' for metric in metrics]
+    groups = df[group_column].map(_group_label)
+    rows = []
+    for group in pd.unique(groups):
+        group_df = df[groups == group]
+        pre = group_df[pre_columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        post = group_df[post_columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        differences = post - pre
+        effects = paired_effect_sizes(pre, post)
+        ci_low, ci_high = bootstrap_mean_differences(differences, n_resamples, confidence, rng=rng)
+        p_values, method = sign_flip_p_values(differences, n_resamples, rng=rng)
+        for column, metric in enumerate(metrics):
+            rows.append({
+                'Group': group,
+                'Metric': metric,
+                'n': int(effects['n'][column]),
+                'Mean pre': effects['mean_pre'][column],
+                'Mean post': effects['mean_post'][column],
+                'Mean difference': effects['mean_difference'][column],
+                'CI low': ci_low[column],
+                'CI high': ci_high[column],
+                "Cohen's dz": effects['cohens_dz'][column],
+                'p-value': p_values[column],
+                'Permutation': method,
+            })
+    return pd.DataFrame(rows)
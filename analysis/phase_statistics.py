@@ -0,0 +1,147 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cases import REPOSITORY_ROOT, get_case, get_phase_index
+from .derived_metrics import evaluate_derived_metrics, phase_integrated_dissipation
+from .moments import Moments
+from .phases import phase_views
+from .tracing import span
+
+# Interpolated Fluent reports summarised by Mean-StD.py: the report each holds,
+# the derived metric summarised and the normalization method
+ENERGY_REPORTS = {
+    'ventricle-average-kinetic-energy_interpolated.csv': {'report': 'kinetic_energy', 'metric': 'kinetic_energy_J_per_m3', 'normalize': 'StrokeVolume'},
+    'ventricle-energy-loss_interpolated.csv': {'report': 'energy_loss', 'metric': 'power_W_per_m3', 'normalize': 'StrokeVolume'},
+}
+
+
+def normalize_data(data, method='max', ed_volume=None, es_volume=None, stroke_volume=None):
+    """
+    Normalizes data based on the specified method.
+
+    Parameters:
+    - data: The data to normalize.
+    - method: The normalization method ('max', 'EDVolume', 'ESVolume', 'StrokeVolume', 'None').
+    - ed_volume: End-Diastolic Volume in cubic meters (m³).
+    - es_volume: End-Systolic Volume in cubic meters (m³).
+    - stroke_volume: Stroke Volume in milliliters (mL).
+
+    Returns:
+    - Normalized data.
+    """
+    if method == 'max':
+        return data / data.max()
+    elif method == 'EDVolume' and ed_volume is not None:
+        return data / ed_volume
+    elif method == 'ESVolume' and es_volume is not None:
+        return data / es_volume
+    elif method == 'StrokeVolume' and stroke_volume is not None:
+        return data / stroke_volume
+    elif method == 'None':
+        return data  # No normalization applied
+    else:
+        raise ValueError("Invalid normalization method or missing volume data.")
+
+
+def load_case_energy_arrays(case_name, reports=ENERGY_REPORTS, root=REPOSITORY_ROOT):
+    """
+    Load the interpolated volumes and reports of a case for evaluate_derived_metrics.
+
+    Returns:
+    - case_arrays: Dictionary with 'flow_time', 'volume_ml', 'timestep_size',
+      'stroke_volume_ml' and one array per report.
+    - phase_index: The phase index of the case (see get_phase_index).
+    """
+    case = get_case(case_name, root)
+    directory_path = case['fluent_dir']
+    volume_path = case['interpolated_volume_path']
+    if directory_path is None or volume_path is None:
+        raise ValueError(f"Fluent results or interpolated volumes for case {case_name} not found")
+    phase_index = get_phase_index(case_name, root)
+
+    with span('mean_std.read_volumes', case_name):
+        volume_df = pd.read_csv(volume_path)
+    if 'Interpolated Volumes' not in volume_df.columns:
+        raise ValueError(f"Expected column 'Interpolated Volumes' not found in {volume_path}")
+    volumes = volume_df['Interpolated Volumes'].to_numpy()
+
+    case_arrays = {
+        'flow_time': phase_index['flow_time'],
+        'volume_ml': volumes,
+        'timestep_size': phase_index['rr_duration'] / phase_index['timesteps'],
+        # Stroke volume from the EDV (maximum) and ESV (minimum) in mL
+        'stroke_volume_ml': volumes.max() - volumes.min(),
+    }
+    for csv_file_name, options in reports.items():
+        csv_file = os.path.join(directory_path, csv_file_name)
+        if not os.path.exists(csv_file):
+            raise ValueError(f"File {csv_file_name} not found in directory {directory_path}")
+        with span('mean_std.read_report', case_name, report=options['report']):
+            df = pd.read_csv(csv_file)
+        # The interpolated files must share the grid the phase index was built on
+        if len(df) != len(phase_index['flow_time']):
+            raise ValueError(f"File {csv_file_name} has {len(df)} rows, expected {len(phase_index['flow_time'])} for case {case_name}")
+        case_arrays[options['report']] = df['Interpolated Data'].to_numpy()
+    return case_arrays, phase_index
+
+
+def phase_statistics(case_arrays, phase_index, reports=ENERGY_REPORTS, case_name=None):
+    """
+    Diastolic and systolic mean ± std of the derived metric of every report.
+
+    Parameters:
+    - case_arrays, phase_index: As returned by load_case_energy_arrays.
+    - reports: Report options, see ENERGY_REPORTS.
+    - case_name: Case name the spans are tagged with.
+
+    Returns:
+    - results: DataFrame with the 'File', 'Phase' and 'Mean ± Std (W/m³ or J/m³)'
+      columns, followed by the unrounded 'Mean' and 'Std'.
+    - derived: The evaluate_derived_metrics dictionary.
+    - dissipation: Energy dissipated per phase (mJ), see phase_integrated_dissipation;
+      empty when the reports do not include the energy loss.
+    """
+    with span('mean_std.derived_metrics', case_name):
+        derived = evaluate_derived_metrics(case_arrays)
+
+    results = []
+    for csv_file_name, options in reports.items():
+        normalization_method = options['normalize']
+        # The derived metric, or the raw report when the metric is not derived for this case
+        metric = derived[options['metric']] if options['metric'] in derived else case_arrays[options['report']]
+        converted_data = pd.Series(metric)
+
+        # Separate the converted data into diastolic and systolic based on timing information
+        phase_data = phase_views(converted_data, phase_index)
+        diastolic_data = phase_data['diastole']
+        systolic_data = phase_data['systole']
+        if normalization_method != 'None':
+            diastolic_data = normalize_data(diastolic_data, method=normalization_method, stroke_volume=case_arrays['stroke_volume_ml'])
+            systolic_data = normalize_data(systolic_data, method=normalization_method, stroke_volume=case_arrays['stroke_volume_ml'])
+
+        with span('mean_std.statistics', case_name, report=options['report']):
+            diastolic_stats = Moments.from_data(diastolic_data)
+            systolic_stats = Moments.from_data(systolic_data)
+        for phase, stats in (('Diastolic', diastolic_stats), ('Systolic', systolic_stats)):
+            results.append({
+                'File': csv_file_name,
+                'Phase': phase,
+                'Mean ± Std (W/m³ or J/m³)': f"{np.round(stats.mean, 2)} ± {np.round(stats.std(ddof=1), 2)}",
+                'Mean': float(stats.mean),
+                'Std': float(stats.std(ddof=1)),
+            })
+
+    # Energy dissipated in each phase from the cumulative trapezoid of the power (needs the energy loss report)
+    dissipation = {}
+    if 'energy_dissipation_mJ' in derived:
+        with span('mean_std.dissipation', case_name):
+            dissipation = phase_integrated_dissipation(derived['energy_dissipation_mJ'], phase_index)
+    return pd.DataFrame(results), derived, dissipation
+
+
+def case_phase_statistics(case_name, reports=ENERGY_REPORTS, root=REPOSITORY_ROOT):
+    """load_case_energy_arrays followed by phase_statistics for one case."""
+    case_arrays, phase_index = load_case_energy_arrays(case_name, reports, root)
+    return phase_statistics(case_arrays, phase_index, reports, case_name)
@@ -0,0 +1,88 @@
+import numpy as np
+
+# Cardiac phases in the order they occur in the simulated cycle
+PHASES = ('diastole', 'systole')
+
+
+def phase_bounds(flow_time, end_diastole_time, end_systole_time, rtol=1e-6):
+    """
+    Find the diastolic and systolic slice bounds on a sorted time grid.
+
+    Diastole covers [0, END_DIASTOLE_TIME] and systole covers
+    (END_DIASTOLE_TIME, END_DIASTOLE_TIME + END_SYSTOLE_TIME]. The timings in
+    time_information.csv carry about six significant digits, so a relative
+    tolerance keeps grid points that only miss a boundary through that
+    rounding (e.g. the RR endpoint) inside their phase.
+
+    Parameters:
+    - flow_time: Sorted flow times of the grid (s).
+    - end_diastole_time: Duration of diastole (s).
+    - end_systole_time: Duration of systole (s).
+    - rtol: Relative tolerance applied to the boundaries.
+
+    Returns:
+    - Dictionary mapping each phase name to a slice into the grid.
+    """
+    flow_time = np.asarray(flow_time, dtype=float)
+    tolerance = rtol * max(abs(flow_time[-1]), 1.0) if len(flow_time) else 0.0
+    diastole_end = int(np.searchsorted(flow_time, end_diastole_time + tolerance, side='right'))
+    systole_end = int(np.searchsorted(flow_time, end_diastole_time + end_systole_time + tolerance, side='right'))
+    return {
+        'diastole': slice(0, diastole_end),
+        'systole': slice(diastole_end, systole_end),
+    }
+
+
+def time_window(time, start_time, end_time):
+    """Return the slice of a sorted time array covering [start_time, end_time]."""
+    time = np.asarray(time, dtype=float)
+    start = int(np.searchsorted(time, start_time, side='left'))
+    end = int(np.searchsorted(time, end_time, side='right'))
+    return slice(start, end)
+
+
+def build_phase_index(rr_duration, end_diastole_time, end_systole_time, timesteps):
+    """
+    Build the phase index of one case on its interpolated time grid.
+
+    The grid matches the one written by separator.py to the
+    `*_interpolated.csv` files: `timesteps + 1` points from 0 to the RR duration.
+
+    Returns:
+    - Dictionary with the 'flow_time' grid, the timing parameters and one
+      slice per phase.
+    """
+    flow_time = np.linspace(0, rr_duration, int(timesteps) + 1)
+    index = {
+        'flow_time': flow_time,
+        'rr_duration': float(rr_duration),
+        'end_diastole_time': float(end_diastole_time),
+        'end_systole_time': float(end_systole_time),
+        'timesteps': int(timesteps),
+    }
+    index.update(phase_bounds(flow_time, end_diastole_time, end_systole_time))
+    return index
+
+
+def build_phase_indices(time_info_df):
+    """Build the phase index of every case listed in time_information.csv."""
+    indices = {}
+    for row in time_info_df.itertuples(index=False):
+        indices[row.case] = build_phase_index(row.RR_DURATION, row.END_DIASTOLE_TIME, row.END_SYSTOLE_TIME, row.TIMESTEPS)
+    return indices
+
+
+def phase_views(data, phase_index):
+    """
+    Split a series into its phases without copying.
+
+    Parameters:
+    - data: NumPy array or pandas Series sampled on the phase index grid.
+    - phase_index: Result of build_phase_index or phase_bounds.
+
+    Returns:
+    - Dictionary mapping each phase name to a view of the data.
+    """
+    if hasattr(data, 'iloc'):
+        return {phase: data.iloc[phase_index[phase]] for phase in PHASES}
+    return {phase: data[phase_index[phase]] for phase in PHASES}
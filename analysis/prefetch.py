@@ -0,0 +1,119 @@
+import os
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .cardiac_tables import VOLUME_TYPES, read_header, read_volume_list
+from .fluent_reports import SEPARATED_REPORTS, read_fluent_report
+from .memory_budget import budget_chunk_size, get_memory_budget
+from .signals import read_doppler_trace
+from .tracing import span
+
+# Number of cases loaded ahead of the one being computed
+DEFAULT_PREFETCH = 4
+
+
+def load_case_inputs(case, fluent_reports=SEPARATED_REPORTS):
+    """
+    Read every input file of a case.
+
+    The timing of the case (time_information.csv) is already part of the
+    case record, so only the per-case files are read here.
+
+    Parameters:
+    - case: Case record from the case registry.
+    - fluent_reports: Names of the Fluent .out reports to read.
+
+    Returns:
+    - Dictionary with the parsed 'header' (see read_header), the
+      '<type>_volumes' lists (ml) for type in VOLUME_TYPES, the
+      'doppler_<valve>' (time, velocity) arrays for valve in ('mv', 'av') and
+      'fluent', mapping each report to its (flow_time, values) arrays.
+      Missing files are None.
+    """
+    inputs = {'header': read_header(case['header_path']) if case['header_path'] else None}
+    for volume_type in VOLUME_TYPES:
+        inputs[f'{volume_type}_volumes'] = read_volume_list(case[f'{volume_type}_volume_path'])
+    for valve in ('mv', 'av'):
+        path = case[f'doppler_{valve}_path']
+        inputs[f'doppler_{valve}'] = read_doppler_trace(path) if path else None
+    inputs['fluent'] = {}
+    for report in fluent_reports:
+        path = os.path.join(case['fluent_dir'], report) if case['fluent_dir'] else None
+        if path is None or not os.path.isfile(path):
+            inputs['fluent'][report] = None
+            continue
+        _, values, flow_time = read_fluent_report(path)
+        inputs['fluent'][report] = (flow_time, values)
+    return inputs
+
+
+def _nbytes(value):
+    # Rough in-memory size of loaded inputs: arrays by their buffers, containers recursively
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(_nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_nbytes(item) for item in value) + 8 * len(value)
+    return sys.getsizeof(value)
+
+
+def _load(loader, case):
+    with span('prefetch.load', case.get('case')):
+        return loader(case)
+
+
+def prefetch_cases(cases, loader=load_case_inputs, prefetch=DEFAULT_PREFETCH, max_workers=None):
+    """
+    Iterate over cases with their inputs, reading the next cases while the current one is computed.
+
+    The loader runs on a thread pool, which overlaps the file-open and read
+    latency of the following cases with the work done on the yielded one.
+    Backpressure keeps at most `prefetch` cases loaded or loading besides
+    the one held by the consumer. With a memory budget the window starts at one case and is
+    then sized with budget_chunk_size from the largest inputs seen so far.
+
+    Parameters:
+    - cases: Iterable of case records (consumed lazily).
+    - loader: Function reading the inputs of one case.
+    - prefetch: Maximum number of cases loaded ahead.
+    - max_workers: Loader threads (default: prefetch).
+
+    Returns:
+    - Generator of (case, inputs) tuples in the order of cases. A loader
+      error is raised when its case is reached. Closing the generator early
+      cancels the loads that have not started.
+    """
+    cases = iter(cases)
+    pending = deque()
+    case_bytes = 0
+
+    def fill():
+        if get_memory_budget() is None:
+            window = max(1, prefetch)
+        else:
+            window = budget_chunk_size(max(1, prefetch), case_bytes) if case_bytes else 1
+        while len(pending) < window:
+            case = next(cases, None)
+            if case is None:
+                return
+            pending.append((case, executor.submit(_load, loader, case)))
+
+    with ThreadPoolExecutor(max_workers=max_workers or max(1, prefetch)) as executor:
+        try:
+            fill()
+            while pending:
+                case, future = pending.popleft()
+                # Keep the window full while the consumer works on this case
+                fill()
+                # Time the consumer spends blocked on I/O that prefetching did not hide
+                with span('prefetch.wait', case.get('case')):
+                    inputs = future.result()
+                case_bytes = max(case_bytes, _nbytes(inputs))
+                yield case, inputs
+        finally:
+            for _, future in pending:
+                future.cancel()
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+from .cardiac_tables import read_volume_list
+from .cases import load_case_registry
+from .time_warping import pad_curves
+
+
+def load_volume_pairs(cases=None):
+    """
+    Load every raw/reconstructed volume pair of the cohort into stacked arrays.
+
+    Cases whose raw and reconstructed volumes have different frame counts
+    are skipped with a message.
+
+    Returns:
+    - labels: List of case names.
+    - raw: NaN-padded raw volumes (ml), shape (pairs, max_frames).
+    - reconstructed: NaN-padded reconstructed volumes (ml), same shape.
+    - lengths: Number of frames of every pair, shape (pairs,).
+    """
+    if cases is None:
+        cases = load_case_registry().values()
+    labels, raw_lists, reconstructed_lists = [], [], []
+    for case in sorted(cases, key=lambda case: case['case']):
+        raw_volumes = read_volume_list(case['raw_volume_path'])
+        reconstructed_volumes = read_volume_list(case['reconstructed_volume_path'])
+        if raw_volumes is None or reconstructed_volumes is None:
+            continue
+        if len(raw_volumes) != len(reconstructed_volumes):
+            # The frames cannot be paired: leave the case out instead of failing the whole table
+            print(f"Raw and reconstructed volumes of '{case['case']}' have {len(raw_volumes)} and {len(reconstructed_volumes)} frames. Skipping.")
+            continue
+        labels.append(case['case'])
+        raw_lists.append(raw_volumes)
+        reconstructed_lists.append(reconstructed_volumes)
+    if not labels:
+        return labels, np.empty((0, 2)), np.empty((0, 2)), np.empty(0, dtype=int)
+    raw, lengths = pad_curves(raw_lists)
+    reconstructed, _ = pad_curves(reconstructed_lists)
+    return labels, raw, reconstructed, lengths
+
+
+def dtw_distances(first, second, first_lengths=None, second_lengths=None):
+    """
+    Dynamic time warping distance of every pair of curves, with an absolute-difference cost.
+
+    The DP table is filled one anti-diagonal at a time: every cell (i, j)
+    with i + j = d depends only on diagonals d - 1 and d - 2, so each
+    diagonal is updated for all cells and all pairs in one array operation.
+
+    Parameters:
+    - first, second: NaN-padded curves, shapes (pairs, n) and (pairs, m).
+    - first_lengths, second_lengths: Number of valid frames of every curve
+      (default: the full widths).
+
+    Returns:
+    - Array of shape (pairs,) with the DTW distances.
+    """
+    first = np.atleast_2d(np.asarray(first, dtype=float))
+    second = np.atleast_2d(np.asarray(second, dtype=float))
+    num_pairs, n = first.shape
+    m = second.shape[1]
+    first_lengths = np.full(num_pairs, n) if first_lengths is None else np.asarray(first_lengths)
+    second_lengths = np.full(num_pairs, m) if second_lengths is None else np.asarray(second_lengths)
+
+    cost = np.abs(first[:, :, None] - second[:, None, :])
+    cost[np.isnan(cost)] = np.inf  # padded frames are never matched
+
+    table = np.full((num_pairs, n + 1, m + 1), np.inf)
+    table[:, 0, 0] = 0.0
+    for diagonal in range(2, n + m + 1):
+        i = np.arange(max(1, diagonal - m), min(n, diagonal - 1) + 1)
+        j = diagonal - i
+        previous = np.minimum(np.minimum(table[:, i - 1, j], table[:, i, j - 1]), table[:, i - 1, j - 1])
+        table[:, i, j] = cost[:, i - 1, j - 1] + previous
+    return table[np.arange(num_pairs), first_lengths, second_lengths]
+
+
+def reconstruction_error_metrics(raw, reconstructed, lengths):
+    """
+    Error metrics of the reconstructed against the raw volumes, for every pair at once.
+
+    Returns:
+    - Dictionary of arrays of shape (pairs,): 'bias' (mean reconstructed - raw, ml),
+      'rmse' (ml), 'max_abs_error' (ml), 'ed_error' and 'es_error' (error at the
+      raw ED/ES frames, ml), 'percentage_bias' (mean relative error, %) and 'dtw' (ml).
+    """
+    difference = reconstructed - raw
+    rows = np.arange(len(raw))
+    ed_frames = np.nanargmax(raw, axis=1)
+    es_frames = np.nanargmin(raw, axis=1)
+    return {
+        'bias': np.nanmean(difference, axis=1),
+        'rmse': np.sqrt(np.nanmean(difference ** 2, axis=1)),
+        'max_abs_error': np.nanmax(np.abs(difference), axis=1),
+        'ed_error': difference[rows, ed_frames],
+        'es_error': difference[rows, es_frames],
+        'percentage_bias': np.nanmean(difference / raw, axis=1) * 100,
+        'dtw': dtw_distances(raw, reconstructed, lengths, lengths),
+    }
+
+
+def reconstruction_error_table(cases=None):
+    """Table of the reconstruction error metrics of every case with raw and reconstructed volumes."""
+    labels, raw, reconstructed, lengths = load_volume_pairs(cases)
+    table = pd.DataFrame({'case': labels, 'frames': lengths})
+    if len(labels):
+        for column, values in reconstruction_error_metrics(raw, reconstructed, lengths).items():
+            table[column] = values
+    return table
@@ -0,0 +1,105 @@
+import numpy as np
+
+
+def _periodic_sample(rows, positions):
+    # Linearly interpolate periodic rows sampled on arange(N) / N at normalized positions
+    num_points = rows.shape[-1]
+    scaled = np.mod(positions, 1.0) * num_points
+    lower = np.floor(scaled).astype(int)
+    weight = scaled - lower
+    lower %= num_points
+    upper = (lower + 1) % num_points
+    return rows[..., lower] * (1 - weight) + rows[..., upper] * weight
+
+
+def _interp_rows(new_time, time, rows):
+    # np.interp for every row at once (shared, sorted time axis)
+    upper = np.clip(np.searchsorted(time, new_time, side='right'), 1, len(time) - 1)
+    lower = upper - 1
+    span = time[upper] - time[lower]
+    weight = np.clip(np.divide(new_time - time[lower], span, out=np.zeros_like(new_time), where=span > 0), 0, 1)
+    return rows[:, lower] * (1 - weight) + rows[:, upper] * weight
+
+
+def register_signals(time, reference, signals, stretches=None, num_points=None):
+    """
+    Align signals to reference curves with batched FFT cross-correlation.
+
+    Each row is treated as one periodic beat on a normalized time axis in
+    [0, 1]. The optimal circular lag is found from the cross-correlation of
+    the zero-mean curves, computed for every row (and every candidate time
+    stretch) with one FFT, and refined to sub-sample precision by parabolic
+    interpolation of the correlation peak.
+
+    Parameters:
+    - time: Normalized time grid shared by all rows, shape (points,).
+    - reference: Reference curves (e.g. Fluent velocities), shape (pairs, points).
+    - signals: Curves to align (e.g. Doppler velocities), shape (pairs, points).
+    - stretches: Optional candidate linear time stretch factors; the signal is
+      evaluated at (t * stretch) mod 1 before the lag search. Default: no stretch.
+    - num_points: Size of the periodic registration grid (default: len(time)).
+
+    Returns:
+    - Dictionary with the 'aligned' signals on the input grid, the per-row
+      'lag' (normalized time in [-0.5, 0.5), positive when the signal leads
+      the reference and is delayed to align), 'stretch' and peak
+      'correlation', and the lag statistics 'lag_mean', 'lag_std' and
+      'lag_max_abs'.
+    """
+    time = np.asarray(time, dtype=float)
+    reference = np.atleast_2d(np.asarray(reference, dtype=float))
+    signals = np.atleast_2d(np.asarray(signals, dtype=float))
+    stretches = np.atleast_1d(np.asarray([1.0] if stretches is None else stretches, dtype=float))
+    num_points = len(time) if num_points is None else num_points
+
+    # Resample onto a periodic grid (the endpoint t = 1 is the next beat's t = 0)
+    grid = np.arange(num_points) / num_points
+    reference_periodic = _interp_rows(grid, time, reference)
+    signals_periodic = _interp_rows(grid, time, signals)
+
+    # Stretched candidates, shape (pairs, stretches, points)
+    candidates = _periodic_sample(signals_periodic, grid[None, :] * stretches[:, None])
+    reference_centered = reference_periodic - reference_periodic.mean(axis=-1, keepdims=True)
+    candidates_centered = candidates - candidates.mean(axis=-1, keepdims=True)
+
+    # Circular cross-correlation: xcorr[k] = sum_t reference(t + k) * candidate(t)
+    cross_spectrum = np.fft.rfft(reference_centered, axis=-1)[:, None, :] * np.conj(np.fft.rfft(candidates_centered, axis=-1))
+    xcorr = np.fft.irfft(cross_spectrum, n=num_points, axis=-1)
+    norms = np.linalg.norm(reference_centered, axis=-1)[:, None, None] * np.linalg.norm(candidates_centered, axis=-1)[..., None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        xcorr = np.where(norms > 0, xcorr / norms, 0.0)
+
+    # Best stretch and integer lag per row
+    pairs = np.arange(len(reference))
+    flat_best = np.argmax(xcorr.reshape(len(reference), -1), axis=1)
+    best_stretch, best_lag = np.unravel_index(flat_best, xcorr.shape[1:])
+    peak = xcorr[pairs, best_stretch]
+
+    # Parabolic sub-sample refinement around the peak
+    before = peak[pairs, (best_lag - 1) % num_points]
+    at = peak[pairs, best_lag]
+    after = peak[pairs, (best_lag + 1) % num_points]
+    curvature = before - 2 * at + after
+    with np.errstate(divide='ignore', invalid='ignore'):
+        offset = np.where(curvature < 0, 0.5 * (before - after) / curvature, 0.0)
+    lag = np.mod((best_lag + offset) / num_points + 0.5, 1.0) - 0.5
+
+    # Apply the stretch and lag on the input grid: aligned(t) = signal(((t - lag) mod 1) * stretch)
+    stretch = stretches[best_stretch]
+    positions = np.mod(np.mod(time[None, :] - lag[:, None], 1.0) * stretch[:, None], 1.0)
+    scaled = positions * num_points
+    lower = np.floor(scaled).astype(int)
+    weight = scaled - lower
+    lower %= num_points
+    aligned = (signals_periodic[pairs[:, None], lower] * (1 - weight)
+               + signals_periodic[pairs[:, None], (lower + 1) % num_points] * weight)
+
+    return {
+        'aligned': aligned,
+        'lag': lag,
+        'stretch': stretch,
+        'correlation': at,
+        'lag_mean': float(np.mean(lag)) if len(lag) else np.nan,
+        'lag_std': float(np.std(lag)) if len(lag) else np.nan,
+        'lag_max_abs': float(np.max(np.abs(lag))) if len(lag) else np.nan,
+    }
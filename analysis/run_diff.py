@@ -0,0 +1,186 @@
+import glob
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from .cases import REPOSITORY_ROOT, load_case_registry
+from .phase_statistics import ENERGY_REPORTS, case_phase_statistics
+from .vti import cohort_vti_table
+
+# Locations of the outputs inside a run (a checkout or a copy of one)
+RESULTS_PATTERN = os.path.join('Ventricle_Database', 'output', '*_results.csv')
+INTERPOLATED_PATTERN = os.path.join('Fluent_Results', '*', '*_interpolated.csv')
+TABLES_DIRECTORY = os.path.join('Ventricle_Database', 'output', 'tables')
+
+# Default tolerances: a value moved if |after - before| > atol + rtol * |before|
+DEFAULT_ATOL = 1e-9
+DEFAULT_RTOL = 1e-6
+
+# 'Key: 12.34 unit' lines of the main.py result files
+_RESULT_LINE = re.compile(r'^(?P<key>[^:]+):\s*(?P<value>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)')
+
+
+def parse_results_file(path):
+    """
+    Read the numbers of a main.py *_results.csv file.
+
+    Lines without a value (e.g. 'Raw', '--- MITRAL VALVE RESULTS ---')
+    start a section, which prefixes the following keys so the raw and
+    reconstructed volumes stay apart. A blank line ends the section.
+
+    Returns:
+    - Dictionary mapping '<section>/<key>' to its value.
+    """
+    values = {}
+    section = ''
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                section = ''
+                continue
+            # 'Max volume (EDV): 83.0168 ml at position: 13' holds the frame position as a second value
+            line, _, position = line.partition(' at position: ')
+            match = _RESULT_LINE.match(line)
+            if match is None:
+                section = line.strip('- ').lower()
+                continue
+            key = f"{section}/{match.group('key').strip()}" if section else match.group('key').strip()
+            values[key] = float(match.group('value'))
+            if position:
+                values[f'{key} position'] = float(position)
+    return values
+
+
+def load_run(root):
+    """
+    Load the numeric outputs of a run.
+
+    Parameters:
+    - root: Repository root of the run.
+
+    Returns:
+    - Dictionary mapping (source, case, metric) to a 1D float array:
+      the main.py results ('results'), every separator '_interpolated'
+      series ('interpolated') and the long 'case, metric, value' tables
+      written by write_run_tables (source: the table name).
+    """
+    values = {}
+    for path in glob.glob(os.path.join(root, RESULTS_PATTERN)):
+        case_name = os.path.basename(path)[:-len('_results.csv')]
+        for metric, value in parse_results_file(path).items():
+            values[('results', case_name, metric)] = np.array([value])
+    for path in glob.glob(os.path.join(root, INTERPOLATED_PATTERN)):
+        case_name = os.path.basename(os.path.dirname(path))
+        report = os.path.basename(path)[:-len('_interpolated.csv')]
+        values[('interpolated', case_name, report)] = pd.read_csv(path)['Interpolated Data'].to_numpy(dtype=float)
+    for path in glob.glob(os.path.join(root, TABLES_DIRECTORY, '*.csv')):
+        table = pd.read_csv(path)
+        source = os.path.splitext(os.path.basename(path))[0]
+        for case_name, metric, value in zip(table['case'], table['metric'], table['value'].to_numpy(dtype=float)):
+            values[(source, case_name, metric)] = np.array([value])
+    return values
+
+
+def diff_runs(before, after, atol=DEFAULT_ATOL, rtol=DEFAULT_RTOL, tolerances=None):
+    """
+    Compare two runs loaded with load_run.
+
+    The values present in both runs with the same length are concatenated
+    and compared in one vectorized pass; the per-output maxima are then
+    taken with reduceat over the segment offsets. NaN equals NaN.
+
+    Parameters:
+    - before, after: Outputs of load_run.
+    - atol, rtol: Absolute and relative tolerance (relative to before).
+    - tolerances: Optional {source: (atol, rtol)} overriding the defaults per source.
+
+    Returns:
+    - DataFrame with one row per output that moved beyond tolerance, was
+      added or removed or changed length: 'source', 'case', 'metric',
+      'status', the number of 'points' and 'changed' points, the 'max_abs'
+      and 'max_rel' differences and the 'before'/'after' values (for series,
+      at the point of the largest difference), sorted by source, case and metric.
+    """
+    tolerances = tolerances or {}
+    columns = ['source', 'case', 'metric', 'status', 'points', 'changed', 'max_abs', 'max_rel', 'before', 'after']
+    rows = []
+    common = []
+    for key in sorted(set(before) | set(after)):
+        if key not in after:
+            rows.append({'source': key[0], 'case': key[1], 'metric': key[2], 'status': 'removed', 'points': len(before[key]), 'before': before[key][0]})
+        elif key not in before:
+            rows.append({'source': key[0], 'case': key[1], 'metric': key[2], 'status': 'added', 'points': len(after[key]), 'after': after[key][0]})
+        elif len(before[key]) != len(after[key]):
+            rows.append({'source': key[0], 'case': key[1], 'metric': key[2], 'status': 'length',
+                         'points': len(after[key]), 'before': before[key][0], 'after': after[key][0]})
+        elif len(before[key]):
+            common.append(key)
+
+    if common:
+        lengths = np.array([len(before[key]) for key in common])
+        offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        old = np.concatenate([before[key] for key in common])
+        new = np.concatenate([after[key] for key in common])
+        key_atol = np.array([tolerances.get(key[0], (atol, rtol))[0] for key in common])
+        key_rtol = np.array([tolerances.get(key[0], (atol, rtol))[1] for key in common])
+
+        both_nan = np.isnan(old) & np.isnan(new)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            absolute = np.where(both_nan, 0.0, np.abs(new - old))
+            absolute[np.isnan(absolute)] = np.inf  # NaN on one side only
+            relative = np.where(absolute == 0, 0.0, absolute / np.abs(old))
+        changed = absolute > np.repeat(key_atol, lengths) + np.repeat(key_rtol, lengths) * np.abs(np.nan_to_num(old))
+
+        changed_points = np.add.reduceat(changed.astype(np.int64), offsets)
+        max_absolute = np.maximum.reduceat(absolute, offsets)
+        max_relative = np.maximum.reduceat(relative, offsets)
+        for index in np.flatnonzero(changed_points):
+            key = common[index]
+            point = int(np.argmax(absolute[offsets[index]:offsets[index] + lengths[index]]))
+            rows.append({'source': key[0], 'case': key[1], 'metric': key[2], 'status': 'changed',
+                         'points': int(lengths[index]), 'changed': int(changed_points[index]),
+                         'max_abs': max_absolute[index], 'max_rel': max_relative[index],
+                         'before': before[key][point], 'after': after[key][point]})
+
+    diff = pd.DataFrame(rows, columns=columns)
+    return diff.sort_values(['source', 'case', 'metric'], ignore_index=True)
+
+
+def write_run_tables(root=REPOSITORY_ROOT, output_directory=None):
+    """
+    Store the VTI and Mean-StD outputs of a run as long 'case, metric, value' tables.
+
+    vti.py and Mean-StD.py only print their results, so this writes them
+    where load_run finds them: 'vti.csv' (every trace of the vti
+    directory) and 'phase_statistics.csv' (every case with Fluent results).
+
+    Returns:
+    - List of the written paths.
+    """
+    output_directory = output_directory or os.path.join(root, TABLES_DIRECTORY)
+    os.makedirs(output_directory, exist_ok=True)
+
+    vti = cohort_vti_table(os.path.join(root, 'Ventricle_Database', 'vti'))
+    vti_rows = pd.DataFrame({'case': vti['case'], 'metric': 'vti/' + vti['valve'], 'value': vti['vti']})
+
+    statistics_rows = []
+    for case_name, case in sorted(load_case_registry(root).items()):
+        if case['fluent_dir'] is None or case['interpolated_volume_path'] is None:
+            continue
+        if not all(os.path.isfile(os.path.join(case['fluent_dir'], file_name)) for file_name in ENERGY_REPORTS):
+            continue
+        results, _, dissipation = case_phase_statistics(case_name, root=root)
+        for row in results.itertuples(index=False):
+            report = row.File[:-len('_interpolated.csv')]
+            statistics_rows.append({'case': case_name, 'metric': f'{report}/{row.Phase.lower()}/mean', 'value': row.Mean})
+            statistics_rows.append({'case': case_name, 'metric': f'{report}/{row.Phase.lower()}/std', 'value': row.Std})
+        for phase, value in dissipation.items():
+            statistics_rows.append({'case': case_name, 'metric': f'dissipation_mJ/{phase}', 'value': value})
+
+    paths = [os.path.join(output_directory, 'vti.csv'), os.path.join(output_directory, 'phase_statistics.csv')]
+    vti_rows.to_csv(paths[0], index=False)
+    pd.DataFrame(statistics_rows, columns=['case', 'metric', 'value']).to_csv(paths[1], index=False)
+    return paths
@@ -0,0 +1,227 @@
+import os
+import sys
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from .cardiac_tables import read_volume_list
+from .cases import load_case_registry
+from .prefetch import DEFAULT_PREFETCH, prefetch_cases
+from .signals import read_doppler_trace, read_fluent_series
+
+# Fluent reports of separator.py held by the shared cohort
+FLUENT_REPORTS = (
+    'ventricle-average-kinetic-energy',
+    'ventricle-average-turbulent-kinetic-energy',
+    'ventricle-average-velocity-inlet',
+    'ventricle-average-velocity-outlet',
+    'ventricle-average-wss',
+    'ventricle-energy-loss',
+)
+
+# Byte alignment of every array inside the shared block
+_ALIGNMENT = 64
+
+# Cohorts attached in this process, by block name, so every worker attaches once
+_attached = {}
+
+
+def _attach_untracked(name):
+    # Attach without registering the block with the resource tracker: only the
+    # creating process owns it, so a worker exiting must neither unlink it nor
+    # report it as leaked
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Before 3.13 attaching always registers the block. Unregistering it afterwards
+    # would also drop the registration of the owner when both processes share one
+    # tracker (fork and spawn children do), so the registration is skipped instead
+    register = resource_tracker.register
+
+    def register_other(resource_name, resource_type):
+        if resource_type != 'shared_memory':
+            register(resource_name, resource_type)
+
+    resource_tracker.register = register_other
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _pad_rows(rows):
+    # NaN-padded stack and lengths of 1D arrays; None rows become empty rows
+    lengths = np.array([0 if row is None else len(row) for row in rows], dtype=int)
+    stack = np.full((len(rows), lengths.max(initial=0)), np.nan)
+    mask = np.arange(stack.shape[1]) < lengths[:, None]
+    stack[mask] = np.concatenate([np.asarray(row, dtype=float) for row in rows if row is not None] or [np.empty(0)])
+    return stack, lengths
+
+
+def _load_case_row(case):
+    # Inputs of one row of the cohort arrays, read on the prefetch threads
+    row = {f'{volume_type}_volumes': read_volume_list(case[f'{volume_type}_volume_path']) for volume_type in ('raw', 'reconstructed')}
+    for valve in ('mv', 'av'):
+        row[f'doppler_{valve}'] = read_doppler_trace(case[f'doppler_{valve}_path']) if case[f'doppler_{valve}_path'] else (None, None)
+    for report in FLUENT_REPORTS:
+        path = os.path.join(case['fluent_dir'], f'{report}_interpolated.csv') if case['fluent_dir'] else None
+        row[f'fluent_{report}'] = read_fluent_series(path) if path is not None and os.path.isfile(path) else (None, None)
+    return row
+
+
+def load_cohort_arrays(cases=None, prefetch=DEFAULT_PREFETCH):
+    """
+    Load the volume curves, Doppler traces and Fluent reports of every case into stacked arrays.
+
+    Curves of different lengths are NaN-padded, with their lengths stored
+    next to them; missing inputs are rows of length 0. The files of the
+    following cases are read while the current one is parsed (see prefetch_cases).
+
+    Returns:
+    - Dictionary with the case 'labels', the '<type>_volumes' (ml) and
+      '<type>_volume_lengths' for type in ('raw', 'reconstructed'), the
+      'doppler_<valve>_time' (s), 'doppler_<valve>_velocity' and
+      'doppler_<valve>_lengths' for valve in ('mv', 'av'), the Fluent
+      'fluent_time' (s) and 'fluent_lengths' and one 'fluent_<report>' array
+      per report in FLUENT_REPORTS.
+    """
+    if cases is None:
+        cases = load_case_registry().values()
+    cases = sorted((case for case in cases if case['raw_volume_path']), key=lambda case: case['case'])
+    rows = [row for _, row in prefetch_cases(cases, _load_case_row, prefetch=prefetch)]
+    arrays = {'labels': np.array([case['case'] for case in cases], dtype=str)}
+    for volume_type in ('raw', 'reconstructed'):
+        arrays[f'{volume_type}_volumes'], arrays[f'{volume_type}_volume_lengths'] = _pad_rows([row[f'{volume_type}_volumes'] for row in rows])
+    for valve in ('mv', 'av'):
+        arrays[f'doppler_{valve}_time'], arrays[f'doppler_{valve}_lengths'] = _pad_rows([row[f'doppler_{valve}'][0] for row in rows])
+        arrays[f'doppler_{valve}_velocity'], _ = _pad_rows([row[f'doppler_{valve}'][1] for row in rows])
+
+    fluent_time = [None] * len(cases)
+    for report in FLUENT_REPORTS:
+        series = []
+        for index, row in enumerate(rows):
+            time, values = row[f'fluent_{report}']
+            fluent_time[index] = time if fluent_time[index] is None else fluent_time[index]
+            series.append(values)
+        arrays[f'fluent_{report}'], _ = _pad_rows(series)
+    arrays['fluent_time'], arrays['fluent_lengths'] = _pad_rows(fluent_time)
+    return arrays
+
+
+def _release(memory, unlink, creator_pid):
+    try:
+        memory.close()
+    except BufferError:
+        # Views into the block are still alive; the mapping goes away with the process
+        pass
+    # Forked workers inherit the owner's cohort object but must not unlink the block
+    if unlink and os.getpid() == creator_pid:
+        try:
+            memory.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedCohort:
+    """
+    Named arrays of a cohort stored once in a shared memory block.
+
+    The process that creates the cohort owns the block and unlinks it when
+    the cohort is closed or garbage collected. Pickling a SharedCohort only
+    sends the block name and the array layout. Unpickling in a worker
+    attaches to the same block, once per process, and exposes read-only
+    NumPy views, so no array data is copied whatever the number of workers.
+    """
+
+    def __init__(self, memory, layout, owner):
+        self._memory = memory
+        self._layout = layout
+        self.owner = owner
+        self.arrays = {}
+        for key, (dtype, shape, offset) in layout.items():
+            array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=memory.buf, offset=offset)
+            array.flags.writeable = False
+            self.arrays[key] = array
+        self._finalizer = weakref.finalize(self, _release, memory, owner, os.getpid())
+
+    @classmethod
+    def create(cls, arrays):
+        """Copy a dictionary of arrays (e.g. load_cohort_arrays()) into a new shared block."""
+        layout = {}
+        size = 0
+        for key, array in arrays.items():
+            array = np.asarray(array)
+            if array.dtype.hasobject:
+                raise ValueError(f"Array '{key}' holds Python objects and cannot be shared")
+            size = -(-size // _ALIGNMENT) * _ALIGNMENT
+            layout[key] = (array.dtype.str, array.shape, size)
+            size += array.nbytes
+        memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for key, array in arrays.items():
+            dtype, shape, offset = layout[key]
+            np.ndarray(shape, dtype=np.dtype(dtype), buffer=memory.buf, offset=offset)[...] = array
+        return cls(memory, layout, owner=True)
+
+    @classmethod
+    def attach(cls, name, layout):
+        """Attach to a block created in another process (see handle)."""
+        if name in _attached:
+            return _attached[name]
+        memory = _attach_untracked(name)
+        cohort = cls(memory, layout, owner=False)
+        _attached[name] = cohort
+        return cohort
+
+    @property
+    def name(self):
+        return self._memory.name
+
+    @property
+    def handle(self):
+        """Picklable (name, layout) tuple for SharedCohort.attach."""
+        return self._memory.name, self._layout
+
+    @property
+    def nbytes(self):
+        return self._memory.size
+
+    def __reduce__(self):
+        return SharedCohort.attach, self.handle
+
+    def __getitem__(self, key):
+        return self.arrays[key]
+
+    def __contains__(self, key):
+        return key in self.arrays
+
+    def keys(self):
+        return self.arrays.keys()
+
+    def close(self):
+        """Drop the views and release the block (unlinked if this process created it)."""
+        self.arrays = {}
+        _attached.pop(self._memory.name, None)
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+def _attach_in_worker(name, layout):
+    SharedCohort.attach(name, layout)
+
+
+def cohort_process_pool(cohort, max_workers=None, mp_context=None):
+    """
+    ProcessPoolExecutor whose workers attach to the shared cohort at startup.
+
+    Tasks can then take the cohort as an argument (only its handle is
+    pickled) or call SharedCohort.attach(*cohort.handle), which returns the
+    worker's existing attachment.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context, initializer=_attach_in_worker, initargs=cohort.handle)
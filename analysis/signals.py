@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+# Fluent velocity report compared against each Doppler trace: mitral inflow (inlet) and aortic outflow (outlet)
+FLUENT_VELOCITY_FILES = {
+    'mv': 'ventricle-average-velocity-inlet_interpolated.csv',
+    'av': 'ventricle-average-velocity-outlet_interpolated.csv',
+}
+
+
+def read_doppler_trace(file_path):
+    """
+    Read a two-column Doppler CSV (time, velocity) without header into sorted arrays.
+
+    Digitized traces hold a few typos such as '0.0463.', which are read
+    without the trailing dot; rows that still do not parse are dropped.
+    """
+    doppler_df = pd.read_csv(file_path, header=None, names=['Time', 'Velocity'], dtype=str)
+    for column in ('Time', 'Velocity'):
+        doppler_df[column] = pd.to_numeric(doppler_df[column].str.strip().str.rstrip('.'), errors='coerce')
+    doppler_df = doppler_df.dropna().sort_values('Time', kind='stable')
+    return doppler_df['Time'].to_numpy(dtype=float), doppler_df['Velocity'].to_numpy(dtype=float)
+
+
+def read_fluent_series(file_path):
+    """Read an `*_interpolated.csv` Fluent report into (flow time, data) arrays."""
+    fluent_df = pd.read_csv(file_path)
+    return fluent_df['Flow Time'].to_numpy(dtype=float), fluent_df['Interpolated Data'].to_numpy(dtype=float)
+
+
+def normalize_time(time):
+    """Min-max scale a time axis to [0, 1], as MinMaxScaler does in doppler_fluent.py."""
+    time = np.asarray(time, dtype=float)
+    span = time.max() - time.min()
+    if span == 0:
+        return np.zeros_like(time)
+    return (time - time.min()) / span
@@ -0,0 +1,275 @@
+import os
+
+import numpy as np
+
+from .cardiac_tables import case_cardiac_parameters, cohort_table, volume_metrics
+from .cases import CONDITIONS
+from .memory_budget import budgeted_map
+
+# Fluent reports: file name -> (first, second and third header line), as written by the report files
+FLUENT_REPORTS = {
+    'ventricle-average-kinetic-energy.out': ('report-ven-kin-energy-rfile', 'report-ven-kin-energy etc..', 'report-ven-kin-energy'),
+    'ventricle-average-turbulent-kinetic-energy.out': ('ventricle-volume-average-tke-rfile', 'ventricle-volume-average-tke', 'ventricle-volume-average-tke'),
+    'ventricle-average-velocity-inlet.out': ('report-ven-ave-vel-inlet-rfile', 'report-ven-ave-vel-inlet etc..', 'report-ven-ave-vel-inlet'),
+    'ventricle-average-velocity-outlet.out': ('report-ven-ave-vel-outlet-rfile', 'report-ven-ave-vel-outlet etc..', 'report-ven-ave-vel-outlet'),
+    'ventricle-average-wss.out': ('avrg-wss', 'flow-time etc..', 'report-avrg-wss'),
+    'ventricle-energy-loss.out': ('energy-loss', 'flow-time etc..', 'report-energy-loss'),
+    'velocity-plane-over-valves.out': ('velocity-plane-over-valves-rfile', 'velocity-plane-over-valves etc..', 'velocity-plane-over-valves'),
+}
+
+# Fluent timestep size (s) and report interval (timesteps) of the real simulations
+FLUENT_TIMESTEP_SIZE = 0.0022
+FLUENT_REPORT_STRIDE = 20
+
+PATIENT_TYPES = ('healthy', 'fontan')
+
+
+def _bump(phase, center, width):
+    return np.exp(-((phase - center) / width) ** 2)
+
+
+def synthetic_patient(rng, patient_type):
+    """
+    Draw the physiological parameters of one synthetic patient, pre and post.
+
+    Ranges follow the real cohort: BSA 1.3-2.0 m², EDV ~70 ml/m², EF 45-65%
+    (40-55% for Fontan patients), HR 50-90 bpm at rest rising 10-40% post.
+    """
+    height = rng.uniform(145, 190)
+    weight = rng.uniform(38, 85)
+    bsa = np.sqrt(height * weight / 3600)
+    edv = rng.uniform(55, 85) * bsa * (1.1 if patient_type == 'fontan' else 1.0)
+    ejection_fraction = rng.uniform(40, 55) if patient_type == 'fontan' else rng.uniform(45, 65)
+    heart_rate = rng.uniform(50, 90)
+    conditions = {}
+    for condition in CONDITIONS:
+        if condition == 'post':
+            heart_rate *= rng.uniform(1.1, 1.4)
+            edv *= rng.uniform(0.92, 1.15)
+            ejection_fraction = np.clip(ejection_fraction * rng.uniform(0.95, 1.12), 35, 70)
+        rr_duration = 60000 / heart_rate
+        conditions[condition] = {
+            'edv': edv,
+            'esv': edv * (1 - ejection_fraction / 100),
+            'rr_duration': rr_duration,
+            'endsystole_time': min(rng.uniform(290, 380), 0.55 * rr_duration),
+            'num_frames': int(rng.integers(12, 31)),
+            'peak_fraction': rng.uniform(0.55, 0.75),
+            'e_velocity': rng.uniform(55, 95),
+            'a_velocity': rng.uniform(35, 70),
+            'aortic_velocity': rng.uniform(70, 130),
+        }
+    return {'patient_type': patient_type, 'weight': weight, 'height': height, 'bsa': bsa,
+            'short_valve_diameter': round(rng.uniform(22, 32) * np.sqrt(bsa / 1.7), 1), 'conditions': conditions}
+
+
+def volume_curve(parameters, rng):
+    """Volume list (mm³) starting at end-systole and peaking at end-diastole, as the real volume files."""
+    phase = np.linspace(0, 1, parameters['num_frames'])
+    peak = parameters['peak_fraction']
+    shape = np.where(phase < peak, np.sin(np.pi / 2 * phase / peak) ** 1.5,
+                     0.08 + 0.92 * np.cos(np.pi / 2 * (phase - peak) / (1 - peak)))
+    shape[0] = 0.0
+    volumes = parameters['esv'] + (parameters['edv'] - parameters['esv']) * shape
+    return volumes * 1000 * (1 + rng.normal(0, 0.004, len(volumes)))
+
+
+def _velocity_waves(phase, parameters):
+    # E and A filling waves and the ejection wave (m/s) on the cycle phase, which starts at end-systole
+    peak = parameters['peak_fraction']
+    filling = (parameters['e_velocity'] * _bump(phase, 0.28 * peak, 0.07)
+               + parameters['a_velocity'] * _bump(phase, peak - 0.08, 0.04)) / 100
+    ejection = parameters['aortic_velocity'] / 100 * _bump(phase, (peak + 1) / 2, 0.08)
+    return filling, ejection
+
+
+def fluent_cycle(report, time, parameters):
+    """Analytic value of a Fluent report over one cycle starting at end-systole, time in s."""
+    phase = time / (parameters['rr_duration'] / 1000)
+    filling, ejection = _velocity_waves(phase, parameters)
+    values = {
+        'ventricle-average-velocity-inlet.out': 0.35 * filling,
+        'ventricle-average-velocity-outlet.out': 0.3 * ejection + 0.02,
+        'velocity-plane-over-valves.out': 0.2 * (filling + ejection) + 0.01,
+        'ventricle-average-kinetic-energy.out': 40 * (filling + ejection) ** 2 + 0.5,
+        'ventricle-average-turbulent-kinetic-energy.out': 0.002 * (1 + filling + 0.6 * ejection),
+        'ventricle-average-wss.out': 0.15 + 0.6 * (filling + ejection),
+        'ventricle-energy-loss.out': 1e-6 * (0.3 + 3 * (filling + ejection) ** 2),
+    }
+    return values[report]
+
+
+def _write_lines(path, lines):
+    with open(path, 'w') as file:
+        file.write('\n'.join(lines) + '\n')
+
+
+def _write_header(path, parameters, timestamps):
+    lines = [
+        '#LeftVentricle',
+        f"Number of frames   \t\t{len(timestamps)}",
+        'Number of vertices \t\t862',
+        'Number of triangles\t\t1720',
+        '', '',
+        '#Timing Information',
+        f"Average RR Duration\t\t{parameters['rr_duration']:.3f}\t\tms",
+        'Enddiastole time   \t\t0\t\t    ms',
+        f"Endsystole time    \t\t{parameters['endsystole_time']:.3f}\t\tms",
+        '', '',
+        '#Timestamps',
+    ]
+    lines += [f"{value:g}\t\tms" for value in timestamps]
+    _write_lines(path, lines)
+
+
+def _write_volume_file(path, volumes):
+    edv, esv = volumes.max() / 1000, volumes.min() / 1000
+    _write_lines(path, [
+        f"Max volume (EDV): {edv} ml at position: {int(np.argmax(volumes))}",
+        f"Min volume (ESV): {esv} ml at position: {int(np.argmin(volumes))}",
+        f"Stroke volume: {edv - esv} ml",
+        f"Volumelist: [{', '.join(repr(float(value)) for value in volumes)}]",
+    ])
+
+
+def _write_doppler(path, time, velocity):
+    _write_lines(path, [f"{t!r}, {v!r}" for t, v in zip(time.tolist(), velocity.tolist())])
+
+
+def _doppler_traces(parameters, rng):
+    # Irregularly digitized single-beat traces (time in s, velocity in cm/s), as the real Doppler CSVs
+    rr = parameters['rr_duration'] / 1000
+    traces = {}
+    for valve, count in (('mv', rng.integers(30, 46)), ('av', rng.integers(18, 30))):
+        time = np.sort(np.concatenate([[0.0, rr], rng.uniform(0, rr, count - 2)]))
+        filling, ejection = _velocity_waves(time / rr, parameters)
+        velocity = 100 * (filling if valve == 'mv' else ejection)
+        traces[valve] = (time, np.maximum(velocity + rng.normal(0, 0.5, len(time)), 0))
+    return traces
+
+
+def _write_case(root, patient, condition, patient_info, rng, fluent=True, cycles=3):
+    parameters = patient_info['conditions'][condition]
+    case = f'{patient}_{condition}'
+    ventricle_directory = os.path.join(root, 'Ventricle_Database')
+
+    # MRI header
+    case_path = os.path.join(ventricle_directory, 'data', patient_info['patient_type'], condition, patient)
+    os.makedirs(case_path, exist_ok=True)
+    frame_interval = parameters['rr_duration'] / (parameters['num_frames'] + rng.uniform(0, 3))
+    _write_header(os.path.join(case_path, 'header.txt'), parameters, np.arange(parameters['num_frames']) * frame_interval)
+
+    # Raw and reconstructed volume lists, and the interpolated reconstructed volumes
+    raw_volumes = volume_curve(parameters, rng)
+    reconstructed_volumes = raw_volumes * (1 + 0.02 * np.sin(np.linspace(0, 2 * np.pi, len(raw_volumes)) + rng.uniform(0, 2 * np.pi)))
+    volume_directory = os.path.join(ventricle_directory, 'data', 'volumes')
+    _write_volume_file(os.path.join(volume_directory, 'raw', f'{case}.txt'), raw_volumes)
+    _write_volume_file(os.path.join(volume_directory, 'reconstructed', f'{case}.txt'), reconstructed_volumes)
+
+    # Doppler traces, also as the case directory and VTI copies
+    vti_group = 'healthy' if patient_info['patient_type'] == 'healthy' else 'univentricle'
+    doppler_directory = os.path.join(root, 'Doppler', case)
+    os.makedirs(doppler_directory, exist_ok=True)
+    for valve, (time, velocity) in _doppler_traces(parameters, rng).items():
+        _write_doppler(os.path.join(doppler_directory, f'{case}_{valve}.csv'), time, velocity)
+        _write_doppler(os.path.join(case_path, 'mitral.csv' if valve == 'mv' else 'aortic.csv'), time, velocity)
+        _write_doppler(os.path.join(ventricle_directory, 'vti', vti_group, f'{case}_{valve}.csv'), time, velocity)
+
+    rr = parameters['rr_duration'] / 1000
+    timesteps = FLUENT_REPORT_STRIDE * max(1, round(rr / FLUENT_TIMESTEP_SIZE / FLUENT_REPORT_STRIDE))
+    cycle_time = np.linspace(0, rr, timesteps + 1)
+    interpolated_volumes = np.interp(cycle_time, np.linspace(0, rr, len(reconstructed_volumes)), reconstructed_volumes / 1000)
+    _write_lines(os.path.join(volume_directory, 'reconstructed', f'{case}_interpolated.csv'),
+                 ['Time Steps,Interpolated Volumes'] + [f"{t!r},{v!r}" for t, v in zip(cycle_time.tolist(), interpolated_volumes.tolist())])
+
+    # Fluent reports over several cycles, plus the interpolated third cycle written by separator.py
+    if fluent:
+        fluent_directory = os.path.join(root, 'Fluent_Results', case)
+        os.makedirs(fluent_directory, exist_ok=True)
+        steps = np.arange(FLUENT_REPORT_STRIDE, cycles * timesteps + 1, FLUENT_REPORT_STRIDE)
+        flow_time = steps * rr / timesteps
+        for file_name, (report, header_name, column) in FLUENT_REPORTS.items():
+            values = fluent_cycle(file_name, np.mod(flow_time, rr), parameters) * (1 + rng.normal(0, 0.01, len(steps)))
+            _write_lines(os.path.join(fluent_directory, file_name),
+                         [f'"{report}"', f'"Time Step" "{header_name}"', f'("Time Step" "{column}" "flow-time")']
+                         + [f"{step} {value!r} {t!r}" for step, value, t in zip(steps.tolist(), values.tolist(), flow_time.tolist())])
+            interpolated = fluent_cycle(file_name, cycle_time, parameters)
+            _write_lines(os.path.join(fluent_directory, f'{os.path.splitext(file_name)[0]}_interpolated.csv'),
+                         ['Flow Time,Interpolated Data'] + [f"{t!r},{v!r}" for t, v in zip(cycle_time.tolist(), interpolated.tolist())])
+
+    timing = {'case': case, 'RR_DURATION': rr, 'END_DIASTOLE_TIME': rr - parameters['endsystole_time'] / 1000,
+              'END_SYSTOLE_TIME': parameters['endsystole_time'] / 1000, 'TIMESTEPS': timesteps}
+    return timing, raw_volumes, reconstructed_volumes
+
+
+def _generate_patient(root, patient, seed_sequence, fluent, cycles):
+    rng = np.random.default_rng(seed_sequence)
+    patient_type = PATIENT_TYPES[int(rng.integers(len(PATIENT_TYPES)))]
+    patient_info = synthetic_patient(rng, patient_type)
+    group = 'healthy' if patient_type == 'healthy' else 'univentr'
+    anthropometrics = {'Weights [kg]': round(patient_info['weight'], 1), 'Height [cm]': round(patient_info['height'], 1),
+                       'BSA [m^2]': round(patient_info['bsa'], 4)}
+    timings, rows = [], {'raw': [], 'reconstructed': []}
+    for condition in CONDITIONS:
+        timing, raw_volumes, reconstructed_volumes = _write_case(root, patient, condition, patient_info, rng, fluent, cycles)
+        timings.append(timing)
+        parameters = patient_info['conditions'][condition]
+        header = {'rr_duration': parameters['rr_duration']}
+        ea_ratio = parameters['e_velocity'] / parameters['a_velocity']
+        for volume_type, volumes in (('raw', raw_volumes), ('reconstructed', reconstructed_volumes)):
+            metrics = volume_metrics(list(volumes / 1000))
+            rows[volume_type].append(case_cardiac_parameters(
+                metrics, header, patient.capitalize(), condition, group,
+                dict(anthropometrics, **{'E/A_ratio': ea_ratio if volume_type == 'raw' else None})))
+    return timings, rows, patient_info['short_valve_diameter']
+
+
+def generate_cohort(root, num_patients, seed=0, fluent=True, cycles=3, prefix='synth', max_workers=None):
+    """
+    Write a synthetic cohort in the repository layout read by the scripts and the case registry.
+
+    Every patient gets pre and post cases with a header.txt, raw and
+    reconstructed volume lists (plus the interpolated volumes), Doppler and
+    VTI traces, optionally Fluent .out reports over several cycles with their
+    interpolated CSVs, and rows in time_information.csv and the
+    Cardiac_Parameters tables. Each patient draws from its own child of the
+    seed, so the output does not depend on max_workers.
+
+    Parameters:
+    - root: Directory to write into (used as the repository root, e.g. for load_case_registry(root)).
+    - num_patients: Number of synthetic patients.
+    - seed: Seed of the cohort.
+    - fluent: If False, the Fluent reports are skipped (much faster for large cohorts).
+    - cycles: Number of cardiac cycles in the Fluent reports.
+    - prefix: Patient name prefix; names are '<prefix><index>'.
+    - max_workers: Size of the thread pool writing the patients.
+
+    Returns:
+    - cases: List of the generated case names.
+    - short_diameters: Short mitral diameter (mm) per patient, in the format of
+      short_valve_diameters (pass it as build_cardiac_graph(short_diameters=...)).
+    """
+    if not prefix.isalpha():
+        raise ValueError(f"Patient prefix '{prefix}' must be alphabetic to match the case name pattern")
+    for directory in (os.path.join(root, 'Ventricle_Database', 'data', 'volumes', 'raw'),
+                      os.path.join(root, 'Ventricle_Database', 'data', 'volumes', 'reconstructed'),
+                      os.path.join(root, 'Ventricle_Database', 'vti', 'healthy'),
+                      os.path.join(root, 'Ventricle_Database', 'vti', 'univentricle'),
+                      os.path.join(root, 'Fluent_Results'),
+                      os.path.join(root, 'Cardiac_Parameters')):
+        os.makedirs(directory, exist_ok=True)
+
+    width = max(5, len(str(num_patients)))
+    patients = [f'{prefix}{index:0{width}d}' for index in range(1, num_patients + 1)]
+    seeds = np.random.SeedSequence(seed).spawn(num_patients)
+    results = budgeted_map(lambda item: _generate_patient(root, item[0], item[1], fluent, cycles), zip(patients, seeds), max_workers)
+
+    timings = [timing for patient_timings, _, _ in results for timing in patient_timings]
+    _write_lines(os.path.join(root, 'Fluent_Results', 'time_information.csv'),
+                 ['case,RR_DURATION,END_DIASTOLE_TIME,END_SYSTOLE_TIME,TIMESTEPS']
+                 + [f"{row['case']},{row['RR_DURATION']:.6f},{row['END_DIASTOLE_TIME']:.7f},{row['END_SYSTOLE_TIME']:.7f},{row['TIMESTEPS']}" for row in timings])
+    for volume_type in ('raw', 'reconstructed'):
+        table = cohort_table(*[row for _, rows, _ in results for row in rows[volume_type]])
+        table.to_csv(os.path.join(root, 'Cardiac_Parameters', f'{volume_type}_data.csv'), index=False)
+    short_diameters = {patient: diameter for patient, (_, _, diameter) in zip(patients, results)}
+    return [timing['case'] for timing in timings], short_diameters
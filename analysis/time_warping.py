@@ -0,0 +1,99 @@
+import numpy as np
+
+
+def pad_curves(curves):
+    """
+    Stack curves of different lengths into one NaN-padded array.
+
+    Returns:
+    - stack: Array of shape (curves, max_frames).
+    - lengths: Number of frames of every curve, shape (curves,).
+    """
+    lengths = np.array([len(curve) for curve in curves], dtype=int)
+    if np.any(lengths < 2):
+        raise ValueError("Every curve needs at least two frames to be warped")
+    stack = np.full((len(curves), lengths.max(initial=2)), np.nan)
+    mask = np.arange(stack.shape[1]) < lengths[:, None]
+    stack[mask] = np.concatenate([np.asarray(curve, dtype=float) for curve in curves]) if len(curves) else []
+    return stack, lengths
+
+
+def extrema_landmarks(stack, lengths):
+    """
+    ES (minimum volume) and ED (maximum volume) positions of every curve on its normalized time axis.
+
+    Returns:
+    - Array of shape (curves, 2) with the [ES, ED] positions in [0, 1].
+    """
+    es_frames = np.nanargmin(stack, axis=1)
+    ed_frames = np.nanargmax(stack, axis=1)
+    return np.stack([es_frames, ed_frames], axis=1) / (lengths[:, None] - 1)
+
+
+def header_landmarks(timestamps, systole_duration, rr_duration):
+    """
+    ES and ED positions of a header.txt on the normalized frame axis.
+
+    The volume list starts at ES (frame 0, its minimum). As in
+    parse_rr_duration_from_header, 'Endsystole time' is the duration of
+    systole, so ED follows ES after the diastole duration RR - systole.
+    Frame j was acquired at timestamps[j]; an ED past the last frame is
+    clipped to the end of the curve.
+
+    Returns:
+    - Array with the [ES, ED] positions in [0, 1], in the order of extrema_landmarks.
+    """
+    timestamps = np.asarray(timestamps, dtype=float)
+    num_frames = len(timestamps)
+    # Frame position of a time in the cycle; the RR duration closes the cycle at frame num_frames
+    cycle_times = np.append(timestamps - timestamps[0], rr_duration)
+    ed_frame = np.interp(rr_duration - systole_duration, cycle_times, np.arange(num_frames + 1))
+    return np.clip(np.array([0.0, ed_frame]) / (num_frames - 1), 0, 1)
+
+
+def warp_curves(stack, lengths, landmarks, reference=None, num_points=100):
+    """
+    Align every curve on its landmarks with a piecewise-linear time warp.
+
+    The normalized time of each curve is mapped piecewise-linearly so its
+    landmarks land on the reference landmarks, then the curve is sampled on
+    a common grid. All curves are warped at once with vectorized index
+    arithmetic on the (curves x frames) stack. Without landmarks this is the
+    plain linear stretch of normalize_time_series.
+
+    Parameters:
+    - stack, lengths: Output of pad_curves.
+    - landmarks: Landmark positions in [0, 1], shape (curves, landmarks), in
+      the same temporal order for every curve.
+    - reference: Target landmark positions, shape (landmarks,) (default: mean of the curves).
+    - num_points: Number of points of the common grid.
+
+    Returns:
+    - time: Common normalized time grid, shape (num_points,).
+    - warped: Aligned curves, shape (curves, num_points).
+    - reference: Reference landmark positions used.
+    """
+    landmarks = np.asarray(landmarks, dtype=float).reshape(len(stack), -1)
+    if np.any(np.diff(landmarks, axis=1) < 0):
+        raise ValueError("Landmarks must be in the same temporal order for every curve")
+    reference = landmarks.mean(axis=0) if reference is None else np.asarray(reference, dtype=float)
+
+    # Knots of the warp: [0, landmarks..., 1] in reference and curve time
+    num_curves = len(stack)
+    reference_knots = np.concatenate([[0.0], reference, [1.0]])
+    curve_knots = np.hstack([np.zeros((num_curves, 1)), landmarks, np.ones((num_curves, 1))])
+
+    # Reference time -> curve time (the segment lookup is shared by all curves)
+    time = np.linspace(0, 1, num_points)
+    segment = np.clip(np.searchsorted(reference_knots, time, side='right') - 1, 0, len(reference_knots) - 2)
+    span = reference_knots[segment + 1] - reference_knots[segment]
+    fraction = np.divide(time - reference_knots[segment], span, out=np.zeros_like(time), where=span > 0)
+    curve_time = curve_knots[:, segment] + fraction * (curve_knots[:, segment + 1] - curve_knots[:, segment])
+
+    # Curve time -> frame position, then linear interpolation between frames
+    position = curve_time * (lengths[:, None] - 1)
+    lower = np.clip(np.floor(position).astype(int), 0, lengths[:, None] - 2)
+    weight = position - lower
+    rows = np.arange(num_curves)[:, None]
+    warped = stack[rows, lower] * (1 - weight) + stack[rows, lower + 1] * weight
+    return time, warped, reference
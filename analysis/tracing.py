@@ -0,0 +1,292 @@
+import atexit
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+from .memory_budget import current_rss
+
+# Setting this environment variable to a file path enables tracing at import and writes the Chrome trace at exit
+TRACE_ENVIRONMENT_VARIABLE = 'ANALYSIS_TRACE'
+
+# Setting this environment variable as well also records the peak memory of every span
+TRACE_MEMORY_ENVIRONMENT_VARIABLE = 'ANALYSIS_TRACE_MEMORY'
+
+_enabled = False
+_track_memory = False
+_started_tracemalloc = False
+_events = []
+_lock = threading.Lock()
+_local = threading.local()
+_export_path = None
+
+# Shared no-op context returned by span() while tracing is disabled
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class _Span:
+    __slots__ = ('stage', 'case', 'tags', 'start')
+
+    def __init__(self, stage, case, tags):
+        self.stage = stage
+        self.case = case
+        self.tags = tags
+
+    def __enter__(self):
+        if _track_memory:
+            _push_memory_frame()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter_ns()
+        peak_memory = _pop_memory_frame() if _track_memory else None
+        thread = threading.current_thread()
+        event = {
+            'stage': self.stage,
+            'case': self.case if self.case is not None else getattr(_local, 'case', None),
+            'pid': os.getpid(),
+            'tid': thread.ident,
+            'worker': f'{os.getpid()}:{thread.name}',
+            'start_ns': self.start,
+            'duration_ns': end - self.start,
+            'peak_memory_bytes': peak_memory,
+            'rss_bytes': current_rss() if _track_memory else None,
+            'tags': self.tags,
+        }
+        with _lock:
+            _events.append(event)
+        return False
+
+
+def _push_memory_frame():
+    # tracemalloc keeps one process-wide peak: fold it into the enclosing span before resetting it
+    current, peak = tracemalloc.get_traced_memory()
+    frames = _local.__dict__.setdefault('memory_frames', [])
+    if frames:
+        frames[-1][1] = max(frames[-1][1], peak)
+    tracemalloc.reset_peak()
+    frames.append([current, current])
+
+
+def _pop_memory_frame():
+    _, peak = tracemalloc.get_traced_memory()
+    frames = _local.__dict__.get('memory_frames')
+    if not frames:
+        return None
+    baseline, seen = frames.pop()
+    peak = max(seen, peak)
+    if frames:
+        frames[-1][1] = max(frames[-1][1], peak)
+    return peak - baseline
+
+
+def tracing_enabled():
+    """Whether span() currently records events."""
+    return _enabled
+
+
+def enable_tracing(export_path=None, memory=False):
+    """
+    Start recording spans in this process.
+
+    Parameters:
+    - export_path: If given, the Chrome trace is written there when the process exits.
+    - memory: Also record the peak traced allocation of every span (tracemalloc)
+      and the RSS at its end. Tracing allocations slows Python code down
+      noticeably, and with several threads the peaks of overlapping spans mix.
+    """
+    global _enabled, _track_memory, _started_tracemalloc, _export_path
+    _enabled = True
+    if memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracemalloc = True
+        _track_memory = True
+    if export_path is not None:
+        if _export_path is None:
+            atexit.register(_export_at_exit)
+        _export_path = export_path
+
+
+def disable_tracing():
+    """Stop recording spans and allocations (the recorded events are kept)."""
+    global _enabled, _track_memory, _started_tracemalloc
+    _enabled = False
+    _track_memory = False
+    if _started_tracemalloc:
+        _started_tracemalloc = False
+        tracemalloc.stop()
+
+
+def span(stage, case=None, **tags):
+    """
+    Context manager timing one stage.
+
+    While tracing is disabled this returns a shared no-op context, so the
+    instrumented code only pays for one function call and a flag check.
+
+    Parameters:
+    - stage: Stage label, e.g. 'main.read_header'.
+    - case: Case name (default: the case set by case_context in this thread).
+    - tags: Extra values stored with the event and shown in the trace viewer.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(stage, case, tags)
+
+
+@contextlib.contextmanager
+def case_context(case):
+    """Tag every span opened in this thread inside the block with the given case name."""
+    previous = getattr(_local, 'case', None)
+    _local.case = case
+    try:
+        yield
+    finally:
+        _local.case = previous
+
+
+def traced(stage):
+    """Decorator wrapping every call of a function in span(stage)."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with _Span(stage, None, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_events():
+    """Copy of the events recorded so far (picklable, so workers can return them to the parent)."""
+    with _lock:
+        return list(_events)
+
+
+def add_events(events):
+    """Merge events recorded by another process, e.g. a pool worker."""
+    with _lock:
+        _events.extend(events)
+
+
+def clear_events():
+    with _lock:
+        _events.clear()
+
+
+def chrome_trace(events=None):
+    """
+    Convert events to the Chrome trace event format (also read by Perfetto).
+
+    Every span becomes a complete ('X') event on its process and thread, so
+    parallel workers show up as separate timeline rows.
+    """
+    events = get_events() if events is None else events
+    origin = min((event['start_ns'] for event in events), default=0)
+    trace_events = []
+    threads = {}
+    for event in events:
+        args = dict(event['tags'])
+        if event['case'] is not None:
+            args['case'] = event['case']
+        if event.get('peak_memory_bytes') is not None:
+            args['peak_memory_mb'] = event['peak_memory_bytes'] / 2 ** 20
+        trace_events.append({
+            'name': event['stage'],
+            'cat': event['stage'].split('.', 1)[0],
+            'ph': 'X',
+            'ts': (event['start_ns'] - origin) / 1000,
+            'dur': event['duration_ns'] / 1000,
+            'pid': event['pid'],
+            'tid': event['tid'],
+            'args': {key: value if isinstance(value, (int, float, str, bool)) or value is None else str(value)
+                     for key, value in args.items()},
+        })
+        threads[(event['pid'], event['tid'])] = event['worker']
+        if event.get('rss_bytes') is not None:
+            # Counter track of the process RSS, sampled at the end of every span
+            trace_events.append({'name': 'rss_mb', 'ph': 'C', 'ts': (event['start_ns'] + event['duration_ns'] - origin) / 1000,
+                                 'pid': event['pid'], 'args': {'rss_mb': event['rss_bytes'] / 2 ** 20}})
+    for (pid, tid), worker in threads.items():
+        trace_events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': worker}})
+    return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+
+def export_chrome_trace(path, events=None):
+    """Write the events as a Chrome trace JSON file (open it in chrome://tracing or ui.perfetto.dev)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump(chrome_trace(events), file)
+
+
+def _self_durations(events):
+    # Duration of every event minus that of its direct children (spans nested in it on the same thread)
+    self_ns = [event['duration_ns'] for event in events]
+    threads = {}
+    for index, event in enumerate(events):
+        threads.setdefault((event['pid'], event['tid']), []).append(index)
+    for indices in threads.values():
+        # Parents first: earlier start, and the longer span when two start together
+        indices.sort(key=lambda index: (events[index]['start_ns'], -events[index]['duration_ns']))
+        open_spans = []
+        for index in indices:
+            start = events[index]['start_ns']
+            while open_spans and events[open_spans[-1]]['start_ns'] + events[open_spans[-1]]['duration_ns'] <= start:
+                open_spans.pop()
+            if open_spans:
+                self_ns[open_spans[-1]] -= events[index]['duration_ns']
+            open_spans.append(index)
+    return self_ns
+
+
+def stage_summary(events=None):
+    """
+    Aggregate the events per stage.
+
+    Returns:
+    - DataFrame with one row per stage: the number of calls and cases, the
+      total, mean and maximum duration (ms), the self time (ms, without the
+      spans nested in it) and its share of the summed self time (%), sorted
+      by total time. Nested spans count in the totals of both stages but
+      only in the self time of the inner one, so the shares add up to 100.
+      When memory was recorded, 'peak_memory_mb' is the largest peak traced
+      allocation of a call and 'max_rss_mb' the largest RSS at the end of a call.
+    """
+    events = get_events() if events is None else events
+    columns = ['stage', 'calls', 'cases', 'total_ms', 'mean_ms', 'max_ms', 'self_ms', 'share_%']
+    if not events:
+        return pd.DataFrame(columns=columns)
+    frame = pd.DataFrame({'stage': [event['stage'] for event in events],
+                          'case': [event['case'] for event in events],
+                          'duration_ms': [event['duration_ns'] / 1e6 for event in events],
+                          'self_ms': [duration / 1e6 for duration in _self_durations(events)],
+                          'peak_memory_mb': [event.get('peak_memory_bytes') for event in events],
+                          'rss_mb': [event.get('rss_bytes') for event in events]})
+    frame[['peak_memory_mb', 'rss_mb']] = frame[['peak_memory_mb', 'rss_mb']].astype(float) / 2 ** 20
+    summary = frame.groupby('stage').agg(calls=('duration_ms', 'size'), cases=('case', 'nunique'), total_ms=('duration_ms', 'sum'),
+                                         mean_ms=('duration_ms', 'mean'), max_ms=('duration_ms', 'max'), self_ms=('self_ms', 'sum'),
+                                         peak_memory_mb=('peak_memory_mb', 'max'), max_rss_mb=('rss_mb', 'max')).reset_index()
+    summary['share_%'] = summary['self_ms'] / summary['self_ms'].sum() * 100
+    if frame['peak_memory_mb'].notna().any():
+        columns += ['peak_memory_mb', 'max_rss_mb']
+    return summary.sort_values('total_ms', ascending=False, ignore_index=True)[columns]
+
+
+def _export_at_exit():
+    if _export_path is not None and _events:
+        export_chrome_trace(_export_path)
+        print(stage_summary().to_string(index=False, float_format=lambda value: f'{value:.3f}'))
+        print(f"Trace written to {_export_path}")
+
+
+if os.environ.get(TRACE_ENVIRONMENT_VARIABLE):
+    enable_tracing(os.environ[TRACE_ENVIRONMENT_VARIABLE], memory=bool(os.environ.get(TRACE_MEMORY_ENVIRONMENT_VARIABLE)))
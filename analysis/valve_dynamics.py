@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+
+from .cardiac_tables import find_doppler_csvs, read_header, read_volume_list
+from .cases import load_case_registry
+from .derived_metrics import BLOOD_DENSITY
+from .interpolant_cache import get_interpolant, get_signal
+
+# Dynamic viscosity of blood (Pa·s), same default as calculate_reynolds_number
+BLOOD_VISCOSITY = 0.0037
+
+# Critical Reynolds number used to label the flow type
+CRITICAL_REYNOLDS = 2300
+
+VALVES = ('mv', 'av')
+
+
+def _row_max(values):
+    # Maximum of every row, NaN for rows without finite values
+    finite = np.isfinite(values)
+    return np.where(finite.any(axis=-1), np.max(np.where(finite, values, -np.inf), axis=-1, initial=-np.inf), np.nan)
+
+
+def effective_orifice_area(dv_dt, velocity, min_velocity_fraction=0.5):
+    """
+    Effective orifice area A(t) = |dV/dt(t)| / v(t) for every curve at once.
+
+    Parameters:
+    - dv_dt: Flow through the valve (ml/ms, positive), shape (cases, points).
+    - velocity: Doppler velocity (cm/s), shape (cases, points).
+    - min_velocity_fraction: Points where the velocity is below this fraction
+      of the case peak are treated as a closed valve (NaN area), which avoids
+      dividing by near-zero velocities. The digitized traces keep a baseline
+      of 5-15 cm/s outside the flow phases, so lower fractions divide by it.
+
+    Returns:
+    - Area (mm²), shape (cases, points).
+    """
+    dv_dt = np.abs(np.asarray(dv_dt, dtype=float))
+    velocity = np.asarray(velocity, dtype=float)
+    is_open = velocity > min_velocity_fraction * np.max(velocity, axis=-1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # ml/ms over cm/ms is cm², times 100 is mm², as in calculate_valve_areas
+        return np.where(is_open, dv_dt / (velocity / 1000) * 100, np.nan)
+
+
+def equivalent_diameter(area):
+    """Diameter (mm) of the circle with the given area (mm²)."""
+    return 2 * np.sqrt(np.asarray(area, dtype=float) / np.pi)
+
+
+def reynolds_number(diameter_mm, velocity_cm_s, rho=BLOOD_DENSITY, kv=BLOOD_VISCOSITY):
+    """Vectorized Reynolds number, as calculate_reynolds_number for arrays."""
+    return rho * (np.asarray(velocity_cm_s) / 100) * (np.asarray(diameter_mm) * 0.001) / kv
+
+
+def womersley_number(diameter_mm, rr_duration_ms, rho=BLOOD_DENSITY, kv=BLOOD_VISCOSITY):
+    """Womersley number alpha = R * sqrt(omega * rho / mu) with omega = 2 * pi / RR."""
+    angular_frequency = 2 * np.pi / (np.asarray(rr_duration_ms, dtype=float) / 1000)
+    return np.asarray(diameter_mm, dtype=float) * 0.001 / 2 * np.sqrt(angular_frequency * rho / kv)
+
+
+def _case_doppler_csvs(case):
+    # (mitral, aortic) traces of the case directory, as read by main.py
+    if not case['case_path']:
+        return None, None
+    aortic_csv, mitral_csv = find_doppler_csvs(case['case_path'], case['patient'])
+    return mitral_csv, aortic_csv
+
+
+def load_valve_signals(cases=None, num_points=200):
+    """
+    Resample the volume derivative and the Doppler velocities of every case onto a common grid.
+
+    Both signals are sampled at the same absolute times of the cycle: the
+    grid spans [0, RR] of each case from end-diastole, as the Doppler traces
+    (case-local CSVs, see find_doppler_csvs) do, and is stored as the
+    fraction of RR. The raw volumes are placed at their header timestamps,
+    shifted by the systole duration ('Endsystole time') since the volume
+    list starts at end-systole, closed periodically, interpolated linearly
+    and differentiated in absolute time. The traces use the cached PCHIP
+    interpolants; the velocity is 0 outside a trace, and the aortic
+    velocity is NaN when the case has no separate aortic trace (Hypox28).
+
+    Returns:
+    - Dictionary with the 'labels' (case names), the 'time' grid (fraction
+      of RR), 'rr_duration' (ms, shape (cases,)), 'dv_dt' (ml/ms) and the
+      'velocity_mv'/'velocity_av' (cm/s) arrays of shape (cases, num_points).
+    """
+    if cases is None:
+        cases = load_case_registry().values()
+    cases = [case for case in sorted(cases, key=lambda case: case['case'])
+             if case['header_path'] and case['raw_volume_path'] and all(_case_doppler_csvs(case))]
+    time = np.linspace(0, 1, num_points)
+    if not cases:
+        empty = np.empty((0, num_points))
+        return {'labels': [], 'time': time, 'rr_duration': np.empty(0), 'dv_dt': empty, 'velocity_mv': empty, 'velocity_av': empty}
+
+    headers = [read_header(case['header_path']) for case in cases]
+    rr_duration = np.array([header['rr_duration'] for header in headers], dtype=float)
+    dv_dt = np.empty((len(cases), num_points))
+    velocities = {valve: np.empty((len(cases), num_points)) for valve in VALVES}
+    for row, (case, header) in enumerate(zip(cases, headers)):
+        grid = time * rr_duration[row]
+        volumes = np.asarray(read_volume_list(case['raw_volume_path']), dtype=float)
+        timestamps = np.asarray(header['timestamps'], dtype=float)
+        if len(timestamps) != len(volumes):
+            raise ValueError(f"Case {case['case']} has {len(volumes)} volume frames but {len(timestamps)} header timestamps")
+        # The volume list starts at end-systole, which falls one systole duration after the
+        # start of the Doppler traces (end-diastole); the cycle closes with the first frame at RR
+        frame_times = np.append(timestamps - timestamps[0], rr_duration[row])
+        volume_time = np.mod(grid - header['endsystole_time'], rr_duration[row])
+        volume_curve = np.interp(volume_time, frame_times, np.append(volumes, volumes[0]))
+        dv_dt[row] = np.gradient(volume_curve, grid)
+
+        mitral_csv, aortic_csv = _case_doppler_csvs(case)
+        for valve, csv_path in zip(VALVES, (mitral_csv, aortic_csv)):
+            if valve == 'av' and aortic_csv == mitral_csv:
+                # Hypox28 rule: the mitral trace stands in for the aortic peak only, it has no ejection flow
+                velocities[valve][row] = np.nan
+                continue
+            trace_time, _ = get_signal(csv_path)
+            grid_s = grid / 1000
+            inside = (grid_s >= trace_time.min()) & (grid_s <= trace_time.max())
+            velocities[valve][row] = np.where(inside, np.maximum(get_interpolant(csv_path, kind='pchip')(grid_s), 0), 0)
+
+    signals = {'labels': [case['case'] for case in cases], 'time': time, 'rr_duration': rr_duration, 'dv_dt': dv_dt}
+    for valve in VALVES:
+        signals[f'velocity_{valve}'] = velocities[valve]
+    return signals
+
+
+def time_resolved_valves(cases=None, num_points=200, min_velocity_fraction=0.5):
+    """
+    Time-resolved effective orifice area, Reynolds number and Womersley number of both valves.
+
+    The mitral valve passes the filling flow (dV/dt > 0), the aortic valve
+    the ejected flow (dV/dt < 0). Re(t) uses the diameter of the circle with
+    area A(t); the Womersley number uses the peak area and the RR duration.
+
+    Returns:
+    - Dictionary with the load_valve_signals arrays plus 'area_<valve>' (mm²)
+      and 'reynolds_<valve>' of shape (cases, num_points) and 'womersley_<valve>'
+      of shape (cases,), for valve in ('mv', 'av').
+    """
+    result = load_valve_signals(cases, num_points)
+    flows = {'mv': np.maximum(result['dv_dt'], 0), 'av': np.maximum(-result['dv_dt'], 0)}
+    for valve in VALVES:
+        area = effective_orifice_area(flows[valve], result[f'velocity_{valve}'], min_velocity_fraction)
+        result[f'area_{valve}'] = area
+        result[f'reynolds_{valve}'] = reynolds_number(equivalent_diameter(area), result[f'velocity_{valve}'])
+        result[f'womersley_{valve}'] = womersley_number(equivalent_diameter(_row_max(area)), result['rr_duration'])
+    return result
+
+
+def valve_dynamics_table(result):
+    """
+    Summarize time_resolved_valves per case and valve.
+
+    Returns:
+    - DataFrame with the peak and mean open area (mm²), the peak Reynolds
+      number, the fraction of the grid above the critical Reynolds number and
+      the Womersley number.
+    """
+    rows = []
+    for valve in VALVES:
+        area = result[f'area_{valve}']
+        reynolds = result[f'reynolds_{valve}']
+        peak_area = _row_max(area)
+        peak_reynolds = _row_max(reynolds)
+        open_points = np.sum(~np.isnan(area), axis=1)
+        mean_area = np.where(open_points > 0, np.nansum(area, axis=1) / np.maximum(open_points, 1), np.nan)
+        turbulent_fraction = np.where(open_points > 0, np.mean(np.nan_to_num(reynolds) > CRITICAL_REYNOLDS, axis=1), np.nan)
+        for row, case in enumerate(result['labels']):
+            rows.append({
+                'case': case,
+                'valve': valve,
+                'peak_area_mm2': peak_area[row],
+                'mean_open_area_mm2': mean_area[row],
+                'peak_reynolds': peak_reynolds[row],
+                'turbulent_fraction': turbulent_fraction[row],
+                'womersley': result[f'womersley_{valve}'][row],
+            })
+    return pd.DataFrame(rows)
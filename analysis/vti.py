@@ -0,0 +1,167 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cases import REPOSITORY_ROOT
+from .downsampling import downsample
+from .interpolant_cache import get_interpolant, get_signal
+from .phases import time_window
+from .tracing import case_context, span
+
+# Doppler traces of the VTI calculation, in 'healthy' and 'univentricle' subdirectories
+VTI_DIRECTORY = os.path.join(REPOSITORY_ROOT, 'Ventricle_Database', 'vti')
+
+# Velocity thresholds (m/s) of the inflow (mitral or common atrioventricular) and aortic valve
+MV_THRESHOLD = 0.6018
+AV_THRESHOLD = 0.5729
+
+# Spacing (s) of the grid the Doppler traces are interpolated onto
+VTI_GRID_STEP = 0.000001
+
+
+def vti_grid(time, start_time=None, end_time=None, step=VTI_GRID_STEP):
+    """
+    Fine time grid over a trace, restricted to [start_time, end_time].
+
+    None leaves that side of the range open.
+    """
+    fine_time_grid = np.arange(np.min(time), np.max(time), step)
+    if start_time is not None or end_time is not None:
+        # Views, no copy
+        window = time_window(fine_time_grid, -np.inf if start_time is None else start_time, np.inf if end_time is None else end_time)
+        fine_time_grid = fine_time_grid[window]
+    return fine_time_grid
+
+
+def integrate_vti(fine_time_grid, fine_velocities, threshold):
+    """
+    Velocity-time integral of the samples above a threshold (left Riemann sum).
+
+    Returns:
+    - Tuple (VTI, time_above_threshold, velocities_above_threshold).
+    """
+    above_threshold_indices = np.where(fine_velocities > threshold)[0]
+    if len(above_threshold_indices) == 0:
+        # If no velocities are above the threshold, return VTI as 0
+        return 0.0, np.empty(0), np.empty(0)
+    fine_time_above_threshold = fine_time_grid[above_threshold_indices]
+    fine_velocities_above_threshold = fine_velocities[above_threshold_indices]
+    # VTI = velocity * time
+    VTI = np.sum(fine_velocities_above_threshold[:-1] * np.diff(fine_time_above_threshold))
+    return VTI, fine_time_above_threshold, fine_velocities_above_threshold
+
+
+def calculate_vti(file_path, start_time=None, end_time=None, threshold=0.0, phase_name="Custom", plot=False, ax=None):
+    """
+    VTI of a Doppler trace file, over the whole trace unless a time range is given.
+
+    Parameters:
+    - file_path: Two-column Doppler CSV (time, velocity).
+    - start_time, end_time: Optional time range (s); None leaves that side open.
+    - threshold: Velocities at or below it are left out of the integral.
+    - phase_name: Label of the spans and the plot.
+    - plot: Draw the trace and the integrated region on ax.
+    """
+    # Fetch the parsed trace and its linear interpolant from the process-wide cache
+    with span('vti.read_signal', phase=phase_name):
+        time, velocity = get_signal(file_path)
+        interpolation_function = get_interpolant(file_path, kind='linear')
+
+    with span('vti.interpolate', phase=phase_name):
+        fine_time_grid = vti_grid(time, start_time, end_time)
+        fine_velocities = interpolation_function(fine_time_grid)
+
+    with span('vti.integrate', phase=phase_name):
+        VTI, fine_time_above_threshold, fine_velocities_above_threshold = integrate_vti(fine_time_grid, fine_velocities, threshold)
+
+    if plot:
+        with span('vti.plot', phase=phase_name):
+            plot_vti_region(time, velocity, fine_time_above_threshold, fine_velocities_above_threshold, phase_name, ax)
+    return VTI
+
+
+def plot_vti_region(time, velocity, fine_time_above_threshold, fine_velocities_above_threshold, phase_name, ax):
+    """Plot a Doppler trace and highlight the region above the threshold."""
+    ax.plot(*downsample(time, velocity, ax), label=f'{phase_name} Doppler', linewidth=1)
+    # The region comes from the 1 µs grid: keep only its envelope at pixel resolution
+    fill_time, fill_velocities = downsample(fine_time_above_threshold, fine_velocities_above_threshold, ax, method='minmax')
+    ax.fill_between(
+        fill_time,
+        0,
+        fill_velocities,
+        color='lightblue',
+        alpha=0.5
+    )
+    ax.set_title(f'VTI Calculation - {phase_name}')
+    ax.set_xlabel('Time (s)')
+    ax.set_ylabel('Velocity (m/s)')
+    ax.grid(True)
+    ax.legend()
+
+
+def case_vti(case_name, case_type, mv_threshold, av_threshold, custom_range=None, axs=None, base_directory=VTI_DIRECTORY):
+    """
+    VTI of the mitral and aortic Doppler traces of a case.
+
+    Parameters:
+    - case_name: Case name, e.g. 'hypox01_pre'.
+    - case_type: Subdirectory of base_directory ('healthy' or 'univentricle').
+    - mv_threshold, av_threshold: Velocity thresholds of the mitral and aortic valve.
+    - custom_range: Optional (start, end) time range (s); otherwise the whole trace.
+    - axs: Optional pair of axes (mv, av) to plot on.
+
+    Returns:
+    - Dictionary mapping each trace file name to its rounded VTI: 'Diastole VTI'
+      for the mitral trace, 'Systole VTI' for the aortic one, or 'Custom VTI'
+      with custom_range. Missing traces are skipped.
+    """
+    results = {}
+    # Tag the VTI spans of both valves with the case
+    with case_context(case_name):
+        for i, valve_type in enumerate(['mv', 'av']):  # 'mv' for mitral valve, 'av' for aortic valve
+            file_name = f"{case_name}_{valve_type}.csv"
+            file_path = os.path.join(base_directory, case_type, file_name)
+            if not os.path.exists(file_path):
+                print(f"File {file_path} does not exist. Skipping.")
+                continue
+
+            threshold = mv_threshold if valve_type == 'mv' else av_threshold
+            ax = axs[i] if axs is not None else None
+            if custom_range:
+                custom_vti = round(calculate_vti(file_path, start_time=custom_range[0], end_time=custom_range[1], threshold=threshold, plot=ax is not None, ax=ax), 2)
+                results[file_name] = {'Custom VTI': custom_vti}
+            else:
+                # Each trace covers the flow phase of its valve (mitral inflow in diastole, aortic
+                # outflow in systole) and starts near end-diastole, not at the start of the CFD
+                # cycle, so its whole-trace VTI is the VTI of that phase
+                phase_name = "Diastole" if valve_type == 'mv' else "Systole"
+                vti = round(calculate_vti(file_path, threshold=threshold, phase_name=phase_name, plot=ax is not None, ax=ax), 2)
+                results[file_name] = {f'{phase_name} VTI': vti}
+    return results
+
+
+def cohort_vti_table(base_directory=VTI_DIRECTORY, mv_threshold=MV_THRESHOLD, av_threshold=AV_THRESHOLD):
+    """
+    VTI of every Doppler trace under base_directory, over the whole trace.
+
+    Traces are named <case>_<valve>.csv in case type subdirectories; 'mv'
+    and 'avv' traces use the inflow threshold, 'av' traces the aortic one.
+
+    Returns:
+    - DataFrame with the 'case', 'case_type', 'valve' and 'vti' of every trace.
+    """
+    rows = []
+    for case_type in sorted(os.listdir(base_directory)):
+        directory = os.path.join(base_directory, case_type)
+        if not os.path.isdir(directory):
+            continue
+        for file_name in sorted(os.listdir(directory)):
+            if not file_name.endswith('.csv') or '_' not in file_name:
+                continue
+            case_name, valve = file_name[:-len('.csv')].rsplit('_', 1)
+            threshold = av_threshold if valve == 'av' else mv_threshold
+            with case_context(case_name):
+                vti = calculate_vti(os.path.join(directory, file_name), threshold=threshold)
+            rows.append({'case': case_name, 'case_type': case_type, 'valve': valve, 'vti': float(vti)})
+    return pd.DataFrame(rows, columns=['case', 'case_type', 'valve', 'vti'])
@@ -0,0 +1,48 @@
+import argparse
+import sys
+import time
+
+from analysis.cases import REPOSITORY_ROOT
+from analysis.run_diff import DEFAULT_ATOL, DEFAULT_RTOL, diff_runs, load_run, write_run_tables
+
+
+def parse_tolerance(text):
+    """Parse a per-source tolerance 'source=atol,rtol'."""
+    source, _, values = text.partition('=')
+    try:
+        atol, rtol = (float(value) for value in values.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid tolerance '{text}', expected source=atol,rtol")
+    return source, (atol, rtol)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show which pipeline outputs moved between two runs.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    snapshot = subparsers.add_parser('snapshot', help="Write the VTI and Mean-StD tables of a run so they can be compared")
+    snapshot.add_argument('--root', default=REPOSITORY_ROOT, help="Repository root of the run (default: this checkout)")
+    compare = subparsers.add_parser('diff', help="Compare the outputs of two runs")
+    compare.add_argument('before', help="Repository root (or copy) of the reference run")
+    compare.add_argument('after', help="Repository root (or copy) of the new run")
+    compare.add_argument('--atol', type=float, default=DEFAULT_ATOL, help="Absolute tolerance")
+    compare.add_argument('--rtol', type=float, default=DEFAULT_RTOL, help="Relative tolerance")
+    compare.add_argument('--tolerance', type=parse_tolerance, action='append', default=[],
+                         help="Tolerance of one source, e.g. interpolated=1e-6,1e-4 (repeatable)")
+    args = parser.parse_args()
+
+    if args.command == 'snapshot':
+        for path in write_run_tables(args.root):
+            print(f"Table saved to {path}")
+        sys.exit(0)
+
+    start = time.perf_counter()
+    before, after = load_run(args.before), load_run(args.after)
+    diff = diff_runs(before, after, args.atol, args.rtol, dict(args.tolerance))
+    elapsed = time.perf_counter() - start
+    points = sum(len(values) for values in before.values())
+    print(f"Compared {len(before)} outputs ({points} values) in {elapsed:.2f} s")
+    if diff.empty:
+        print("No output moved beyond tolerance")
+        sys.exit(0)
+    print(diff.to_string(index=False, float_format=lambda value: f"{value:.6g}"))
+    sys.exit(1)
@@ -0,0 +1,23 @@
+import argparse
+import time
+
+from analysis.memory_budget import set_memory_budget
+from analysis.synthetic_cohort import generate_cohort
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a seeded synthetic cohort in the repository layout.")
+    parser.add_argument('root', help="Directory to write the cohort into")
+    parser.add_argument('--patients', type=int, default=1000, help="Number of synthetic patients")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the cohort")
+    parser.add_argument('--cycles', type=int, default=3, help="Cardiac cycles in the Fluent reports")
+    parser.add_argument('--no-fluent', action='store_true', help="Skip the Fluent reports")
+    parser.add_argument('--workers', type=int, help="Size of the writer thread pool")
+    parser.add_argument('--memory-budget', help="Lower the writer concurrency above this memory use, e.g. 2GB")
+    args = parser.parse_args()
+    if args.memory_budget:
+        set_memory_budget(args.memory_budget)
+
+    start = time.perf_counter()
+    cases, _ = generate_cohort(args.root, args.patients, seed=args.seed, fluent=not args.no_fluent,
+                               cycles=args.cycles, max_workers=args.workers)
+    print(f"Wrote {len(cases)} cases to {args.root} in {time.perf_counter() - start:.1f} s")
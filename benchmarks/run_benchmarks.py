@@ -0,0 +1,314 @@
+import argparse
+import contextlib
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import scipy
+
+# The ventricle helpers (functions/) and main.py are imported from Ventricle_Database
+REPOSITORY_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+VENTRICLE_DATABASE = os.path.join(REPOSITORY_ROOT, 'Ventricle_Database')
+sys.path.insert(0, VENTRICLE_DATABASE)
+from analysis.fluent_reports import separate_report
+from analysis.interpolant_cache import clear_cache
+from analysis.memory_budget import set_memory_budget
+from analysis.tracing import enable_tracing, export_chrome_trace, stage_summary
+from analysis.vti import calculate_vti
+from functions.doppler_areas import calculate_valve_areas
+
+# Registry of benchmarks in declaration order: name -> {'function', 'description'}
+BENCHMARKS = {}
+
+# Relative slowdown of the median time flagged as a regression
+DEFAULT_TOLERANCE = 0.25
+
+
+def benchmark(name, description):
+    """
+    Register a benchmark.
+
+    The decorated function takes (work_directory, scale) and returns the
+    zero-argument callable that is timed; everything before the return is setup.
+    """
+    def register(function):
+        BENCHMARKS[name] = {'function': function, 'description': description}
+        return function
+    return register
+
+
+def _load_script(name, path):
+    # Import a script whose file name is not a valid module name, keeping its global plot style out of the other benchmarks
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    with matplotlib.rc_context():
+        spec.loader.exec_module(module)
+    return module
+
+
+@contextlib.contextmanager
+def _working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def _beat(time):
+    # Smooth periodic velocity profile (cm/s) with an E and an A wave
+    phase = np.mod(time, 1.0)
+    return 80 * np.exp(-((phase - 0.35) / 0.06) ** 2) + 50 * np.exp(-((phase - 0.8) / 0.05) ** 2)
+
+
+def _volume_curve(rng, num_frames):
+    # Volume list (µl) starting at end-systole, peaking at end-diastole
+    phase = np.linspace(0, 1, num_frames)
+    peak = rng.uniform(0.55, 0.75)
+    shape = np.where(phase < peak, np.sin(np.pi / 2 * phase / peak), 0.1 + 0.9 * np.cos(np.pi / 2 * (phase - peak) / (1 - peak)))
+    esv, edv = rng.uniform(30, 60), rng.uniform(80, 160)
+    return (esv + (edv - esv) * shape) * 1000
+
+
+def _write_doppler_trace(path, num_beats, samples_per_beat=200):
+    time = np.linspace(0, num_beats, num_beats * samples_per_beat)
+    np.savetxt(path, np.column_stack([time, _beat(time)]), delimiter=', ')
+
+
+def _write_volume_file(path, volumes):
+    with open(path, 'w') as file:
+        file.write(f"Max volume (EDV): {volumes.max() / 1000} ml at position: {int(np.argmax(volumes))}\n")
+        file.write(f"Min volume (ESV): {volumes.min() / 1000} ml at position: {int(np.argmin(volumes))}\n")
+        file.write(f"Stroke volume: {(volumes.max() - volumes.min()) / 1000} ml\n")
+        file.write(f"Volumelist: [{', '.join(str(value) for value in volumes)}]")
+
+
+@benchmark('vti.calculate_vti', 'VTI of a multi-beat Doppler trace on the 1 µs grid')
+def bench_calculate_vti(work_directory, scale):
+    path = os.path.join(work_directory, 'trace.csv')
+    _write_doppler_trace(path, num_beats=max(1, int(5 * scale)))
+
+    def run():
+        clear_cache()
+        calculate_vti(path, None, None, threshold=10)
+    return run
+
+
+@benchmark('doppler_areas.calculate_valve_areas', 'Valve areas of many cases (Newton loop per case)')
+def bench_calculate_valve_areas(work_directory, scale):
+    rng = np.random.default_rng(0)
+    num_cases = max(1, int(10000 * scale))
+    inputs = np.column_stack([rng.uniform(-0.4, -0.2, num_cases), rng.uniform(0.2, 0.4, num_cases),
+                              rng.uniform(50, 110, num_cases), rng.uniform(50, 80, num_cases), rng.uniform(22, 26, num_cases)])
+
+    def run():
+        for min_dv_dt, max_dv_dt, velocity_aortic, velocity_mitral, diameter in inputs:
+            calculate_valve_areas(min_dv_dt, max_dv_dt, velocity_aortic, velocity_mitral, diameter)
+    return run
+
+
+@benchmark('separator.report', 'Parse, phase-split and interpolate a Fluent report with 10^5 timesteps per cycle')
+def bench_separator_report(work_directory, scale):
+    timesteps = max(10, int(100000 * scale))
+    rr_duration, end_diastole_time, end_systole_time = 0.9, 0.6, 0.3
+    path = os.path.join(work_directory, 'report.out')
+    steps = np.arange(1, 3 * timesteps + 1)
+    flow_time = steps * rr_duration / timesteps
+    with open(path, 'w') as file:
+        file.write('"report-rfile"\n"Time Step" "report etc.."\n')
+        np.savetxt(file, np.column_stack([steps, np.sin(flow_time * 7), flow_time]), fmt=['%d', '%.12g', '%.12g'])
+
+    def run():
+        separate_report(path, rr_duration, end_diastole_time, end_systole_time, timesteps)
+    return run
+
+
+def _volume_cohort(work_directory, scale):
+    rng = np.random.default_rng(0)
+    directory = os.path.join(work_directory, 'data', 'volumes', 'raw')
+    os.makedirs(directory, exist_ok=True)
+    patients = [f'synthetic{index:05d}' for index in range(max(2, int(2000 * scale)))]
+    for patient in patients:
+        _write_volume_file(os.path.join(directory, f'{patient}_pre.txt'), _volume_curve(rng, rng.integers(12, 31)))
+    return patients
+
+
+@benchmark('volumes.process_group_volumes', 'Linear stretch of a cohort of volume curves (per-file read + stretch)')
+def bench_process_group_volumes(work_directory, scale):
+    volumes_script = _load_script('volumes_average', os.path.join(VENTRICLE_DATABASE, 'volumes_average min max.py'))
+    patients = _volume_cohort(work_directory, scale)
+
+    def run():
+        with _working_directory(work_directory):
+            volumes_script.process_group_volumes(patients, 'pre')
+    return run
+
+
+@benchmark('volumes.process_group_volumes_aligned', 'Landmark-aligned stretch of the same cohort')
+def bench_process_group_volumes_aligned(work_directory, scale):
+    volumes_script = _load_script('volumes_average', os.path.join(VENTRICLE_DATABASE, 'volumes_average min max.py'))
+    patients = _volume_cohort(work_directory, scale)
+
+    def run():
+        with _working_directory(work_directory):
+            volumes_script.process_group_volumes(patients, 'pre', landmarks='extrema')
+    return run
+
+
+@benchmark('main.process_single_case', 'Full single-case run of main.py (without displaying figures)')
+def bench_process_single_case(work_directory, scale):
+    main = _load_script('ventricle_main', os.path.join(VENTRICLE_DATABASE, 'main.py'))
+    rng = np.random.default_rng(0)
+    case_path = os.path.join(work_directory, 'case')
+    os.makedirs(case_path, exist_ok=True)
+    num_frames = 21
+    timestamps = np.arange(num_frames) * 40.0
+    with open(os.path.join(case_path, 'header.txt'), 'w') as file:
+        file.write("#Timing Information\nAverage RR Duration\t\t900.0\t\tms\nEnddiastole time   \t\t0\t\tms\n")
+        file.write("Endsystole time    \t\t320.0\t\tms\n\n\n#Timestamps\n")
+        file.write(''.join(f"{value}\t\tms\n" for value in timestamps))
+    raw_volumes = _volume_curve(rng, num_frames)
+    _write_volume_file(os.path.join(case_path, 'raw.txt'), raw_volumes)
+    _write_volume_file(os.path.join(case_path, 'reconstructed.txt'), raw_volumes * rng.uniform(0.97, 1.03, num_frames))
+    for valve in ('av', 'mv'):
+        _write_doppler_trace(os.path.join(case_path, f'{valve}.csv'), num_beats=max(1, int(scale)))
+    case = {
+        'patient_type': 'healthy', 'patient': 'synthetic', 'condition': 'pre', 'case_path': case_path,
+        'raw_volume_path': os.path.join(case_path, 'raw.txt'),
+        'reconstructed_volume_path': os.path.join(case_path, 'reconstructed.txt'),
+        'aortic_csv': os.path.join(case_path, 'av.csv'), 'mitral_csv': os.path.join(case_path, 'mv.csv'),
+        'short_valve_diameter': 24.0,
+    }
+
+    def run():
+        clear_cache()
+        with _working_directory(work_directory), open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            main.process_single_case(case)
+        plt.close('all')
+    return run
+
+
+def machine_metadata():
+    """Describe the machine, the interpreter and the library versions of a benchmark run."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPOSITORY_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'pandas': pd.__version__,
+        'git_commit': commit,
+    }
+
+
+def run_benchmarks(names=None, scale=1.0, repeats=5):
+    """
+    Time the selected benchmarks.
+
+    Returns:
+    - Dictionary with the machine 'metadata', the 'scale' and one 'results'
+      entry per benchmark with the min, median and mean time (s) over the repeats.
+    """
+    names = list(BENCHMARKS) if names is None else names
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {unknown}")
+    results = {}
+    for name in names:
+        with tempfile.TemporaryDirectory() as work_directory:
+            function = BENCHMARKS[name]['function'](work_directory, scale)
+            times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                function()
+                times.append(time.perf_counter() - start)
+        results[name] = {
+            'description': BENCHMARKS[name]['description'],
+            'min': min(times),
+            'median': statistics.median(times),
+            'mean': statistics.fmean(times),
+            'repeats': repeats,
+        }
+        print(f"{name:45s} median {results[name]['median']:.4f} s  (min {results[name]['min']:.4f} s)")
+    return {'metadata': machine_metadata(), 'scale': scale, 'results': results}
+
+
+def compare_with_baseline(run, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare the median times of a run against a baseline run.
+
+    Returns:
+    - DataFrame with the baseline and current medians, their ratio and a
+      'regression' flag when the ratio exceeds 1 + tolerance.
+    """
+    if baseline.get('scale') != run.get('scale'):
+        print(f"Warning: baseline scale {baseline.get('scale')} differs from run scale {run.get('scale')}")
+    rows = []
+    for name, result in run['results'].items():
+        reference = baseline['results'].get(name)
+        baseline_median = reference['median'] if reference else np.nan
+        ratio = result['median'] / baseline_median if reference else np.nan
+        rows.append({'benchmark': name, 'baseline': baseline_median, 'current': result['median'],
+                     'ratio': ratio, 'regression': bool(ratio > 1 + tolerance)})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the numeric hot paths on scaled synthetic inputs.")
+    parser.add_argument('--only', nargs='+', help="Benchmarks to run (default: all)")
+    parser.add_argument('--scale', type=float, default=1.0, help="Input size multiplier")
+    parser.add_argument('--repeats', type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    parser.add_argument('--baseline', help="Compare against the results stored in this JSON file")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="Allowed relative slowdown")
+    parser.add_argument('--list', action='store_true', help="List the benchmarks and exit")
+    parser.add_argument('--trace', help="Record stage spans and write them as a Chrome trace to this JSON file")
+    parser.add_argument('--trace-memory', action='store_true', help="Also record the peak memory of every span (slower)")
+    parser.add_argument('--memory-budget', help="Memory budget of the batch runners, e.g. 4GB")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, entry in BENCHMARKS.items():
+            print(f"{name:45s} {entry['description']}")
+        sys.exit(0)
+
+    if args.memory_budget:
+        set_memory_budget(args.memory_budget)
+    if args.trace:
+        enable_tracing(memory=args.trace_memory)
+    run = run_benchmarks(args.only, args.scale, args.repeats)
+    if args.trace:
+        export_chrome_trace(args.trace)
+        print(stage_summary().to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+        print(f"Trace saved to {args.trace}")
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(run, file, indent=2)
+        print(f"Results saved to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as file:
+            comparison = compare_with_baseline(run, json.load(file), args.tolerance)
+        print(comparison.to_string(index=False, float_format=lambda value: f"{value:.4f}"))
+        if comparison['regression'].any():
+            print("Regressions detected")
+            sys.exit(1)